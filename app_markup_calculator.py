@@ -1,818 +1,851 @@
 import streamlit as st
-import re
+import hashlib
+import sqlite3
+import tracemalloc
+import uuid
+import zlib
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-def create_multi_level_table(display_df, df, has_exchange_rate, commission_rates):
-    """멀티레벨 헤더를 가진 HTML 테이블 생성 - 동적 수수료 지원"""
-    # 기본 컬럼 정의
-    base_cols = ['Rate ID', 'Program ID', '시작일', '종료일', '옵션명', '사이트', '대상', '넷가(바트)', '세일가(바트)']
-    
-    # 커미션별 컬럼 정의 (동적으로 생성)
-    commission_cols_dict = {}
-    for comm_rate in commission_rates:
-        comm_rate_str = str(comm_rate).replace('.', '_')
-        if has_exchange_rate:
-            commission_cols_dict[comm_rate] = [
-                f'마크업_{comm_rate_str}', 
-                f'최종세일가(바트)_{comm_rate_str}%', 
-                f'(원)세일가_{comm_rate_str}%',
-                f'최종판매가_{comm_rate_str}%', 
-                f'공급가_{comm_rate_str}%', 
-                f'마진_{comm_rate_str}%(원화)'
-            ]
-        else:
-            commission_cols_dict[comm_rate] = [
-                f'마크업_{comm_rate_str}', 
-                f'최종세일가(바트)_{comm_rate_str}%'
-            ]
-    
-    # 존재하는 컬럼만 필터링
-    all_commission_cols = []
-    for cols in commission_cols_dict.values():
-        all_commission_cols.extend(cols)
-    
-    all_cols = base_cols + all_commission_cols
-    existing_cols = [col for col in all_cols if col in display_df.columns]
+# 파싱/가격 계산 로직은 markup_calculator에 있고, 이 파일은 그 위의 Streamlit 화면만 담당
+from markup_calculator import (
+    BLOCK_CACHE_MAX_BYTES,
+    EXPORT_FORMATS,
+    HIGHLIGHT_STYLE,
+    MULTI_LEVEL_PAGE_SIZES,
+    RATE_STORE_PATH,
+    RESULT_CACHE_MAX_BYTES,
+    STYLED_TABLE_MAX_CELLS,
+    LRUByteCache,
+    RateSheetStore,
+    StageProfiler,
+    build_price_table,
+    build_result_table,
+    cached_parse,
+    cached_result_table,
+    configure_profile_logging,
+    create_multi_level_table,
+    diff_result_tables,
+    display_column_formats,
+    estimate_size,
+    export_file,
+    highlight_masks,
+    logger,
+    map_rate_file,
+    margin_surface,
+    parse_currency_rates,
+    parse_sweep_values,
+    price_table_currencies,
+    style_result_table,
+    styled_table_page_sizes,
+    sweep_summary,
+    unique_commission_rates
+)
+
+def result_column_config(df):
+    """st.dataframe용 컬럼 설정 - 값은 숫자 그대로 보내고 포맷팅은 브라우저에서 (숫자 정렬 유지)"""
+    return {col: st.column_config.NumberColumn(format=fmt) for col, fmt in display_column_formats(df).items()}
+
+def show_export_buttons(df, file_stem, key_prefix='export'):
+    """형식별 다운로드 버튼 - 파일은 클릭 시점에 생성 (렌더링할 때마다 모든 형식을 만들지 않음)"""
+    columns = st.columns(len(EXPORT_FORMATS) + 1)
+    with columns[0]:
+        st.markdown("**내보내기**")
+    for column, (fmt, (label, extension, mime)) in zip(columns[1:], EXPORT_FORMATS.items()):
+        with column:
+            st.download_button(
+                f"⬇️ {label}",
+                data=lambda fmt=fmt: export_file(df, fmt),
+                file_name=f"{file_stem}{extension}",
+                mime=mime,
+                on_click='ignore',
+                width='stretch',
+                key=f"{key_prefix}_{fmt}"
+            )
+
+@st.cache_resource
+def get_result_cache():
+    """재실행과 세션 간에 공유되는 파싱/계산 결과 캐시"""
+    return LRUByteCache(RESULT_CACHE_MAX_BYTES)
+
+@st.cache_resource
+def get_block_cache():
+    """재실행과 세션 간에 공유되는 블록 단위 파싱 결과 캐시 (일부 행만 바뀐 페이지를 다시 붙여넣을 때 재사용)"""
+    return LRUByteCache(BLOCK_CACHE_MAX_BYTES)
+
+@st.cache_resource
+def get_rate_store():
+    """재실행과 세션 간에 공유되는 요금표 저장소 (열 수 없으면 None - 저장소 없이 동작)"""
+    try:
+        return RateSheetStore(RATE_STORE_PATH)
+    except sqlite3.Error as e:
+        logger.warning('요금표 저장소를 열 수 없습니다 (%s): %s', RATE_STORE_PATH, e)
+        return None
+
+# What-if 시뮬레이션에서 프로그램별 격자를 볼 수 있는 행 수 (최저 마진 순)
+SWEEP_PROGRAM_CHOICES = 500
+
+def _sweep_grid_frame(values, exchange_rates, discount_rates):
+    """(환율, 할인율) 2차원 배열을 행=할인율, 열=환율 DataFrame으로 변환"""
+    return pd.DataFrame(
+        np.asarray(values).T,
+        index=[f'{x:g}%' for x in discount_rates],
+        columns=[f'{x:g}' for x in exchange_rates]
+    )
+
+def _negative_style(value):
+    return HIGHLIGHT_STYLE if value < 0 else ''
+
+def _positive_style(value):
+    return HIGHLIGHT_STYLE if value > 0 else ''
+
+def show_sweep_panel(df, commission_rates, exchange_rate, cache):
+    """What-if 시뮬레이션: 할인율 × 환율 × 수수료 격자 전체의 마진(원화)을 한 번에 계산하여 요약 표시"""
+    with st.expander("📈 What-if 시뮬레이션 (할인율 × 환율 × 수수료)"):
+        st.caption("'시작:끝:간격'(끝 포함, 예: 0:20:2.5) 또는 쉼표로 구분된 값(예: 6.6,10,11)을 입력하세요.")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sweep_commission_input = st.text_input(
+                "수수료 (%)",
+                value=','.join(f'{x:g}' for x in commission_rates),
+                key="sweep_commission_input"
+            )
+        with col2:
+            sweep_exchange_input = st.text_input(
+                "환율 (THB → KRW)",
+                value=f'{exchange_rate:g}' if exchange_rate > 0 else "",
+                placeholder="예: 35:40:0.5",
+                key="sweep_exchange_input"
+            )
+        with col3:
+            sweep_discount_input = st.text_input(
+                "할인율 (%)",
+                value="0:20:5",
+                key="sweep_discount_input"
+            )
+        
+        if st.button("📈 시뮬레이션", key="sweep_button"):
+            try:
+                sweep_params = (
+                    parse_sweep_values(sweep_commission_input),
+                    parse_sweep_values(sweep_exchange_input),
+                    parse_sweep_values(sweep_discount_input)
+                )
+                if min(sweep_params[1]) <= 0:
+                    raise ValueError('환율은 0보다 커야 합니다.')
+                st.session_state['sweep_params'] = sweep_params
+            except ValueError as e:
+                st.warning(f"시뮬레이션 입력값이 올바르지 않습니다: {e}")
+                st.session_state.pop('sweep_params', None)
+        
+        sweep_params = st.session_state.get('sweep_params')
+        if not sweep_params:
+            return
+        sweep_commissions, sweep_exchanges, sweep_discounts = sweep_params
+        
+        # 격자 요약 계산 (같은 넷가/세일가와 격자면 캐시 사용)
+        net_prices = df['넷가(바트)'].to_numpy(dtype=np.int64)
+        sale_prices = df['세일가(바트)'].to_numpy(dtype=np.int64)
+        prices_hash = hashlib.blake2b(net_prices.tobytes() + sale_prices.tobytes(), digest_size=16).hexdigest()
+        key = ('sweep', prices_hash, tuple(sweep_commissions), tuple(sweep_exchanges), tuple(sweep_discounts))
+        summary = cache.get(key)
+        if summary is None:
+            summary = sweep_summary(net_prices, sale_prices, sweep_commissions, sweep_exchanges, sweep_discounts)
+            cache.put(key, summary, estimate_size(summary))
+        
+        st.markdown(f"**격자:** 수수료 {len(sweep_commissions)} × 환율 {len(sweep_exchanges)} × 할인율 {len(sweep_discounts)} "
+                    f"= {len(sweep_commissions) * len(sweep_exchanges) * len(sweep_discounts):,}개 지점, {len(df):,}개 항목")
+        comm_idx = st.selectbox(
+            "수수료",
+            range(len(sweep_commissions)),
+            format_func=lambda i: f'{sweep_commissions[i]:g}%',
+            key="sweep_commission_select"
+        )
+        
+        # 격자별 마진 음수 행 수 / 최저 마진 (행=할인율, 열=환율)
+        col_count, col_worst = st.columns(2)
+        with col_count:
+            st.markdown("##### 마진 음수 항목 수")
+            count_df = _sweep_grid_frame(summary['negative_count'][comm_idx], sweep_exchanges, sweep_discounts)
+            st.dataframe(count_df.style.map(_positive_style).format('{:,}'), width='stretch')
+        with col_worst:
+            st.markdown("##### 최저 마진 (원)")
+            worst_df = _sweep_grid_frame(summary['worst_margin'][comm_idx], sweep_exchanges, sweep_discounts)
+            st.dataframe(worst_df.style.map(_negative_style).format('{:,}'), width='stretch')
+        
+        # 프로그램별 격자 전체 최저 마진
+        st.markdown("##### 프로그램별 최저 마진 (전체 격자 기준)")
+        program_df = df[['Rate ID', 'Program ID', '옵션명', '대상', '넷가(바트)', '세일가(바트)']].copy()
+        program_df['최저 마진(원)'] = summary['program_worst_margin']
+        program_df = program_df.sort_values('최저 마진(원)', kind='stable')
+        st.dataframe(program_df, width='stretch', height=300)
+        
+        # 선택한 프로그램의 마진 격자
+        row_idx = st.selectbox(
+            f"프로그램 선택 (최저 마진 하위 {SWEEP_PROGRAM_CHOICES}개)",
+            program_df.index[:SWEEP_PROGRAM_CHOICES],
+            format_func=lambda i: f"{df.at[i, 'Program ID']} · {df.at[i, '옵션명']} · {df.at[i, '대상']}",
+            key="sweep_program_select"
+        )
+        if row_idx is not None:
+            program_margins = margin_surface(
+                net_prices[[row_idx]], sale_prices[[row_idx]], [sweep_commissions[comm_idx]], sweep_exchanges, sweep_discounts
+            )[0, 0]
+            st.markdown(f"##### 마진 (원) - 수수료 {sweep_commissions[comm_idx]:g}%")
+            program_grid = _sweep_grid_frame(program_margins, sweep_exchanges, sweep_discounts)
+            st.dataframe(program_grid.style.map(_negative_style).format('{:,}'), width='stretch')
+
+def show_price_table_panel(parsed_data, parse_hash, commission_rates, exchange_rate, discount_rate, net_price_percentage, cache, file_stem):
+    """전체 사이트/통화 가격: 요금 페이지의 모든 판매 채널 가격을 긴 형식 테이블로 한 번에 계산하여 표시"""
+    with st.expander("🌐 전체 사이트/통화 가격"):
+        currency_rates_input = st.text_input(
+            "통화별 바트 환율 (1 통화 = ? THB)",
+            placeholder="예: USD=36.5, EUR=39",
+            help="THB는 1, KRW는 위 환율로 자동 환산됩니다. 환율을 모르는 통화의 행은 계산에서 제외됩니다.",
+            key="currency_rates_input"
+        )
+        try:
+            currency_rates = parse_currency_rates(currency_rates_input)
+        except ValueError as e:
+            st.warning(f"통화별 환율 입력값이 올바르지 않습니다: {e}")
+            currency_rates = {}
+        
+        channels = price_table_currencies(parsed_data, exchange_rate, currency_rates)
+        st.dataframe(channels, column_config={'바트 환율': st.column_config.NumberColumn(format='%.4f')}, hide_index=True)
+        
+        key = ('prices', parse_hash, tuple(commission_rates), exchange_rate, discount_rate, net_price_percentage,
+               tuple(sorted(currency_rates.items())))
+        price_df = cache.get(key) if parse_hash else None
+        if price_df is None:
+            price_df = build_price_table(parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage, currency_rates)
+            if parse_hash and price_df is not None:
+                cache.put(key, price_df, estimate_size(price_df))
+        if price_df is None:
+            st.info("바트 환율을 아는 통화의 판매 가격이 없습니다.")
+            return
+        
+        st.markdown(f"##### 사이트/통화별 가격 (총 {len(price_df)}개 항목)")
+        st.dataframe(price_df, column_config=result_column_config(price_df), width='stretch', height=400)
+        show_export_buttons(price_df, f"{file_stem}_all_sites", key_prefix='export_prices')
+
+# 요금 페이지 업로드 허용 확장자 (.html.gz는 마지막 확장자 gz로 판단)
+RATE_FILE_TYPES = ['html', 'htm', 'gz']
+
+def parse_rate_source(html_content, uploaded_file, cache, profiler=None, store=None, stats=None, block_cache=None):
+    """붙여넣은 HTML 또는 업로드한 파일(파일이 있으면 파일 우선)을 cached_parse로 파싱 - (해시, parsed_data, error) 반환
     
-    # HTML 시작 - 선택 가능하고 셀 사이즈 조절 가능한 테이블
-    html = """
-    <style>
-    .multi-header-table {
-        width: 100%;
-        border-collapse: separate;
-        border-spacing: 0;
-        font-size: 0.875rem;
-        margin: 1rem 0;
-        user-select: text;
-        -webkit-user-select: text;
-        -moz-user-select: text;
-        -ms-user-select: text;
-    }
-    .multi-header-table th {
-        background-color: #f3f4f6;
-        border: 1px solid #d1d5db;
-        padding: 0.5rem;
-        text-align: center;
-        font-weight: 600;
-        position: sticky;
-        top: 0;
-        z-index: 10;
-    }
-    .multi-header-table td {
-        border: 1px solid #d1d5db;
-        padding: 0.5rem;
-        text-align: right;
-        user-select: text;
-        -webkit-user-select: text;
-        -moz-user-select: text;
-        -ms-user-select: text;
-    }
-    .multi-header-table td:first-child,
-    .multi-header-table td:nth-child(2),
-    .multi-header-table td:nth-child(3),
-    .multi-header-table td:nth-child(4),
-    .multi-header-table td:nth-child(5),
-    .multi-header-table td:nth-child(6),
-    .multi-header-table td:nth-child(7) {
-        text-align: left;
-    }
-    .header-top {
-        background-color: #e5e7eb !important;
-        font-weight: 700;
-    }
-    .markup-red {
-        background-color: #fee2e2;
-        color: #dc2626;
-        font-weight: bold;
-    }
-    .margin-red {
-        background-color: #fee2e2;
-        color: #dc2626;
-        font-weight: bold;
-    }
-    /* 마진이 마이너스인 행 전체 하이라이트 */
-    .margin-red-row {
-        background-color: #fee2e2 !important;
-    }
-    .margin-red-row td {
-        background-color: #fee2e2 !important;
-        color: #dc2626 !important;
-        font-weight: bold !important;
-    }
-    /* 수수료 그룹별 구분선 - 검은색 적당한 두께 */
-    .group-divider-left {
-        border-left: 2px solid #000000 !important;
-    }
-    .group-divider-right {
-        border-right: 2px solid #000000 !important;
-    }
-    .group-divider-top {
-        border-top: 2px solid #000000 !important;
-    }
-    </style>
-    <div style="overflow-x: auto; overflow-y: auto; max-height: 800px;">
-    <table class="multi-header-table">
+    업로드 파일은 map_rate_file로 임시 파일에 풀어 쓴 mmap 버퍼를 그대로 파싱합니다 (문서 전체를 str로 만들지 않음).
+    stats(dict)를 넘기면 입력 크기(chars 또는 bytes)와, 블록 캐시로 파싱했으면 블록 수/재사용 블록 수를 기록합니다.
     """
+    stats = {} if stats is None else stats
+    if uploaded_file is None:
+        stats['chars'] = len(html_content)
+        return cached_parse(html_content, cache, profiler, store, block_cache, stats)
+    try:
+        uploaded_file.seek(0)
+        with map_rate_file(uploaded_file) as buffer:
+            stats['bytes'] = len(buffer)
+            return cached_parse(buffer, cache, profiler, store, block_cache, stats)
+    except (OSError, EOFError, ValueError, zlib.error) as e:
+        return None, None, f'파일을 읽을 수 없습니다 ({uploaded_file.name}): {str(e)}'
+
+def _parse_compare_settings(commission_input, exchange_input, discount_input, net_percent_input):
+    """비교 모드 설정값 파싱 - (수수료 목록, 환율, 할인율, 넷가%) 반환, 올바르지 않으면 ValueError"""
+    commission_rates = parse_sweep_values(commission_input)
+    try:
+        exchange_rate = float(exchange_input.strip()) if exchange_input.strip() else 0.0
+        discount_rate = float(discount_input.strip()) if discount_input.strip() else 0.0
+        net_price_percentage = float(net_percent_input.strip()) if net_percent_input.strip() else 0.0
+    except ValueError:
+        raise ValueError('환율, 할인율, 넷가%는 숫자로 입력해주세요.')
+    if not 0 <= net_price_percentage <= 100:
+        raise ValueError('넷가%는 0(미적용)에서 100 사이여야 합니다.')
+    return commission_rates, exchange_rate, discount_rate, net_price_percentage
+
+# 모드를 바꿔도 유지할 비교 모드 텍스트 입력 위젯 키
+DIFF_INPUT_KEYS = (
+    'diff_before_html', 'diff_after_html',
+    'diff_commission_input', 'diff_exchange_input', 'diff_discount_input', 'diff_net_percent_input'
+)
+
+def show_compare_page(profiler):
+    """변경 전후 비교 모드: 두 요금 페이지(붙여넣기 또는 파일)를 같은 설정으로 계산하여 항목별 변화 표시"""
+    st.markdown("### 변경 전후 비교")
+    st.info("**사용 방법:** 공급사가 요금표를 수정하기 전/후의 HTML을 각각 붙여넣거나 파일로 올리세요. "
+            "(Rate ID, Program ID, 대상)이 같은 항목끼리 비교합니다.")
     
-    # 첫 번째 헤더 행 (커미션 그룹)
-    html += "<thead><tr>"
-    # 기본 컬럼들
-    base_col_count = len([c for c in base_cols if c in existing_cols])
-    if base_col_count > 0:
-        html += f'<th colspan="{base_col_count}" class="header-top">기본 정보</th>'
-    
-    # 각 수수료별 그룹
-    for idx, (comm_rate, cols) in enumerate(commission_cols_dict.items()):
-        col_count = len([c for c in cols if c in existing_cols])
-        if col_count > 0:
-            html += f'<th colspan="{col_count}" class="header-top group-divider-left">수수료 {comm_rate}%</th>'
-    
-    html += "</tr><tr>"
+    sources = []
+    for column, side, key in zip(st.columns(2), ('변경 전', '변경 후'), ('before', 'after')):
+        with column:
+            html_content = st.text_area(
+                f"{side} HTML",
+                placeholder="여기에 HTML 코드를 붙여넣으세요...",
+                height=200,
+                key=f"diff_{key}_html"
+            )
+            uploaded_file = st.file_uploader(f"또는 {side} HTML 파일 (.html, .html.gz)", type=RATE_FILE_TYPES, key=f"diff_{key}_file")
+            sources.append((html_content, uploaded_file))
     
-    # 두 번째 헤더 행 (개별 컬럼명) - 그룹별 구분선 추가
-    base_col_idx = 0
-    commission_idx_dict = {comm_rate: 0 for comm_rate in commission_rates}
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        commission_input = st.text_input("수수료 (%)", placeholder="예: 6.6,10,11", key="diff_commission_input")
+    with col2:
+        exchange_input = st.text_input("환율 (THB → KRW)", placeholder="0.00", key="diff_exchange_input",
+                                       help="환율을 입력하면 수수료별 원화 마진 변화도 비교합니다.")
+    with col3:
+        discount_input = st.text_input("할인율 (%)", placeholder="0.00", key="diff_discount_input")
+    with col4:
+        net_percent_input = st.text_input("세일가 기준 넷가%", placeholder="예: 70", key="diff_net_percent_input")
     
-    for col in existing_cols:
-        # 컬럼명 매핑
-        col_label = col
+    if st.button("🔀 비교하기", type="primary", key="diff_button"):
+        st.session_state.pop('diff_result', None)
+        if not all(uploaded_file is not None or html_content.strip() for html_content, uploaded_file in sources):
+            st.error("변경 전/후 HTML을 모두 입력해주세요.")
+            return
+        try:
+            settings = _parse_compare_settings(commission_input, exchange_input, discount_input, net_percent_input)
+        except ValueError as e:
+            st.error(f"설정 입력값이 올바르지 않습니다: {e}")
+            return
         
-        # 기본 컬럼은 그대로
-        if col in base_cols:
-            col_label = col
-        # 동적 마크업
-        elif col.startswith('마크업_'):
-            col_label = '마크업'
-        # 동적 세일가(바트)
-        elif col.startswith('최종세일가(바트)_'):
-            col_label = '세일가(바트)'
-        # 동적 세일가(원)
-        elif col.startswith('(원)세일가_'):
-            col_label = '세일가(원)'
-        # 동적 최종판매가
-        elif col.startswith('최종판매가_'):
-            col_label = '최종판매가'
-        # 동적 공급가
-        elif col.startswith('공급가_'):
-            col_label = '공급가'
-        # 동적 마진(원)
-        elif col.startswith('마진_') and '(원화)' in col:
-            col_label = '마진(원)'
-        
-        # 그룹별 구분선 클래스 추가
-        th_class = ""
-        if col in base_cols:
-            base_col_idx += 1
-            if base_col_idx == base_col_count and base_col_count > 0:
-                th_class = "group-divider-right"
-        else:
-            # 어느 수수료 그룹에 속하는지 확인
-            for comm_rate, cols in commission_cols_dict.items():
-                if col in cols:
-                    commission_idx_dict[comm_rate] += 1
-                    col_count = len([c for c in cols if c in existing_cols])
-                    if commission_idx_dict[comm_rate] == 1:
-                        th_class = "group-divider-left"
-                    elif commission_idx_dict[comm_rate] == col_count:
-                        th_class = "group-divider-right"
-                    break
+        # 양쪽 모두 공유 캐시로 파싱/계산 (같은 페이지나 설정을 다시 비교하면 재사용)
+        result_cache = get_result_cache()
+        tables = []
+        for side, (html_content, uploaded_file) in zip(('변경 전', '변경 후'), sources):
+            with profiler.stage('parse') as info:
+                parse_hash, parsed_data, error = parse_rate_source(
+                    html_content, uploaded_file, result_cache, profiler, get_rate_store(), stats=info,
+                    block_cache=get_block_cache()
+                )
+            if error:
+                st.error(f"{side}: {error}")
+                return
+            with profiler.stage('pricing') as info:
+                df = cached_result_table(parse_hash, parsed_data, *settings, result_cache, stats=info)
+            if df is None:
+                st.error(f"{side}: 세일가가 있는 요금이 없습니다.")
+                return
+            tables.append(df)
         
-        html += f'<th class="{th_class}">{col_label}</th>'
+        with profiler.stage('diff') as info:
+            diff = diff_result_tables(*tables, settings[0])
+            info['rows'], info['cols'] = diff['changed'].shape
+        st.session_state['diff_result'] = diff
     
-    html += "</tr></thead><tbody>"
+    diff = st.session_state.get('diff_result')
+    if diff is None:
+        return
     
-    # 데이터 행 - 그룹별 구분선 및 마진 마이너스 행 하이라이트 추가
-    for idx, row in display_df.iterrows():
-        # 행 전체에 마진이 마이너스인지 확인
-        has_negative_margin = False
-        for col in existing_cols:
-            if '(원화)' in col and '마진' in col:
-                try:
-                    margin_val = df.loc[idx, col]
-                    if isinstance(margin_val, (int, float)) and margin_val < 0:
-                        has_negative_margin = True
-                        break
-                except:
-                    pass
-        
-        # 행 시작 (마진이 마이너스면 전체 행에 빨간색 배경)
-        row_class = ' class="margin-red-row"' if has_negative_margin else ''
-        html += f"<tr{row_class}>"
+    st.markdown("---")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("변경", f"{len(diff['changed']):,}")
+    with col2:
+        st.metric("추가", f"{len(diff['added']):,}")
+    with col3:
+        st.metric("삭제", f"{len(diff['removed']):,}")
+    with col4:
+        st.metric("동일", f"{diff['unchanged']:,}")
+    
+    # 변화 컬럼 이름이 마크업_/마진(원화) 규칙을 따르므로 결과 테이블과 같은 표시 형식 사용
+    tab_changed, tab_added, tab_removed = st.tabs([
+        f"변경 ({len(diff['changed']):,})", f"추가 ({len(diff['added']):,})", f"삭제 ({len(diff['removed']):,})"
+    ])
+    for tab, table, caption in (
+        (tab_changed, diff['changed'], "변화는 (변경 후 - 변경 전) 값입니다."),
+        (tab_added, diff['added'], "변경 후 요금표에만 있는 항목입니다."),
+        (tab_removed, diff['removed'], "변경 전 요금표에만 있는 항목입니다.")
+    ):
+        with tab:
+            st.caption(caption)
+            st.dataframe(table, column_config=result_column_config(table), hide_index=True, width='stretch')
+
+def last_quarter(today):
+    """today 기준 직전 분기의 (시작일, 종료일)"""
+    quarter_start = date(today.year, (today.month - 1) // 3 * 3 + 1, 1)
+    end = quarter_start - timedelta(days=1)
+    return date(end.year, (end.month - 1) // 3 * 3 + 1, 1), end
+
+# 기록 조회 결과 표시 이름
+HISTORY_DISPLAY_COLUMNS = {
+    'rate_id': 'Rate ID',
+    'period_start': '시작일',
+    'period_end': '종료일',
+    'supplier': '공급사',
+    'program_id': 'Program ID',
+    'program_name': '옵션명',
+    'pax_type': '대상',
+    'net_price': '넷가(바트)',
+    'sale_price': '세일가(바트)',
+    'stored_at': '저장 시각',
+    'required_markup': '마크업'
+}
+
+def show_history_panel(store):
+    """저장된 요금표 기록 조회: 프로그램별 요금 이력, 기간 내 수수료별 마크업이 필요한 항목"""
+    with st.expander("🗄️ 요금표 기록"):
+        stats = store.stats()
+        col_stats, col_clear = st.columns([5, 1])
+        with col_stats:
+            st.caption(f"저장된 요금표: 페이지 {stats['pages']:,}개 · 시트 {stats['sheets']:,}개 · 요금 행 {stats['rows']:,}개 "
+                       "(같은 내용을 다시 붙여넣으면 파싱하지 않고 저장된 결과를 사용합니다.)")
+        with col_clear:
+            if st.button("🗑️ 기록 비우기", width='stretch', key="history_clear_button"):
+                store.clear()
+                get_result_cache().clear()
+                get_block_cache().clear()
+                st.session_state.pop('history_result', None)
+                st.rerun()
         
-        base_col_idx = 0
-        commission_idx_dict = {comm_rate: 0 for comm_rate in commission_rates}
+        tab_program, tab_markup = st.tabs(["프로그램별 이력", "마크업 필요 항목"])
+        with tab_program:
+            col_input, col_button = st.columns([3, 1])
+            with col_input:
+                program_id_input = st.text_input("Program ID", placeholder="예: 200019", key="history_program_id")
+            with col_button:
+                st.write("")  # 공간 맞추기
+                if st.button("🔍 조회", width='stretch', key="history_program_button"):
+                    if program_id_input.strip().isdigit():
+                        st.session_state['history_result'] = (
+                            f"Program ID {program_id_input.strip()}",
+                            store.query_rows(program_id=program_id_input.strip())
+                        )
+                    else:
+                        st.warning("Program ID는 숫자로 입력해주세요.")
+        with tab_markup:
+            col_commission, col_period, col_button = st.columns([1, 2, 1])
+            with col_commission:
+                commission_rate = st.number_input("수수료 (%)", min_value=0.0, max_value=100.0, value=10.0, step=0.1, key="history_commission")
+            with col_period:
+                period = st.date_input("시트 기간 (겹치는 시트)", value=last_quarter(date.today()), key="history_period")
+            with col_button:
+                st.write("")  # 공간 맞추기
+                if st.button("🔍 조회", width='stretch', key="history_markup_button"):
+                    if len(period) == 2:
+                        st.session_state['history_result'] = (
+                            f"{period[0]} ~ {period[1]} 수수료 {commission_rate:g}% 마크업 > 0",
+                            store.markup_rows(commission_rate, period_start=period[0].isoformat(), period_end=period[1].isoformat())
+                        )
+                    else:
+                        st.warning("기간의 시작일과 종료일을 모두 선택해주세요.")
         
-        for col in existing_cols:
-            value = row[col]
-            
-            # 스타일링 적용
-            cell_class = ""
-            
-            # 마크업이 0보다 크면 빨간색 (행 하이라이트가 없을 때만)
-            if not has_negative_margin and col.startswith('마크업_'):
-                try:
-                    markup_val = df.loc[idx, col]
-                    if isinstance(markup_val, (int, float)) and markup_val > 0:
-                        cell_class = 'markup-red'
-                except:
-                    pass
-            
-            # 그룹별 구분선 추가
-            if col in base_cols:
-                base_col_idx += 1
-                if base_col_idx == base_col_count and base_col_count > 0:
-                    cell_class += " group-divider-right" if cell_class else "group-divider-right"
-            else:
-                # 어느 수수료 그룹에 속하는지 확인
-                for comm_rate, cols in commission_cols_dict.items():
-                    if col in cols:
-                        commission_idx_dict[comm_rate] += 1
-                        col_count = len([c for c in cols if c in existing_cols])
-                        if commission_idx_dict[comm_rate] == 1:
-                            cell_class += " group-divider-left" if cell_class else "group-divider-left"
-                        elif commission_idx_dict[comm_rate] == col_count:
-                            cell_class += " group-divider-right" if cell_class else "group-divider-right"
-                        break
-            
-            html += f'<td class="{cell_class}">{value}</td>'
-        html += "</tr>"
-    
-    html += "</tbody></table></div>"
-    return html
+        history_result = st.session_state.get('history_result')
+        if history_result:
+            title, history = history_result
+            st.markdown(f"**{title}** - {history['rate_id'].nunique():,}개 Rate ID, {len(history):,}개 요금 행")
+            st.dataframe(
+                history.rename(columns=HISTORY_DISPLAY_COLUMNS),
+                column_config={
+                    '넷가(바트)': st.column_config.NumberColumn(format='%,d'),
+                    '세일가(바트)': st.column_config.NumberColumn(format='%,d'),
+                    '마크업': st.column_config.NumberColumn(format='%d%%')
+                },
+                hide_index=True,
+                width='stretch'
+            )
+
+# 프로파일 패널 열 이름 (레코드 키 -> 표시 이름)
+PROFILE_COLUMNS = {
+    'stage': '단계',
+    'engine': '엔진',
+    'wall_ms': '시간(ms)',
+    'rows': '행',
+    'cols': '열',
+    'programs': '프로그램',
+    'chars': '문자 수',
+    'bytes': '바이트 수',
+    'computed': '재계산',
+    'reused': '재사용',
+    'blocks': '블록',
+    'blocks_reused': '재사용 블록',
+    'peak_kb': '최대 메모리(KB)'
+}
 
-st.set_page_config(page_title="API 프로모션 계산", layout="wide")
+def _stop_memory_trace():
+    """메모리 추적을 끄면 tracemalloc 중지 (추적 중에는 모든 할당이 느려짐)"""
+    if not (st.session_state.get('profile_enabled') and st.session_state.get('profile_trace_memory')):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
 
-def calculateRate(paxType, netPrice, salePrice, hasKrwPrice=False):
-    """커미션 및 마크업 계산 - React 코드와 동일"""
-    if netPrice == 0 or salePrice == 0:
-        return {
-            'pax_type': paxType,
-            'net_price': netPrice,
-            'sale_price': salePrice,
-            'commission_6_6': 0,
-            'supply_price_6_6': 0,
-            'required_markup_6_6': 0,
-            'commission_10': 0,
-            'supply_price_10': 0,
-            'required_markup_10': 0,
-            'commission_11': 0,
-            'supply_price_11': 0,
-            'required_markup_11': 0
-        }
+def show_profile_panel(container, records):
+    """단계별 실행 시간, 행/열 수, 최대 메모리를 표로 표시 (parse.* 는 parse 안쪽 단계)"""
+    with container.container():
+        st.markdown("##### ⏱️ 단계별 성능")
+        if not records:
+            st.caption("기록된 단계가 없습니다.")
+            return
+        profile_df = pd.DataFrame(records)
+        profile_df = profile_df[[key for key in PROFILE_COLUMNS if key in profile_df.columns]]
+        # 단계마다 기록하는 항목이 달라 비어 있는 칸이 생기므로 개수 열은 nullable 정수로 표시
+        count_columns = [key for key in ('rows', 'cols', 'programs', 'chars', 'bytes', 'computed', 'reused', 'blocks', 'blocks_reused') if key in profile_df.columns]
+        profile_df = profile_df.astype({key: 'Int64' for key in count_columns})
+        if 'engine' in profile_df.columns:
+            profile_df['engine'] = profile_df['engine'].fillna('')
+        profile_df = profile_df.rename(columns=PROFILE_COLUMNS)
+        total_ms = sum(record['wall_ms'] for record in records if '.' not in record['stage'])
+        st.dataframe(profile_df, hide_index=True, width='stretch')
+        st.caption(f"합계 {total_ms:,.1f} ms (parse.* 제외)")
+
+# 가격 설정 입력 위젯 키 (결과 영역 프래그먼트의 수수료/환율/할인율/넷가% 입력)
+PRICING_INPUT_KEYS = ('commission_input', 'exchange_rate_input', 'discount_rate_input', 'net_price_percent_input')
+
+def _clear_rate_input():
+    """Clear 버튼 콜백: HTML 입력/업로드 위젯을 새 키로 다시 만들고 파싱 결과와 넷가% 초기화
     
-    # 6.6% 커미션 계산 - React 코드와 동일
-    import math
-    commission_6_6 = round(salePrice * 0.066)
-    supply_price_6_6 = salePrice - commission_6_6
-    required_markup_6_6 = 0 if hasKrwPrice else (math.ceil((netPrice / supply_price_6_6 - 1) * 100) if supply_price_6_6 < netPrice else 0)
+    콜백은 스크립트 실행 전에 처리되므로 st.rerun() 없이 한 번의 실행으로 지운 화면이 그려집니다.
+    """
+    st.session_state['html_input_key_counter'] = st.session_state.get('html_input_key_counter', 0) + 1
+    for key in ('parsed_data', 'parse_hash', 'parse_profile'):
+        st.session_state.pop(key, None)
+    st.session_state['net_price_percent_input'] = ''
+
+def _read_pricing_inputs():
+    """가격 설정 입력값 파싱 - (수수료 목록, 환율, 할인율, 넷가%, 경고 메시지 목록) 반환 (올바르지 않은 값은 0 또는 빈 목록)"""
+    state = st.session_state
+    warnings = []
+    try:
+        commission_rates = unique_commission_rates(
+            float(x.strip()) for x in state.get('commission_input', '').split(',') if x.strip()
+        )
+    except ValueError:
+        commission_rates = []
+        warnings.append("수수료 입력값이 올바르지 않습니다. 숫자를 쉼표로 구분하여 입력해주세요.")
+    
+    values = []
+    for key, label in (('exchange_rate_input', '환율'), ('discount_rate_input', '할인율')):
+        text = state.get(key, '').strip()
+        try:
+            values.append(float(text) if text else 0.0)
+        except ValueError:
+            values.append(0.0)
+            warnings.append(f"{label} 입력값이 올바르지 않습니다. 0.0으로 설정됩니다.")
+    exchange_rate, discount_rate = values
+    
+    net_price_percentage = 0
+    text = state.get('net_price_percent_input', '').strip()
+    if text:
+        try:
+            net_price_percentage = float(text)
+        except ValueError:
+            warnings.append("넷가% 입력값이 올바르지 않습니다.")
+        else:
+            if not 0 < net_price_percentage <= 100:
+                net_price_percentage = 0
+                warnings.append("넷가%는 0보다 크고 100 이하여야 합니다.")
+    return commission_rates, exchange_rate, discount_rate, net_price_percentage, warnings
+
+def show_basic_info(parsed_data):
+    """파싱한 요금표의 기본 정보와 시트 목록 (설정을 바꿔도 다시 그리지 않도록 결과 프래그먼트 밖에 표시)"""
+    # 결과 영역 상단에 Clear 버튼 추가
+    col_result_title, col_clear_result = st.columns([5, 1])
+    with col_clear_result:
+        st.write("")  # 공간 맞추기
+        st.button("🗑️ Clear All", width='stretch', key="clear_result_button", on_click=_clear_rate_input)
     
-    # 10% 커미션 계산 - React 코드와 동일
-    commission_10 = round(salePrice * 0.10)
-    supply_price_10 = salePrice - commission_10
-    required_markup_10 = 0 if hasKrwPrice else (math.ceil((netPrice / supply_price_10 - 1) * 100) if supply_price_10 < netPrice else 0)
+    # 기본 정보 표시
+    st.markdown("### 기본 정보")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("사이트", parsed_data['basicInfo']['site'])
+    with col2:
+        st.metric("공급사", parsed_data['basicInfo']['supplier'])
+    with col3:
+        st.metric("기간", f"{parsed_data['basicInfo']['period']['start']} ~ {parsed_data['basicInfo']['period']['end']}")
+    with col4:
+        st.metric("통화", parsed_data['basicInfo']['currency'])
     
-    # 11% 커미션 계산 - React 코드와 동일
-    commission_11 = round(salePrice * 0.11)
-    supply_price_11 = salePrice - commission_11
-    required_markup_11 = 0 if hasKrwPrice else (math.ceil((netPrice / supply_price_11 - 1) * 100) if supply_price_11 < netPrice else 0)
+    # 여러 요금 시트가 함께 붙여넣어진 경우 시트 목록 표시 (각 행은 바로 앞 시트 헤더 기준)
+    sheets = parsed_data['basicInfo']['sheets']
+    if len(sheets) > 1:
+        st.caption(f"요금 시트 {len(sheets)}개 - 위의 공급사/기간은 첫 번째 시트 기준이며, 각 항목의 Rate ID와 기간은 해당 시트를 따릅니다.")
+        st.dataframe(
+            pd.DataFrame({
+                'Rate ID': [sheet['rate_id'] for sheet in sheets],
+                '시작일': [sheet['period']['start'] for sheet in sheets],
+                '종료일': [sheet['period']['end'] for sheet in sheets],
+                '공급사': [sheet['supplier'] for sheet in sheets],
+                '요금 행 수': [sheet['rows'] for sheet in sheets]
+            }),
+            hide_index=True,
+            width='stretch'
+        )
+
+@st.fragment
+def show_pricing_section(profile_container, profile_enabled=False, trace_memory=False):
+    """가격 설정 입력과 결과 영역 (프래그먼트) - 수수료/환율/할인율/넷가%를 바꾸면 이 부분만 다시 실행
     
-    return {
-        'pax_type': paxType,
-        'net_price': netPrice,
-        'sale_price': salePrice,
-        'commission_6_6': commission_6_6,
-        'supply_price_6_6': supply_price_6_6,
-        'required_markup_6_6': required_markup_6_6,
-        'commission_10': commission_10,
-        'supply_price_10': supply_price_10,
-        'required_markup_10': required_markup_10,
-        'commission_11': commission_11,
-        'supply_price_11': supply_price_11,
-        'required_markup_11': required_markup_11
-    }
+    HTML 입력 폼, 파싱, 기본 정보는 다시 실행하지 않습니다. 프래그먼트만 다시 실행될 때도 단계별 프로파일 패널을
+    이 실행의 기록으로 갱신하도록 프로파일러는 실행마다 새로 만듭니다.
+    """
+    profiler = StageProfiler(st.session_state.get('profile_session_id', ''), trace_memory=profile_enabled and trace_memory)
+    show_pricing(profiler)
+    if profile_enabled:
+        show_profile_panel(profile_container, st.session_state.get('parse_profile', []) + profiler.records)
 
-def parseHTML(html_content):
-    """HTML 파싱하여 데이터 추출"""
-    try:
-        # 기간 추출
-        period_match = re.search(r'value="(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})~(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})"', html_content)
-        period = [period_match.group(1).split(' ')[0], period_match.group(2).split(' ')[0]] if period_match else ['', '']
-        
-        # rate_id 추출
-        rate_id_match = re.search(r'name="tour_rate\.id"\s+value="(\d+)"', html_content)
-        rate_id = rate_id_match.group(1) if rate_id_match else ''
-        
-        # 공급사 추출
-        supplier_match = re.search(r'id="autoCompleteSupplier_\d+_\d+"[^>]*>([^<]+)</textarea>', html_content)
-        supplier = supplier_match.group(1).strip() if supplier_match else 'N/A'
+def show_pricing(profiler):
+    """가격 설정 입력, 설정 요약, 결과 테이블/내보내기/시뮬레이션/전체 사이트 가격 (show_pricing_section 본문)"""
+    # 수수료, 환율, 할인율, 넷가% 입력 - 입력을 바꾸면 결과 영역만 다시 계산
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.text_input(
+            "수수료 (%)",
+            placeholder="0.00",
+            help="수수료를 쉼표로 구분하여 입력하세요. (예: 6.6,10,11)",
+            key="commission_input"
+        )
+    with col2:
+        st.text_input(
+            "환율 (THB → KRW)",
+            placeholder="0.00",
+            help="태국 바트(THB)를 원화(KRW)로 변환할 환율을 입력하세요. (예: 1 THB = 36.5 KRW)",
+            key="exchange_rate_input"
+        )
+    with col3:
+        st.text_input(
+            "할인율 (%)",
+            placeholder="0.00",
+            help="할인율을 입력하면 최종 판매가와 마진이 자동으로 계산됩니다.",
+            key="discount_rate_input"
+        )
+    with col4:
+        st.text_input(
+            "세일가 기준 넷가%",
+            placeholder="예: 70",
+            help="세일가의 몇 %로 넷가를 설정할지 입력하세요. (Net가가 0인 경우용)",
+            key="net_price_percent_input"
+        )
+    commission_rates, exchange_rate, discount_rate, net_price_percentage, warnings = _read_pricing_inputs()
+    for message in warnings:
+        st.warning(message)
+    
+    if 'parsed_data' not in st.session_state:
+        return
+    parsed_data = st.session_state['parsed_data']
+    
+    # 수수료가 없으면 경고 표시
+    if not commission_rates:
+        st.warning("⚠️ 수수료를 입력해주세요. 수수료 입력칸에 쉼표로 구분하여 입력하세요. (예: 6.6,10,11)")
+        return
+    
+    # 설정 정보 표시
+    st.markdown("### 설정")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.info(f"**수수료:** {', '.join([f'{x}%' for x in commission_rates])}")
+    with col2:
+        if exchange_rate > 0:
+            st.info(f"**환율:** 1 THB = {exchange_rate:,.2f} KRW")
+        else:
+            st.info("**환율:** 미설정")
+    with col3:
+        st.info(f"**할인율:** {discount_rate}%")
+    
+    st.markdown("---")
+    
+    # 테이블 데이터 생성 - 바뀐 설정에 의존하는 수수료별 계산 단계만 다시 계산 (같은 입력/설정이면 테이블 캐시 사용)
+    rate_ids = [sheet['rate_id'] for sheet in parsed_data['basicInfo']['sheets'] if sheet['rate_id']]
+    file_stem = f"promotion_{'_'.join(rate_ids[:3]) or datetime.now().strftime('%Y%m%d')}"
+    result_cache = get_result_cache()
+    parse_hash = st.session_state.get('parse_hash')
+    with profiler.stage('pricing') as info:
+        if parse_hash:
+            df = cached_result_table(parse_hash, parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage, result_cache, stats=info)
+        else:
+            df = build_result_table(parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage)
+        if df is not None:
+            info['rows'], info['cols'] = df.shape
+    
+    if df is not None:
+        st.markdown(f"### 결과 테이블 (총 {len(df)}개 항목)")
         
-        programs = []
+        # 표시 형식 (천 단위 구분 기호, %, 원) - 숫자형 df를 그대로 두고 브라우저에서 포맷팅
+        with profiler.stage('format') as info:
+            column_config = result_column_config(df)
+            info['cols'] = len(column_config)
         
-        # SPA 구조인지 확인
-        is_spa_structure = '<tbody child-root="tour_rate.rateJson">' in html_content
+        # 표시 방식 선택: 조절 가능한 표 또는 수수료 그룹 헤더 표 (페이지 단위)
+        col_view, col_page_size, col_page = st.columns([3, 1, 1])
+        with col_view:
+            view_mode = st.radio(
+                "표시 방식",
+                ["표", "수수료 그룹 헤더"],
+                horizontal=True,
+                key="result_view_mode"
+            )
         
-        if is_spa_structure:
-            # SPA 구조: tbody 단위로 파싱
-            tbody_pattern = re.compile(r'<tbody child-root="tour_rate\.rateJson">([\s\S]*?)</tbody>')
-            tbody_matches = tbody_pattern.findall(html_content)
+        if view_mode == "수수료 그룹 헤더":
+            with col_page_size:
+                page_size = st.selectbox("페이지당 행 수", MULTI_LEVEL_PAGE_SIZES, key="multi_level_page_size")
+            page_count = max((len(df) + page_size - 1) // page_size, 1)
+            with col_page:
+                page_number = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1, key="multi_level_page")
             
-            for tbody_content in tbody_matches:
-                # 프로그램 ID 추출
-                program_id_match = re.search(r'<input type="hidden" name="program_id" value="(\d+)"', tbody_content)
-                program_id = program_id_match.group(1) if program_id_match else ''
-                
-                # 프로그램명 추출
-                program_name_match = re.search(r'<b>([^<]+)</b>', tbody_content)
-                program_name = program_name_match.group(1).strip() if program_name_match else ''
-                
-                # 각 행(Duration)별로 파싱
-                rows = tbody_content.split('<tr')[1:]  # 첫 번째는 빈 문자열
-                
-                for row in rows:
-                    # Duration 추출
-                    duration_match = re.search(r'name="rate\.\d+\.duration"[^>]*value="(\d+)"', row)
-                    duration = duration_match.group(1) if duration_match else ''
-                    
-                    # 옵션명 = 프로그램명 + Duration
-                    option_name = f"{program_name} {duration}" if duration else program_name
-                    
-                    # Net 가격 추출
-                    adult_nett_match = re.search(r'name="rate\.\d+\.adult\.nett"[^>]*value="(\d+)"', row)
-                    adult_nett = int(adult_nett_match.group(1)) if adult_nett_match else 0
-                    
-                    # Sale 가격 추출 (mk만)
-                    adult_sale_mk_match = re.search(r'name="rate\.\d+\.adult\.sale\.monkey\.THB"[^>]*value="(\d+)"', row)
-                    adult_sale_mk = int(adult_sale_mk_match.group(1)) if adult_sale_mk_match else 0
-                    
-                    # KRW 가격 확인
-                    adult_sale_krw_match = re.search(r'name="rate\.\d+\.adult\.sale\.monkey\.KRW"[^>]*value="(\d+)"', row)
-                    adult_sale_krw = int(adult_sale_krw_match.group(1)) if adult_sale_krw_match else 0
-                    
-                    # program_id와 program_name이 있고, 세일가가 있으면 추가 (넷가가 0이어도 포함)
-                    if program_id and option_name and adult_sale_mk > 0:
-                        programs.append({
-                            'rate_id': rate_id,
-                            'program_id': program_id,
-                            'program_name': option_name,
-                            'site': 'mk',
-                            'rates': [
-                                calculateRate('성인', adult_nett, adult_sale_mk, adult_sale_krw > 0),
-                                calculateRate('아동', 0, 0, False)  # SPA는 보통 아동 가격 없음
-                            ]
-                        })
+            with profiler.stage('render') as info:
+                table_html = create_multi_level_table(df, exchange_rate > 0, commission_rates, page=page_number - 1, page_size=page_size)
+                st.markdown(table_html, unsafe_allow_html=True)
+                info['rows'] = min(page_size, len(df) - (page_number - 1) * page_size)
+                info['cols'] = df.shape[1]
+                info['chars'] = len(table_html)
+            st.caption(f"{page_number} / {page_count} 페이지")
+        elif df.size > STYLED_TABLE_MAX_CELLS:
+            # 큰 테이블은 페이지로 나누어 보이는 페이지에만 같은 마스크 기반 하이라이트 적용
+            # (Styler 직렬화 비용이 셀 수에 비례하므로 한 번에 그리는 셀 수를 STYLED_TABLE_MAX_CELLS 이하로 제한)
+            with col_page_size:
+                page_size = st.selectbox("페이지당 행 수", styled_table_page_sizes(df.shape[1]), key="styled_table_page_size")
+            page_count = max((len(df) + page_size - 1) // page_size, 1)
+            with col_page:
+                page_number = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1, key="styled_table_page")
+            page_df = df.iloc[(page_number - 1) * page_size:page_number * page_size]
+            
+            with profiler.stage('style') as info:
+                table_styles = style_result_table(page_df)
+                info['rows'], info['cols'] = table_styles.shape
+            styled_df = page_df.style.apply(lambda _: table_styles, axis=None)
+            
+            with profiler.stage('render') as info:
+                st.dataframe(styled_df, column_config=column_config, width='stretch', height=600)
+                info['rows'], info['cols'] = page_df.shape
+            negative_rows, _ = highlight_masks(df)
+            st.caption(f"{page_number} / {page_count} 페이지 · 전체 {len(df):,}행 중 마진이 음수인 행 {int(negative_rows.sum()):,}개")
         else:
-            # 일반 투어 구조: tr 단위로 파싱
-            # 각 <tr child-root="tour_rate.rateJson">를 찾아서 파싱
-            tr_pattern = re.compile(r'<tr child-root="tour_rate\.rateJson">([\s\S]*?)</tr>')
-            tr_matches = tr_pattern.findall(html_content)
+            # Streamlit dataframe으로 표시 (조절 가능한 표)
+            # 행 전체 하이라이트 + 마크업 셀 하이라이트를 숫자형 df 기준 마스크로 한 번에 처리
+            # (스타일 표는 미리 계산 - Styler 적용과 직렬화는 st.dataframe 안에서 수행되어 render 단계에 포함)
+            with profiler.stage('style') as info:
+                table_styles = style_result_table(df)
+                info['rows'], info['cols'] = table_styles.shape
+            styled_df = df.style.apply(lambda _: table_styles, axis=None)
             
-            for row in tr_matches:
-                # 각 tr 안에서 program_id 추출
-                program_id_match = re.search(r'<input type="hidden" name="program_id" value="(\d+)"', row)
-                program_id = program_id_match.group(1) if program_id_match else ''
-                
-                # 각 tr 안에서 program_name 추출 (program_id 다음에 나오는 <b> 태그 안의 텍스트)
-                # program_id가 있는 부분 이후에서 <b> 태그 찾기
-                if program_id_match:
-                    # program_id 이후의 텍스트에서 첫 번째 <b> 태그 찾기
-                    after_program_id = row[program_id_match.end():]
-                    program_name_match = re.search(r'<b>([^<]+)</b>', after_program_id)
-                    program_name = program_name_match.group(1).strip() if program_name_match else ''
-                else:
-                    # program_id가 없으면 전체 row에서 <b> 태그 찾기
-                    program_name_match = re.search(r'<b>([^<]+)</b>', row)
-                    program_name = program_name_match.group(1).strip() if program_name_match else ''
-                
-                # Net 가격 추출
-                adult_nett_match = re.search(r'name="adult\.nett"[^>]*value="(\d+)"', row)
-                child_nett_match = re.search(r'name="child\.nett"[^>]*value="(\d+)"', row)
-                
-                adult_nett = int(adult_nett_match.group(1)) if adult_nett_match else 0
-                child_nett = int(child_nett_match.group(1)) if child_nett_match else 0
-                
-                # Sale 가격 추출 (mk만)
-                adult_sale_mk_match = re.search(r'name="adult\.sale\.monkey\.THB"[^>]*value="(\d+)"', row)
-                child_sale_mk_match = re.search(r'name="child\.sale\.monkey\.THB"[^>]*value="(\d+)"', row)
-                
-                adult_sale_mk = int(adult_sale_mk_match.group(1)) if adult_sale_mk_match else 0
-                child_sale_mk = int(child_sale_mk_match.group(1)) if child_sale_mk_match else 0
-                
-                # KRW 가격 확인
-                adult_sale_krw_match = re.search(r'name="adult\.sale\.monkey\.KRW"[^>]*value="(\d+)"', row)
-                child_sale_krw_match = re.search(r'name="child\.sale\.monkey\.KRW"[^>]*value="(\d+)"', row)
-                
-                adult_sale_krw = int(adult_sale_krw_match.group(1)) if adult_sale_krw_match else 0
-                child_sale_krw = int(child_sale_krw_match.group(1)) if child_sale_krw_match else 0
-                
-                # program_id와 program_name이 있고, 세일가가 있으면 추가 (넷가가 0이어도 포함)
-                if program_id and program_name and adult_sale_mk > 0:
-                    programs.append({
-                        'rate_id': rate_id,
-                        'program_id': program_id,
-                        'program_name': program_name,
-                        'site': 'mk',
-                        'rates': [
-                            calculateRate('성인', adult_nett, adult_sale_mk, adult_sale_krw > 0),
-                            calculateRate('아동', child_nett, child_sale_mk, child_sale_krw > 0)
-                        ]
-                    })
+            # Streamlit dataframe 표시 (column_config 형식이 Styler 형식보다 우선)
+            with profiler.stage('render') as info:
+                st.dataframe(styled_df, column_config=column_config, width='stretch', height=600)
+                info['rows'], info['cols'] = df.shape
         
-        if len(programs) == 0:
-            return None, '프로그램 데이터를 찾을 수 없습니다. HTML에 program_id와 가격 데이터가 포함되어 있는지 확인해주세요.'
+        # 숫자형 결과 테이블 내보내기 (CSV / Parquet / Excel)
+        show_export_buttons(df, file_stem)
         
-        return {
-            'basicInfo': {
-                'period': {'start': period[0] or '2025-10-01', 'end': period[1] or '2026-03-31'},
-                'site': 'mk (Monkey Travel)',
-                'currency': 'THB',
-                'supplier': supplier
-            },
-            'programs': programs
-        }, None
+        cache_stats = result_cache.stats()
+        st.caption(
+            f"캐시: 적중 {cache_stats['hits']:,}회 / 미스 {cache_stats['misses']:,}회 · "
+            f"{cache_stats['entries']}개 항목 ({cache_stats['bytes'] / 1024 / 1024:,.1f} / {cache_stats['max_bytes'] / 1024 / 1024:,.0f} MB)"
+        )
         
-    except Exception as e:
-        return None, f'HTML 파싱 중 오류가 발생했습니다: {str(e)}'
+        with profiler.stage('sweep'):
+            show_sweep_panel(df, commission_rates, exchange_rate, result_cache)
+    
+    # mk 세일가가 없는 페이지도 다른 판매 채널 가격은 계산
+    with profiler.stage('all_sites'):
+        show_price_table_panel(
+            parsed_data, parse_hash, commission_rates, exchange_rate, discount_rate, net_price_percentage, result_cache, file_stem
+        )
 
 def main():
+    st.set_page_config(page_title="API 프로모션 계산", layout="wide")
+    configure_profile_logging()
     st.title("📊 API 프로모션 계산")
+    
+    # 사이드바: 단계별 프로파일 (기록은 항상 JSON 로그로 출력, 패널 표시와 메모리 추적은 선택)
+    with st.sidebar:
+        profile_enabled = st.checkbox(
+            "⏱️ 단계별 성능 프로파일",
+            key="profile_enabled",
+            on_change=_stop_memory_trace,
+            help="파싱/계산/표시 단계별 실행 시간과 행/열 수를 표시합니다."
+        )
+        trace_memory = st.checkbox(
+            "메모리 추적 (tracemalloc)",
+            key="profile_trace_memory",
+            disabled=not profile_enabled,
+            on_change=_stop_memory_trace,
+            help="단계별 최대 메모리 사용량을 기록합니다. 추적 중에는 계산이 느려집니다."
+        )
+        profile_container = st.empty()
+    if 'profile_session_id' not in st.session_state:
+        st.session_state['profile_session_id'] = uuid.uuid4().hex[:12]
+    profiler = StageProfiler(st.session_state['profile_session_id'], trace_memory=profile_enabled and trace_memory)
+    
+    # 모드 선택: 요금표 하나의 가격 계산 또는 수정 전/후 요금표 비교
+    # (Streamlit은 렌더링되지 않은 위젯 값을 지우므로 모드를 바꿔도 입력이 남도록 텍스트 입력값을 다시 기록)
+    html_input_key = f"html_input_value_{st.session_state.get('html_input_key_counter', 0)}"
+    for key in (html_input_key, *PRICING_INPUT_KEYS, *DIFF_INPUT_KEYS):
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+    app_mode = st.radio("모드", ["가격 계산", "변경 전후 비교"], horizontal=True, key="app_mode")
+    if app_mode == "변경 전후 비교":
+        show_compare_page(profiler)
+        if profile_enabled:
+            show_profile_panel(profile_container, profiler.records)
+        return
+    
     st.markdown("### HTML 데이터 입력")
-    st.info("**사용 방법:** 웹페이지에서 원하는 가격 테이블의 HTML Element 코드를 복사하여 아래에 붙여 넣으세요.")
+    st.info("**사용 방법:** 웹페이지에서 원하는 가격 테이블의 HTML Element 코드를 복사하여 아래에 붙여 넣으세요. "
+            "큰 페이지는 저장한 HTML 파일(.html 또는 gzip 압축 .html.gz)을 올리는 편이 빠릅니다.")
     
     # HTML input key counter 초기화
     if 'html_input_key_counter' not in st.session_state:
         st.session_state['html_input_key_counter'] = 0
     
     # HTML 입력과 Clear 버튼을 같은 행에 배치
+    # (입력은 폼으로 묶어 붙여넣기/파일 선택만으로는 앱을 다시 실행하지 않고, 계산하기를 누를 때 한 번에 전송)
     col_input, col_clear = st.columns([5, 1])
     with col_input:
-        html_input_key = f"html_input_value_{st.session_state['html_input_key_counter']}"
-        html_input = st.text_area(
-            "HTML 코드 입력",
-            placeholder="여기에 HTML 코드를 붙여넣으세요...",
-            height=300,
-            key=html_input_key
-        )
+        with st.form("rate_input_form", border=False):
+            html_input_key = f"html_input_value_{st.session_state['html_input_key_counter']}"
+            html_input = st.text_area(
+                "HTML 코드 입력",
+                placeholder="여기에 HTML 코드를 붙여넣으세요...",
+                height=300,
+                key=html_input_key
+            )
+            # 큰 페이지용 파일 업로드 - 내용이 텍스트 입력값(세션 상태)으로 매 재실행마다 오가지 않음 (파일이 있으면 파일 우선)
+            uploaded_file = st.file_uploader(
+                "또는 HTML 파일 업로드 (.html, .html.gz)",
+                type=RATE_FILE_TYPES,
+                key=f"html_file_{st.session_state['html_input_key_counter']}"
+            )
+            submitted = st.form_submit_button("🔢 계산하기", type="primary")
     
     with col_clear:
         st.write("")  # 공간 맞추기
         st.write("")  # 공간 맞추기
-        if st.button("🗑️ Clear", use_container_width=True, key="clear_button"):
-            # 키 카운터를 증가시켜 새로운 위젯으로 재생성
-            st.session_state['html_input_key_counter'] += 1
-            # 관련된 데이터도 초기화
-            if 'parsed_data' in st.session_state:
-                del st.session_state['parsed_data']
-            if 'discount_rate' in st.session_state:
-                st.session_state['discount_rate'] = 0
-            if 'exchange_rate' in st.session_state:
-                st.session_state['exchange_rate'] = 0
-            if 'commission_rates' in st.session_state:
-                st.session_state['commission_rates'] = []
-            if 'net_price_percentage' in st.session_state:
-                st.session_state['net_price_percentage'] = 0
-            st.rerun()
-    
-    # 수수료, 환율, 할인율 입력
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        commission_rates_input = st.text_input(
-            "수수료 (%)",
-            value="",
-            placeholder="0.00",
-            help="수수료를 쉼표로 구분하여 입력하세요. (예: 6.6,10,11)"
-        )
-    with col2:
-        exchange_rate_input = st.text_input(
-            "환율 (THB → KRW)",
-            value="",
-            placeholder="0.00",
-            help="태국 바트(THB)를 원화(KRW)로 변환할 환율을 입력하세요. (예: 1 THB = 36.5 KRW)"
-        )
-    with col3:
-        discount_rate_input = st.text_input(
-            "할인율 (%)",
-            value="",
-            placeholder="0.00",
-            help="할인율을 입력하면 최종 판매가와 마진이 자동으로 계산됩니다."
-        )
+        # 키 카운터를 증가시켜 새로운 위젯으로 재생성하고 관련된 데이터도 초기화 (콜백)
+        st.button("🗑️ Clear", width='stretch', key="clear_button", on_click=_clear_rate_input)
     
-    if st.button("🔢 계산하기", type="primary"):
-        if not html_input.strip():
-            st.error("HTML 코드를 입력해주세요.")
+    if submitted:
+        if uploaded_file is None and not html_input.strip():
+            st.error("HTML 코드를 입력하거나 HTML 파일을 올려주세요.")
         else:
-            parsed_data, error = parseHTML(html_input)
+            with profiler.stage('parse') as info:
+                parse_hash, parsed_data, error = parse_rate_source(
+                    html_input, uploaded_file, get_result_cache(), profiler, get_rate_store(), stats=info,
+                    block_cache=get_block_cache()
+                )
+                if parsed_data:
+                    info['rows'], info['cols'] = parsed_data['programs'].shape
+            # 결과 영역 프래그먼트가 따로 다시 실행되어도 표시되도록 파싱 단계 기록은 세션에 보관
+            st.session_state['parse_profile'] = profiler.records
+            profiler.records = []
             
             if error:
                 st.error(error)
             elif parsed_data:
-                # 환율과 할인율 파싱
-                try:
-                    exchange_rate = float(exchange_rate_input.strip()) if exchange_rate_input.strip() else 0.0
-                except:
-                    exchange_rate = 0.0
-                    st.warning("환율 입력값이 올바르지 않습니다. 0.0으로 설정됩니다.")
-                
-                try:
-                    discount_rate = float(discount_rate_input.strip()) if discount_rate_input.strip() else 0.0
-                except:
-                    discount_rate = 0.0
-                    st.warning("할인율 입력값이 올바르지 않습니다. 0.0으로 설정됩니다.")
-                
                 st.session_state['parsed_data'] = parsed_data
-                st.session_state['discount_rate'] = discount_rate
-                st.session_state['exchange_rate'] = exchange_rate
-                # 수수료 파싱
-                try:
-                    if commission_rates_input.strip():
-                        commission_rates = [float(x.strip()) for x in commission_rates_input.split(',') if x.strip()]
-                    else:
-                        commission_rates = []
-                    st.session_state['commission_rates'] = commission_rates
-                except:
-                    st.session_state['commission_rates'] = []
-                st.success("데이터 파싱 완료!")
-                st.rerun()
+                st.session_state['parse_hash'] = parse_hash
+                if info.get('blocks_reused'):
+                    st.success(f"데이터 파싱 완료! (블록 {info['blocks']:,}개 중 바뀌지 않은 "
+                               f"{info['blocks_reused']:,}개는 이전 파싱 결과 재사용)")
+                else:
+                    st.success("데이터 파싱 완료!")
     
-    # 결과 표시
+    rate_store = get_rate_store()
+    if rate_store is not None:
+        show_history_panel(rate_store)
+    
+    # 결과 표시 - 기본 정보는 파싱할 때만, 가격 설정과 결과 테이블은 설정을 바꿀 때마다 프래그먼트로 다시 실행
     if 'parsed_data' in st.session_state:
-        parsed_data = st.session_state['parsed_data']
-        discount_rate = st.session_state.get('discount_rate', 0)
-        exchange_rate = st.session_state.get('exchange_rate', 0)
-        commission_rates = st.session_state.get('commission_rates', [])
-        
-        # 결과 영역 상단에 Clear 버튼 추가
-        col_result_title, col_clear_result = st.columns([5, 1])
-        with col_clear_result:
-            st.write("")  # 공간 맞추기
-            if st.button("🗑️ Clear All", use_container_width=True, key="clear_result_button"):
-                # 모든 session_state 초기화
-                st.session_state['html_input_key_counter'] += 1
-                if 'parsed_data' in st.session_state:
-                    del st.session_state['parsed_data']
-                if 'discount_rate' in st.session_state:
-                    st.session_state['discount_rate'] = 0
-                if 'exchange_rate' in st.session_state:
-                    st.session_state['exchange_rate'] = 0
-                if 'commission_rates' in st.session_state:
-                    st.session_state['commission_rates'] = []
-                if 'net_price_percentage' in st.session_state:
-                    st.session_state['net_price_percentage'] = 0
-                st.rerun()
-        
-        # 세일가 기준 넷가% 설정 (Net가가 0인 경우용)
-        net_price_percentage = st.session_state.get('net_price_percentage', 0)
-        
-        # 수수료가 없으면 경고 표시
-        if not commission_rates:
-            st.warning("⚠️ 수수료를 입력해주세요. 수수료 입력칸에 쉼표로 구분하여 입력하세요. (예: 6.6,10,11)")
-            st.stop()
-        
-        # 기본 정보 및 설정 표시
-        st.markdown("### 기본 정보")
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("사이트", parsed_data['basicInfo']['site'])
-        with col2:
-            st.metric("공급사", parsed_data['basicInfo']['supplier'])
-        with col3:
-            st.metric("기간", f"{parsed_data['basicInfo']['period']['start']} ~ {parsed_data['basicInfo']['period']['end']}")
-        with col4:
-            st.metric("통화", parsed_data['basicInfo']['currency'])
-        
-        # 설정 정보 표시
-        st.markdown("### 설정")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.info(f"**수수료:** {', '.join([f'{x}%' for x in commission_rates])}")
-        with col2:
-            if exchange_rate > 0:
-                st.info(f"**환율:** 1 THB = {exchange_rate:,.2f} KRW")
-            else:
-                st.info("**환율:** 미설정")
-        with col3:
-            st.info(f"**할인율:** {discount_rate}%")
-        
-        st.markdown("---")
-        
-        # 테이블 데이터 생성 - 수수료를 동적으로 처리
-        table_rows = []
-        net_price_percentage = st.session_state.get('net_price_percentage', 0)
-        
-        for program in parsed_data['programs']:
-            for rate in program['rates']:
-                # net_price_percentage가 설정되어 있으면 세일가 기준으로 넷가 계산 (넷가가 0이 아니어도 적용)
-                calculated_net_price = rate['net_price']
-                if rate['sale_price'] > 0 and net_price_percentage > 0:
-                    calculated_net_price = round(rate['sale_price'] * (net_price_percentage / 100))
-                
-                # net_price > 0 또는 (sale_price > 0이고 net_price_percentage가 설정된 경우) 테이블에 포함
-                if (calculated_net_price > 0 or rate['sale_price'] > 0) and rate['sale_price'] > 0:
-                    discount = discount_rate / 100
-                    net_krw = calculated_net_price * exchange_rate if exchange_rate > 0 else 0
-                    
-                    # 기본 행 데이터
-                    row_data = {
-                        'Rate ID': program['rate_id'],
-                        'Program ID': program['program_id'],
-                        '시작일': parsed_data['basicInfo']['period']['start'],
-                        '종료일': parsed_data['basicInfo']['period']['end'],
-                        '옵션명': program['program_name'],
-                        '사이트': program['site'],
-                        '대상': rate['pax_type'],
-                        '넷가(바트)': calculated_net_price,
-                        '세일가(바트)': rate['sale_price']
-                    }
-                    
-                    # 각 수수료별로 동적으로 계산
-                    for comm_rate in commission_rates:
-                        comm_rate_str = str(comm_rate).replace('.', '_')
-                        comm_rate_decimal = comm_rate / 100
-                        
-                        # 해당 수수료에 대한 필요 마크업 계산
-                        import math
-                        commission_temp = round(rate['sale_price'] * comm_rate_decimal)
-                        supply_price_temp = rate['sale_price'] - commission_temp
-                        has_krw_price = False  # KRW 가격이 있는지 확인 필요 (parseHTML에서 확인)
-                        required_markup = 0
-                        if supply_price_temp > 0 and not has_krw_price:
-                            if supply_price_temp < calculated_net_price:
-                                required_markup = math.ceil((calculated_net_price / supply_price_temp - 1) * 100)
-                        
-                        # 필요 마크업을 사용해 최종 세일가 계산
-                        req_mk = required_markup / 100
-                        final_sale_thb = rate['sale_price'] * (1 + req_mk)
-                        sale_krw = final_sale_thb * exchange_rate if exchange_rate > 0 else 0
-                        final_price = sale_krw * (1 - discount) if exchange_rate > 0 else 0
-                        commission = round(final_price * comm_rate_decimal) if exchange_rate > 0 else 0
-                        supply_price = final_price - commission if exchange_rate > 0 else 0
-                        margin_krw = supply_price - net_krw
-                        
-                        # 컬럼명 생성
-                        row_data[f'마크업_{comm_rate_str}'] = required_markup
-                        row_data[f'최종세일가(바트)_{comm_rate_str}%'] = round(final_sale_thb)
-                        if exchange_rate > 0:
-                            row_data[f'(원)세일가_{comm_rate_str}%'] = round(sale_krw)
-                            row_data[f'최종판매가_{comm_rate_str}%'] = round(final_price)
-                            row_data[f'공급가_{comm_rate_str}%'] = round(supply_price)
-                            row_data[f'마진_{comm_rate_str}%(원화)'] = round(margin_krw)
-                    
-                    table_rows.append(row_data)
-        
-        if table_rows:
-            df = pd.DataFrame(table_rows)
-            # 인덱스를 0부터 시작하도록 리셋 (하이라이트 함수에서 인덱스 매칭을 위해)
-            df = df.reset_index(drop=True)
-            
-            # 컬럼 순서 지정 (수수료별로 동적으로 그룹화, 마크업을 최종세일가 앞에 위치)
-            column_order = [
-                'Rate ID', 'Program ID', '시작일', '종료일', '옵션명', '사이트', '대상',
-                '넷가(바트)', '세일가(바트)'
-            ]
-            
-            # 각 수수료별로 컬럼 추가
-            for comm_rate in commission_rates:
-                comm_rate_str = str(comm_rate).replace('.', '_')
-                if exchange_rate > 0:
-                    column_order.extend([
-                        f'마크업_{comm_rate_str}', f'최종세일가(바트)_{comm_rate_str}%', f'(원)세일가_{comm_rate_str}%',
-                        f'최종판매가_{comm_rate_str}%', f'공급가_{comm_rate_str}%', f'마진_{comm_rate_str}%(원화)'
-                    ])
-                else:
-                    column_order.extend([
-                        f'마크업_{comm_rate_str}', f'최종세일가(바트)_{comm_rate_str}%'
-                    ])
-            
-            # 존재하는 컬럼만 선택하여 순서 재정렬
-            existing_columns = [col for col in column_order if col in df.columns]
-            df = df[existing_columns]
-            
-            # 환율이 없으면 원화 컬럼 제거
-            if exchange_rate == 0:
-                krw_cols = [col for col in df.columns if '(원화)' in col]
-                df = df.drop(columns=krw_cols)
-            
-            # 결과 테이블 제목과 넷가% 설정 입력칸, 새로고침 버튼
-            col_title, col_net_percent, col_refresh = st.columns([3, 2, 1])
-            with col_title:
-                st.markdown(f"### 결과 테이블 (총 {len(df)}개 항목)")
-            with col_net_percent:
-                net_price_percent_input = st.text_input(
-                    "세일가 기준 넷가%",
-                    value=str(net_price_percentage) if net_price_percentage > 0 else "",
-                    placeholder="예: 70",
-                    help="세일가의 몇 %로 넷가를 설정할지 입력하세요.",
-                    key="net_price_percent_input"
-                )
-            with col_refresh:
-                st.write("")  # 공간 맞추기
-                if st.button("🔄 적용", use_container_width=True, key="refresh_table_button"):
-                    # 넷가% 파싱 및 저장
-                    try:
-                        if net_price_percent_input.strip():
-                            new_percentage = float(net_price_percent_input.strip())
-                            if 0 < new_percentage <= 100:
-                                st.session_state['net_price_percentage'] = new_percentage
-                            else:
-                                st.warning("넷가%는 0보다 크고 100 이하여야 합니다.")
-                                st.session_state['net_price_percentage'] = 0
-                        else:
-                            st.session_state['net_price_percentage'] = 0
-                    except:
-                        st.warning("넷가% 입력값이 올바르지 않습니다.")
-                        st.session_state['net_price_percentage'] = 0
-                    st.rerun()
-            
-            # 표시용 데이터프레임 (숫자 포맷팅)
-            display_df = df.copy()
-            # 인덱스를 0부터 시작하도록 리셋 (하이라이트 함수에서 인덱스 매칭을 위해)
-            display_df = display_df.reset_index(drop=True)
-            
-            # 마크업 컬럼이 있으면 퍼센트 형식으로 변환 (동적으로 처리)
-            for comm_rate in commission_rates:
-                comm_rate_str = str(comm_rate).replace('.', '_')
-                col = f'마크업_{comm_rate_str}'
-                if col in display_df.columns:
-                    display_df[col] = display_df[col].apply(lambda x: f"{x}%" if isinstance(x, (int, float)) else x)
-            
-            # 숫자 컬럼 포맷팅 (동적으로 처리)
-            numeric_cols = ['넷가(바트)', '세일가(바트)']
-            for comm_rate in commission_rates:
-                comm_rate_str = str(comm_rate).replace('.', '_')
-                numeric_cols.extend([
-                    f'최종세일가(바트)_{comm_rate_str}%',
-                    f'(원)세일가_{comm_rate_str}%',
-                    f'최종판매가_{comm_rate_str}%',
-                    f'공급가_{comm_rate_str}%',
-                    f'마진_{comm_rate_str}%(원화)',
-                    f'마크업_{comm_rate_str}'
-                ])
-            
-            # 원화 컬럼 (환율이 설정된 경우만, 동적으로 처리)
-            krw_cols = []
-            if exchange_rate > 0:
-                for comm_rate in commission_rates:
-                    comm_rate_str = str(comm_rate).replace('.', '_')
-                    krw_cols.append(f'마진_{comm_rate_str}%(원화)')
-            
-            # 일반 숫자 컬럼 포맷팅
-            for col in numeric_cols:
-                if col in display_df.columns:
-                    display_df[col] = display_df[col].apply(
-                        lambda x: f"{x:,}" if isinstance(x, (int, float)) and pd.notna(x) else ("" if pd.isna(x) else x)
-                    )
-            
-            # 원화 컬럼 포맷팅 (원 단위 추가)
-            for col in krw_cols:
-                if col in display_df.columns:
-                    # 원본 데이터프레임(df)에서 숫자 값을 가져와서 포맷팅
-                    display_df[col] = df[col].apply(
-                        lambda x: f"{int(x):,}원" if isinstance(x, (int, float)) and pd.notna(x) else "0원"
-                    )
-            
-            # Streamlit dataframe으로 표시 (조절 가능한 표)
-            # 행 전체 하이라이트 + 마크업 셀 하이라이트를 한 번에 처리 (덮어쓰기 문제 방지)
-            def style_row(row):
-                """행 전체 스타일링: 마진 음수면 행 전체 빨강, 아니면 마크업만 셀 단위 스타일"""
-                row_idx = row.name
-                
-                # 마진이 음수인지 확인 (원본 df에서 숫자형으로 강제 변환)
-                negative = False
-                for col in df.columns:
-                    if '마진' in col and '(원화)' in col:
-                        try:
-                            # 숫자형으로 강제 변환 (문자열이어도 처리)
-                            v = pd.to_numeric(df.loc[row_idx, col], errors='coerce')
-                            if pd.notna(v) and v < 0:
-                                negative = True
-                                break
-                        except:
-                            continue
-                
-                # 마진이 음수면 행 전체 빨간색 (마크업 스타일 무시)
-                if negative:
-                    return ['background-color: #fee2e2; color: #dc2626; font-weight: bold'] * len(row)
-                
-                # 마진이 음수가 아니면, 마크업만 셀 단위 스타일
-                styles = [''] * len(row)
-                for i, col in enumerate(row.index):
-                    if col.startswith('마크업_'):
-                        try:
-                            # 문자열에서 % 제거 후 숫자 변환
-                            val_str = str(row[col])
-                            mv = float(val_str.replace('%', ''))
-                            if mv > 0:
-                                styles[i] = 'background-color: #fee2e2; color: #dc2626; font-weight: bold'
-                        except:
-                            pass
-                return styles
-            
-            # 한 번에 스타일 적용
-            styled_df = display_df.style.apply(style_row, axis=1)
-            
-            # Streamlit dataframe 표시
-            st.dataframe(styled_df, use_container_width=True, height=600)
+        show_basic_info(st.session_state['parsed_data'])
+    show_pricing_section(profile_container, profile_enabled, trace_memory)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,150 @@
+"""저장된 요금 페이지(HTML)를 일괄 계산하는 커맨드라인 도구
+
+사용 예:
+    python batch_markup_calculator.py saved_pages/ --commission 6.6,10,11 --exchange-rate 38.5 -o result.csv
+    python batch_markup_calculator.py "exports/*.html" --commission 10 --net-percent 70 -o result.parquet
+    python batch_markup_calculator.py saved_pages/ --commission 10 --exchange-rate 38.5 -o result.xlsx
+    python batch_markup_calculator.py "archive/*.html.gz" --commission 10 -o result.csv
+    python batch_markup_calculator.py saved_pages/ --commission 10 --exchange-rate 38.5 --all-sites --currency-rate USD=36.5 -o prices.csv
+"""
+import argparse
+import glob
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from markup_calculator import (
+    EXPORT_FORMATS, PARSER_ENGINES, parseHTML, build_price_table, build_result_table, export_format_for, map_rate_file,
+    parse_currency_rates, write_export
+)
+
+# 디렉터리 입력 시 수집할 파일 패턴 (gzip 압축 페이지 포함)
+HTML_PATTERNS = ('*.html', '*.htm', '*.html.gz', '*.htm.gz')
+
+def collect_files(inputs):
+    """디렉터리/글롭/파일 경로 목록을 중복 없는 파일 목록으로 변환 (입력 순서 유지)"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(path for pattern in HTML_PATTERNS for path in glob.glob(os.path.join(item, pattern)))
+        elif os.path.isfile(item):
+            matches = [item]
+        else:
+            matches = sorted(glob.glob(item))
+        for path in matches:
+            if os.path.isfile(path) and path not in files:
+                files.append(path)
+    return files
+
+def price_file(path, commission_rates, exchange_rate, discount_rate, net_price_percentage, engine='auto',
+               all_sites=False, currency_rates=None):
+    """파일 하나를 파싱하고 결과 테이블 생성 - (DataFrame 또는 None, 오류 메시지 또는 None) 반환
+    
+    all_sites이면 mk THB 결과 테이블 대신 모든 사이트/통화의 긴 형식 가격 테이블(build_price_table)을 만듭니다.
+    """
+    # 파일을 mmap 바이트 버퍼로 그대로 파싱 (gzip은 임시 파일에 풀어 쓴 뒤 매핑)
+    try:
+        with open(path, 'rb') as f, map_rate_file(f) as html_content:
+            parsed_data, error = parseHTML(html_content, engine=engine)
+    except (OSError, EOFError, ValueError, zlib.error) as e:
+        return None, f'파일을 읽을 수 없습니다: {str(e)}'
+    if error:
+        return None, error
+    
+    if all_sites:
+        df = build_price_table(parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage, currency_rates)
+        if df is None:
+            return None, '바트 환율을 아는 통화의 판매 가격이 없습니다.'
+    else:
+        df = build_result_table(parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage)
+        if df is None:
+            return None, '세일가가 있는 요금이 없습니다.'
+    
+    df.insert(0, '파일', os.path.basename(path))
+    return df, None
+
+def _commission_rates(text):
+    """쉼표로 구분된 수수료 문자열을 float 목록으로 변환"""
+    try:
+        commission_rates = [float(x.strip()) for x in text.split(',') if x.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'수수료 입력값이 올바르지 않습니다: {text}')
+    if not commission_rates:
+        raise argparse.ArgumentTypeError('수수료를 하나 이상 입력해주세요.')
+    return commission_rates
+
+def _currency_rates(text):
+    """'USD=36.5,EUR=39' 형식의 통화별 바트 환율 문자열을 dict로 변환"""
+    try:
+        return parse_currency_rates(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f'통화별 환율 입력값이 올바르지 않습니다: {e}')
+
+def write_table(df, output):
+    """확장자에 따라 CSV(.csv, Excel 호환 UTF-8 BOM), Parquet(.parquet) 또는 Excel(.xlsx)로 저장 - 앱의 내보내기와 같은 형식"""
+    with open(output, 'wb') as f:
+        write_export(df, f, export_format_for(output))
+
+def build_parser():
+    """커맨드라인 인자 파서 생성"""
+    parser = argparse.ArgumentParser(description='저장된 요금 페이지(HTML)를 일괄 파싱하여 프로모션 가격을 계산합니다.')
+    parser.add_argument('inputs', nargs='+', help='HTML 파일, 디렉터리 또는 글롭 패턴 (예: "pages/*.html")')
+    parser.add_argument('-c', '--commission', type=_commission_rates, required=True,
+                        help='수수료(%%)를 쉼표로 구분하여 입력 (예: 6.6,10,11)')
+    parser.add_argument('-x', '--exchange-rate', type=float, default=0.0, help='환율 (1 THB = ? KRW), 기본값 0 (미설정)')
+    parser.add_argument('-d', '--discount', type=float, default=0.0, help='할인율 (%%), 기본값 0')
+    parser.add_argument('-n', '--net-percent', type=float, default=0.0, help='세일가 기준 넷가%% (0 < 값 <= 100), 기본값 0 (미적용)')
+    parser.add_argument('-o', '--output', required=True, help=f'결과 파일 경로 ({", ".join(extension for _, extension, _ in EXPORT_FORMATS.values())})')
+    parser.add_argument('-e', '--engine', choices=['auto', *PARSER_ENGINES], default='auto',
+                        help='HTML 파서 엔진 (기본값 auto: 문서 크기와 블록 중첩 여부로 선택)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='프로세스 수 (기본값: CPU 수)')
+    parser.add_argument('--all-sites', action='store_true',
+                        help='mk THB 대신 모든 사이트/통화의 가격을 긴 형식 테이블로 계산 (통화 컬럼 포함)')
+    parser.add_argument('--currency-rate', type=_currency_rates, default={},
+                        help='--all-sites에서 쓸 통화별 바트 환율 (예: USD=36.5,EUR=39). THB는 1, KRW는 --exchange-rate로 환산')
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if not 0 <= args.net_percent <= 100:
+        parser.error('넷가%는 0(미적용)에서 100 사이여야 합니다.')
+    
+    files = collect_files(args.inputs)
+    if not files:
+        print('처리할 HTML 파일이 없습니다.', file=sys.stderr)
+        return 1
+    
+    # 파일 하나당 작업 하나로 프로세스 풀에서 계산
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(price_file, path, args.commission, args.exchange_rate, args.discount, args.net_percent, args.engine,
+                            args.all_sites, args.currency_rate)
+            for path in files
+        ]
+        tables = []
+        for path, future in zip(files, futures):
+            try:
+                df, error = future.result()
+            except Exception as e:
+                df, error = None, f'처리 중 오류가 발생했습니다: {str(e)}'
+            if error:
+                print(f'[건너뜀] {path}: {error}', file=sys.stderr)
+            else:
+                tables.append(df)
+    
+    if not tables:
+        print('계산된 결과가 없습니다.', file=sys.stderr)
+        return 1
+    
+    result = pd.concat(tables, ignore_index=True)
+    write_table(result, args.output)
+    print(f'{len(tables)}/{len(files)}개 파일, 총 {len(result)}개 항목 -> {args.output}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
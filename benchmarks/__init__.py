@@ -0,0 +1 @@
+"""파싱/계산/표시 단계별 성능 측정 도구"""
@@ -0,0 +1,102 @@
+"""import 시간 벤치마크 - 새 파이썬 프로세스에서 핵심 모듈(markup_calculator)과 Streamlit 앱 모듈의 import 비용 비교
+
+경우마다 새 프로세스를 띄워 import(와 첫 호출)에 걸린 시간, 프로세스 전체 실행 시간, import 후 올라온 무거운 모듈을 잽니다.
+핵심 모듈은 pandas/numpy를 처음 쓸 때 import하므로 설정값 파싱(parse_sweep_values)만 하면 pandas 비용이 없고, parseHTML은 첫 호출에서
+pandas를 import합니다 (앱 import는 Streamlit과 pandas를 모두 올림). 작업자 프로세스와 짧은 CLI 실행의 시작 비용 확인용입니다.
+
+저장소 루트에서 실행:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 20 -o import_bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['streamlit', 'pandas', 'numpy', 'lxml', 'xlsxwriter']
+
+# (이름, 설명, 준비 코드 - 측정 제외, 측정할 코드)
+CASES = [
+    ('core', 'markup_calculator import', '', 'import markup_calculator'),
+    ('core_settings', 'markup_calculator import + parse_sweep_values', '',
+     'import markup_calculator\nmarkup_calculator.parse_sweep_values("6.6,10,11")'),
+    ('core_parse', 'markup_calculator import + parseHTML(10행)',
+     'from benchmarks.rate_page_generator import generate_rate_page\nhtml_content = generate_rate_page("spa", 10, seed=1)',
+     'import markup_calculator\nmarkup_calculator.parseHTML(html_content)'),
+    ('app', 'app_markup_calculator import (Streamlit 앱)', '', 'import app_markup_calculator')
+]
+
+_CHILD_SCRIPT = """
+import json
+import sys
+import time
+{setup}
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def run_case(setup, code):
+    """새 프로세스에서 code를 실행해 (import 초, 프로세스 전체 초, 올라온 무거운 모듈 목록) 반환"""
+    script = _CHILD_SCRIPT.format(setup=setup, code=code, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', script], cwd=REPO_ROOT, capture_output=True, text=True, encoding='utf-8')
+    process_seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f'측정 프로세스 실패: {completed.stderr.strip()}')
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return result['seconds'], process_seconds, result['loaded']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='핵심 모듈/Streamlit 앱 import 시간 벤치마크')
+    parser.add_argument('--repeat', type=int, default=10, help='경우별 측정 횟수 (기본값: 10)')
+    parser.add_argument('-o', '--output', help='결과 JSON 경로 (선택)')
+    args = parser.parse_args(argv)
+    
+    # 첫 실행의 바이트코드 컴파일/디스크 캐시 비용은 측정에서 제외
+    for _, _, setup, code in CASES:
+        run_case(setup, code)
+    
+    print(f"{'경우':<45} {'import(ms)':>11} {'최소(ms)':>9} {'프로세스(ms)':>12}  import된 모듈")
+    results = []
+    for name, label, setup, code in CASES:
+        runs = [run_case(setup, code) for _ in range(args.repeat)]
+        result = {
+            'case': name,
+            'import_median_ms': statistics.median(run[0] for run in runs) * 1000,
+            'import_min_ms': min(run[0] for run in runs) * 1000,
+            'process_median_ms': statistics.median(run[1] for run in runs) * 1000,
+            'loaded_modules': runs[-1][2],
+            'repeat': args.repeat
+        }
+        results.append(result)
+        print(f"{label:<45} {result['import_median_ms']:>11.1f} {result['import_min_ms']:>9.1f} "
+              f"{result['process_median_ms']:>12.1f}  {', '.join(result['loaded_modules']) or '-'}", flush=True)
+    
+    by_case = {result['case']: result for result in results}
+    ratio = by_case['core']['import_median_ms'] / by_case['app']['import_median_ms']
+    print(f'핵심 모듈 import는 앱 import 시간의 {ratio:.1%}')
+    
+    if args.output:
+        report = {
+            'meta': {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform()
+            },
+            'results': results,
+            'core_to_app_ratio': ratio
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'결과 저장: {args.output}')
+
+if __name__ == '__main__':
+    main()
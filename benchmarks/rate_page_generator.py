@@ -0,0 +1,148 @@
+"""벤치마크/부하 테스트용 백오피스 요금 페이지(HTML) 생성기
+
+parseHTML이 지원하는 두 가지 레이아웃을 생성합니다.
+- spa: <tbody child-root="tour_rate.rateJson"> 하나가 프로그램 하나, 그 안의 <tr>이 rate.N.duration 행
+- tour: <tr child-root="tour_rate.rateJson"> 하나가 프로그램 하나 (성인/아동 nett, THB, KRW)
+sheets를 2 이상으로 주면 tour_rate.id/기간/공급사 헤더가 붙은 요금 시트 여러 개를 한 문서에 이어 붙입니다.
+revise_rate_page는 생성한 페이지에서 일부 행의 가격만 바꾼 "수정 후 다시 붙여넣기" 페이지를 만듭니다.
+
+사용 예:
+    python -m benchmarks.rate_page_generator spa 10000 -o spa_10k.html
+    python -m benchmarks.rate_page_generator tour 10000 --sheets 5 -o tour_5_sheets.html
+"""
+import argparse
+import random
+import re
+
+LAYOUTS = ('spa', 'tour')
+
+# 실제 페이지처럼 다른 판매 채널/통화 필드도 함께 생성
+_OTHER_SALE_CHANNELS = [('agoda', 'USD'), ('klook', 'THB')]
+_DURATIONS = ['60', '90', '120', '180']
+
+def _input(name, value, input_type='text'):
+    return (f'<input type="{input_type}" class="form-control input-sm text-right" name="{name}" '
+            f'data-validate="number" autocomplete="off" value="{value}">')
+
+_PAGE_START = ('<!DOCTYPE html>\n<html lang="ko"><head><meta charset="utf-8"><title>Tour Rate</title></head><body>\n'
+               '<form id="tourRateForm" method="post" action="/admin/tour_rate/save">\n')
+_PAGE_END = '</form>\n</body></html>\n'
+
+def _sheet_header(rate_id, period, supplier):
+    return (
+        f'<input type="hidden" name="tour_rate.id" value="{rate_id}">\n'
+        '<div class="form-group"><label>기간</label>'
+        f'<input type="text" class="form-control daterange" name="tour_rate.period" value="{period[0]} 00:00:00~{period[1]} 23:59:59"></div>\n'
+        '<div class="form-group"><label>공급사</label>'
+        f'<textarea id="autoCompleteSupplier_{rate_id % 97}_{rate_id % 13}" class="form-control autocomplete" rows="1">{supplier}</textarea></div>\n'
+    )
+
+def _price(rng, low, high, zero_ratio):
+    return 0 if rng.random() < zero_ratio else rng.randint(low, high)
+
+def _spa_blocks(rows, rng):
+    """rows개의 Duration 행을 프로그램(tbody)당 1~4개씩 생성"""
+    parts = ['<table class="table table-bordered rate-table">\n<thead><tr><th>프로그램</th><th>Duration</th>'
+             '<th>Nett</th><th>Sale(mk THB)</th><th>Sale(mk KRW)</th></tr></thead>\n']
+    program_id = 100000
+    remaining = rows
+    while remaining > 0:
+        program_id += rng.randint(1, 7)
+        durations = rng.sample(_DURATIONS, min(rng.randint(1, 4), remaining))
+        parts.append('<tbody child-root="tour_rate.rateJson">\n')
+        for idx, duration in enumerate(durations):
+            sale = _price(rng, 500, 6000, 0.05)
+            net = _price(rng, int(sale * 0.6) if sale else 300, max(int(sale * 1.05), 400), 0.1)
+            krw = _price(rng, 15000, 250000, 0.85)
+            parts.append('<tr>')
+            if idx == 0:
+                parts.append(f'<td rowspan="{len(durations)}">'
+                             f'<input type="hidden" name="program_id" value="{program_id}">'
+                             f'<b> Thai Spa Package {program_id} </b></td>')
+            parts.append(f'<td>{_input(f"rate.{idx}.duration", duration)}</td>'
+                         f'<td>{_input(f"rate.{idx}.adult.nett", net)}</td>'
+                         f'<td>{_input(f"rate.{idx}.adult.sale.monkey.THB", sale)}</td>'
+                         f'<td>{_input(f"rate.{idx}.adult.sale.monkey.KRW", krw)}</td>')
+            for site, currency in _OTHER_SALE_CHANNELS:
+                parts.append(f'<td>{_input(f"rate.{idx}.adult.sale.{site}.{currency}", sale + rng.randint(0, 50))}</td>')
+            parts.append('</tr>\n')
+        parts.append('</tbody>\n')
+        remaining -= len(durations)
+    parts.append('</table>\n')
+    return parts
+
+def _tour_blocks(rows, rng):
+    """rows개의 프로그램 행(tr)을 생성 - 성인/아동 nett, mk THB/KRW 및 다른 채널 가격 포함"""
+    parts = ['<table class="table table-bordered rate-table">\n<tbody>\n']
+    program_id = 200000
+    for _ in range(rows):
+        program_id += rng.randint(1, 7)
+        adult_sale = _price(rng, 800, 9000, 0.05)
+        child_sale = _price(rng, 400, int(adult_sale * 0.8) if adult_sale > 500 else 500, 0.3)
+        adult_net = _price(rng, int(adult_sale * 0.6) if adult_sale else 500, max(int(adult_sale * 1.05), 600), 0.1)
+        child_net = _price(rng, 200, max(child_sale, 300), 0.3)
+        has_krw = rng.random() < 0.15
+        parts.append('<tr child-root="tour_rate.rateJson">'
+                     f'<td><input type="hidden" name="program_id" value="{program_id}">'
+                     f'<b> Island Day Tour {program_id} </b><br><small class="text-muted">Pickup included</small></td>'
+                     f'<td>{_input("adult.nett", adult_net)}</td><td>{_input("child.nett", child_net)}</td>'
+                     f'<td>{_input("adult.sale.monkey.THB", adult_sale)}</td><td>{_input("child.sale.monkey.THB", child_sale)}</td>'
+                     f'<td>{_input("adult.sale.monkey.KRW", rng.randint(30000, 300000) if has_krw else 0)}</td>'
+                     f'<td>{_input("child.sale.monkey.KRW", rng.randint(15000, 200000) if has_krw else 0)}</td>')
+        for site, currency in _OTHER_SALE_CHANNELS:
+            parts.append(f'<td>{_input(f"adult.sale.{site}.{currency}", adult_sale + rng.randint(0, 50))}</td>'
+                         f'<td>{_input(f"child.sale.{site}.{currency}", child_sale)}</td>')
+        parts.append('</tr>\n')
+    parts.append('</tbody>\n</table>\n')
+    return parts
+
+def generate_rate_page(layout, rows, seed=0, rate_id=None, period=('2025-11-01', '2026-04-30'), supplier='Siam Leisure Co., Ltd.', sheets=1):
+    """layout('spa'/'tour') 구조의 요금 페이지 HTML을 rows개 요금 행으로 생성 (같은 seed면 같은 결과)
+    
+    sheets개의 시트로 나누면 시트 i는 rate_id + i, 공급사 이름 뒤에 ' #i'(i > 0)가 붙고, 요금 행은 고르게 나눠집니다.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f'지원하지 않는 레이아웃입니다: {layout}')
+    if sheets < 1:
+        raise ValueError(f'시트 수는 1 이상이어야 합니다: {sheets}')
+    rng = random.Random(f'{layout}-{rows}-{seed}')
+    rate_id = rate_id if rate_id is not None else rng.randint(10000, 99999)
+    parts = [_PAGE_START]
+    for sheet in range(sheets):
+        sheet_rows = rows // sheets + (1 if sheet < rows % sheets else 0)
+        parts.append(_sheet_header(rate_id + sheet, period, f'{supplier} #{sheet}' if sheet else supplier))
+        parts.extend(_spa_blocks(sheet_rows, rng) if layout == 'spa' else _tour_blocks(sheet_rows, rng))
+    parts.append(_PAGE_END)
+    return ''.join(parts)
+
+# 두 레이아웃 모두 있는 성인 mk THB 세일가 입력 (행마다 하나)
+_REVISABLE_PRICE = re.compile(r'(adult\.sale\.monkey\.THB" data-validate="number" autocomplete="off" value=")(\d+)"')
+
+def revise_rate_page(html_content, fraction, seed=0):
+    """html_content에서 요금 행의 fraction(0~1)만큼 성인 mk THB 세일가를 바꾼 페이지 반환 (나머지는 글자 그대로 유지)"""
+    matches = list(_REVISABLE_PRICE.finditer(html_content))
+    rng = random.Random(f'revise-{seed}')
+    revised = sorted(rng.sample(range(len(matches)), round(len(matches) * fraction)))
+    parts, last = [], 0
+    for index in revised:
+        match = matches[index]
+        parts.append(html_content[last:match.start(2)])
+        parts.append(str(int(match.group(2)) + rng.randint(1, 100)))
+        last = match.end(2)
+    parts.append(html_content[last:])
+    return ''.join(parts)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='벤치마크용 요금 페이지(HTML) 생성')
+    parser.add_argument('layout', choices=LAYOUTS)
+    parser.add_argument('rows', type=int, help='요금 행 수 (예: 10 ~ 100000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sheets', type=int, default=1, help='요금 시트 수 (기본값 1)')
+    parser.add_argument('-o', '--output', required=True, help='저장할 HTML 파일 경로')
+    args = parser.parse_args(argv)
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(generate_rate_page(args.layout, args.rows, args.seed, sheets=args.sheets))
+
+if __name__ == '__main__':
+    main()
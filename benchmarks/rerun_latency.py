@@ -0,0 +1,130 @@
+"""설정 변경 재실행 지연 벤치마크 - 앱 전체 재실행과 결과 영역 프래그먼트만 재실행하는 경우 비교 (Streamlit AppTest)
+
+큰 요금 페이지를 붙여넣어 계산한 뒤 할인율/넷가%/수수료를 바꿀 때마다 걸리는 시간을 잽니다.
+앱 전체는 설정 입력을 바꾼 AppTest 실행(프래그먼트 도입 전처럼 스크립트 전체가 다시 실행됨)이고, 프래그먼트는
+같은 세션 상태로 결과 영역 프래그먼트(show_pricing_section)만 실행하는 스크립트입니다 - AppTest는 프래그먼트 단위
+재실행을 지원하지 않으므로, Streamlit이 프래그먼트 재실행 때 실행하는 코드를 그대로 실행해 측정합니다.
+두 방식은 서로 다른 설정값을 써서 테이블 캐시를 재사용하지 않습니다 (수수료별 계산 단계 캐시는 양쪽 모두 재사용).
+
+저장소 루트에서 실행:
+    python -m benchmarks.rerun_latency --layout spa --rows 20000
+    python -m benchmarks.rerun_latency --rows 50000 --repeat 10 -o rerun_bench.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from streamlit.testing.v1 import AppTest
+
+import app_markup_calculator
+from benchmarks.rate_page_generator import LAYOUTS, generate_rate_page
+
+APP_TIMEOUT = 600
+DEFAULT_SETTINGS = {
+    'commission_input': '6.6,10,11',
+    'exchange_rate_input': '38.5',
+    'discount_rate_input': '',
+    'net_price_percent_input': ''
+}
+
+# 결과 영역 프래그먼트만 실행하는 스크립트
+FRAGMENT_SCRIPT = """
+from app_markup_calculator import show_pricing_section
+show_pricing_section(None)
+"""
+
+# (이름, 입력 위젯 키, 측정 번호 -> 입력값) - 측정마다 다른 값으로 바꿈
+INTERACTIONS = [
+    ('discount', 'discount_rate_input', lambda i: f'{1 + i * 0.5:g}'),
+    ('net_percent', 'net_price_percent_input', lambda i: f'{60 + i * 0.5:g}'),
+    ('commission', 'commission_input', lambda i: f'6.6,10,{11 + i * 0.5:g}')
+]
+
+def _check(app):
+    """AppTest 실행에서 예외가 났으면 RuntimeError"""
+    if app.exception:
+        raise RuntimeError(f'앱 실행 오류: {app.exception[0].value}')
+    return app
+
+def _time_inputs(app, key, values):
+    """입력 위젯 key를 values로 차례로 바꿔 실행하며 초 단위 측정값 목록 반환"""
+    timings = []
+    for value in values:
+        widget = app.text_input(key=key)
+        start = time.perf_counter()
+        _check(widget.input(value).run())
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def prepare_app(html_content):
+    """앱을 실행해 html_content를 붙여넣고 계산하기까지 누른 AppTest 반환"""
+    app = _check(AppTest.from_file(app_markup_calculator.__file__, default_timeout=APP_TIMEOUT).run())
+    app.text_area[0].input(html_content)
+    for key, value in DEFAULT_SETTINGS.items():
+        app.text_input(key=key).input(value)
+    _check(next(button for button in app.button if '계산하기' in button.label).click().run())
+    if 'parsed_data' not in app.session_state:
+        raise RuntimeError('요금 페이지 파싱에 실패했습니다.')
+    return app
+
+def prepare_fragment(app):
+    """app과 같은 파싱 결과/설정으로 결과 영역 프래그먼트만 실행하는 AppTest 반환"""
+    fragment = AppTest.from_string(FRAGMENT_SCRIPT, default_timeout=APP_TIMEOUT)
+    for key in ('parsed_data', 'parse_hash', 'profile_session_id', *DEFAULT_SETTINGS):
+        fragment.session_state[key] = app.session_state[key]
+    return _check(fragment.run())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='설정 변경 재실행 지연 벤치마크 (앱 전체 vs 결과 영역 프래그먼트)')
+    parser.add_argument('--layout', choices=LAYOUTS, default='spa', help='요금 페이지 레이아웃 (기본값: spa)')
+    parser.add_argument('--rows', type=int, default=20000, help='요금 행 수 (기본값: 20000)')
+    parser.add_argument('--repeat', type=int, default=5, help='설정별 측정 횟수 (기본값: 5)')
+    parser.add_argument('-o', '--output', help='결과 JSON 경로 (선택)')
+    args = parser.parse_args(argv)
+    
+    html_content = generate_rate_page(args.layout, args.rows, seed=1)
+    app = prepare_app(html_content)
+    fragment = prepare_fragment(app)
+    table_rows = len(app.dataframe[0].value) if app.dataframe else 0
+    print(f'{args.layout} {args.rows}행 (HTML {len(html_content.encode("utf-8")) / 1024:,.0f} KB), 결과 테이블 {table_rows:,}행')
+    print(f"{'설정':<12} {'앱 전체(ms)':>12} {'프래그먼트(ms)':>14} {'비율':>7}")
+    
+    results = []
+    for name, key, value_for in INTERACTIONS:
+        full = _time_inputs(app, key, [value_for(i) for i in range(args.repeat)])
+        scoped = _time_inputs(fragment, key, [value_for(args.repeat + i) for i in range(args.repeat)])
+        result = {
+            'interaction': name,
+            'full_app_median_ms': statistics.median(full) * 1000,
+            'fragment_median_ms': statistics.median(scoped) * 1000,
+            'full_app_min_ms': min(full) * 1000,
+            'fragment_min_ms': min(scoped) * 1000,
+            'repeat': args.repeat
+        }
+        results.append(result)
+        print(f"{name:<12} {result['full_app_median_ms']:>12.1f} {result['fragment_median_ms']:>14.1f} "
+              f"{result['fragment_median_ms'] / result['full_app_median_ms']:>6.2f}x", flush=True)
+    
+    if args.output:
+        report = {
+            'meta': {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'layout': args.layout,
+                'rows': args.rows,
+                'html_bytes': len(html_content.encode('utf-8')),
+                'table_rows': table_rows
+            },
+            'results': results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'결과 저장: {args.output}')
+
+if __name__ == '__main__':
+    main()
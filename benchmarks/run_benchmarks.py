@@ -0,0 +1,213 @@
+"""단계별 벤치마크 실행 - 파싱(블록 캐시 재파싱 포함), 가격 계산(설정 변경 시 재계산 포함), 변경 전후 비교, 표시 포맷팅, 스타일링, 멀티레벨 테이블 렌더링
+
+저장소 루트에서 실행:
+    python -m benchmarks.run_benchmarks --sizes 10,1000,100000 -o bench.json
+    python -m benchmarks.run_benchmarks --compare bench.json -o bench_new.json
+    python -m benchmarks.run_benchmarks --engines regex,html.parser,lxml --sizes 10,1000,100000 -o bench_engines.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from markup_calculator import (
+    BLOCK_CACHE_MAX_BYTES,
+    PARSER_ENGINES,
+    RESULT_CACHE_MAX_BYTES,
+    LRUByteCache,
+    parseHTML,
+    build_price_table,
+    build_result_table,
+    cached_result_table,
+    diff_result_tables,
+    display_column_formats,
+    format_display_values,
+    style_result_table,
+    create_multi_level_table
+)
+from benchmarks.rate_page_generator import LAYOUTS, generate_rate_page, revise_rate_page
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+DEFAULT_COMMISSION_RATES = [6.6, 10, 11]
+DEFAULT_EXCHANGE_RATE = 38.5
+DEFAULT_DISCOUNT_RATE = 5.0
+
+# 멀티레벨 테이블 페이지 렌더링 기준 행 수
+PAGE_SIZE = 500
+
+def _time(func, repeat):
+    """func를 repeat번 실행하여 (초 단위 측정값 목록, 마지막 반환값) 반환"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+def run_case(layout, rows, repeat, commission_rates, exchange_rate, discount_rate, engines=()):
+    """레이아웃/행 수 하나에 대해 단계별 측정 결과 목록 반환 (engines의 엔진별 파싱은 'parse:엔진' 단계)"""
+    html_content = generate_rate_page(layout, rows)
+    results = []
+    
+    def record(stage, timings, **extra):
+        results.append({
+            'layout': layout,
+            'rows': rows,
+            'stage': stage,
+            'min_s': min(timings),
+            'median_s': statistics.median(timings),
+            'repeat': len(timings),
+            **extra
+        })
+    
+    timings, (parsed_data, error) = _time(lambda: parseHTML(html_content), repeat)
+    if error:
+        raise RuntimeError(f'{layout} {rows}행 파싱 실패: {error}')
+    record('parse', timings, html_bytes=len(html_content.encode('utf-8')), rate_rows=len(parsed_data['programs']),
+           price_rows=len(parsed_data['prices']))
+    
+    for engine in engines:
+        timings, _ = _time(lambda: parseHTML(html_content, engine=engine), repeat)
+        record(f'parse:{engine}', timings, html_chars=len(html_content))
+    
+    # 블록 캐시 - 빈 캐시로 처음 파싱(해시/저장 비용)과, 측정마다 다른 1% 행을 바꾼 페이지를 채워진 캐시로 다시 파싱
+    timings, _ = _time(lambda: parseHTML(html_content, block_cache=LRUByteCache(BLOCK_CACHE_MAX_BYTES)), repeat)
+    record('parse_block_cold', timings)
+    
+    block_cache = LRUByteCache(BLOCK_CACHE_MAX_BYTES)
+    parseHTML(html_content, block_cache=block_cache)
+    revisions = [revise_rate_page(html_content, 0.01, seed=seed) for seed in range(repeat)]
+    block_stats = {}
+    timings, _ = _time(lambda: parseHTML(revisions.pop(), block_cache=block_cache, stats=block_stats), repeat)
+    record('parse_reparse_1pct', timings, blocks=block_stats.get('blocks'), blocks_reused=block_stats.get('blocks_reused'))
+    
+    timings, df = _time(lambda: build_result_table(parsed_data, commission_rates, exchange_rate, discount_rate), repeat)
+    record('pricing', timings, table_rows=len(df), table_cols=len(df.columns))
+    
+    # 할인율만 바꾼 재계산 - 측정마다 다른 할인율이라 테이블 캐시는 미스, 수수료별 markup/sale_krw 단계는 재사용
+    cache = LRUByteCache(RESULT_CACHE_MAX_BYTES)
+    cached_result_table('bench', parsed_data, commission_rates, exchange_rate, discount_rate, 0, cache)
+    discounts = itertools.count(discount_rate + 0.5, 0.5)
+    timings, _ = _time(lambda: cached_result_table('bench', parsed_data, commission_rates, exchange_rate, next(discounts), 0, cache), repeat)
+    record('pricing_discount', timings)
+    
+    # 모든 사이트/통화 가격 - USD는 고정 환율로 환산, 나머지 외화 행은 제외
+    timings, prices = _time(lambda: build_price_table(parsed_data, commission_rates, exchange_rate, discount_rate, 0, {'USD': 36.5}), repeat)
+    record('pricing_all_sites', timings, table_rows=0 if prices is None else len(prices))
+    
+    # 변경 전후 비교 - 넷가%로 모든 행의 넷가를 바꾸고 앞쪽 1% 행을 뺀 테이블과 조인 (변경/삭제가 모두 있는 경우)
+    revised = build_result_table(parsed_data, commission_rates, exchange_rate, discount_rate, 90).iloc[len(df) // 100:]
+    timings, diff = _time(lambda: diff_result_tables(df, revised, commission_rates), repeat)
+    record('diff', timings, changed_rows=len(diff['changed']), removed_rows=len(diff['removed']))
+    
+    # 표 보기는 숫자형 df + 컬럼 설정(브라우저 포맷팅), 문자열 변환은 수수료 그룹 헤더 표의 한 페이지만
+    timings, _ = _time(lambda: display_column_formats(df), repeat)
+    record('format', timings)
+    
+    timings, _ = _time(lambda: format_display_values(df.iloc[:PAGE_SIZE]), repeat)
+    record('format_page', timings, page_size=PAGE_SIZE)
+    
+    # Styler는 렌더링 시점에 계산되므로 _compute()까지 측정
+    timings, _ = _time(lambda: df.style.apply(style_result_table, axis=None)._compute(), repeat)
+    record('style', timings)
+    
+    timings, _ = _time(lambda: create_multi_level_table(df, exchange_rate > 0, commission_rates), repeat)
+    record('multi_level_full', timings)
+    
+    timings, _ = _time(lambda: create_multi_level_table(df, exchange_rate > 0, commission_rates, page=0, page_size=PAGE_SIZE), repeat)
+    record('multi_level_page', timings, page_size=PAGE_SIZE)
+    
+    return results
+
+def compare(results, baseline):
+    """이전 결과(JSON)와 (layout, rows, stage) 기준으로 비교하여 표 문자열 반환"""
+    previous = {(r['layout'], r['rows'], r['stage']): r for r in baseline['results']}
+    lines = [f"{'layout':<6} {'rows':>7} {'stage':<18} {'before(ms)':>11} {'after(ms)':>11} {'ratio':>7}"]
+    for r in results:
+        before = previous.get((r['layout'], r['rows'], r['stage']))
+        if before is None:
+            continue
+        ratio = r['min_s'] / before['min_s'] if before['min_s'] else float('nan')
+        lines.append(f"{r['layout']:<6} {r['rows']:>7} {r['stage']:<18} {before['min_s'] * 1000:>11.2f} {r['min_s'] * 1000:>11.2f} {ratio:>6.2f}x")
+    return '\n'.join(lines)
+
+def fastest_engines(results):
+    """(layout, rows)별로 가장 빠른 파서 엔진 표 문자열 - PARSER_ENGINE_BY_SIZE 기준을 정할 때 사용"""
+    cases = {}
+    for r in results:
+        if r['stage'].startswith('parse:'):
+            cases.setdefault((r['layout'], r['rows']), []).append(r)
+    lines = [f"{'layout':<6} {'rows':>7} {'chars':>11}  엔진별 최솟값(ms)"]
+    for (layout, rows), case in cases.items():
+        case.sort(key=lambda r: r['min_s'])
+        timings = ', '.join(f"{r['stage'][len('parse:'):]} {r['min_s'] * 1000:.2f}" for r in case)
+        lines.append(f"{layout:<6} {rows:>7} {case[0]['html_chars']:>11}  {timings}")
+    return '\n'.join(lines)
+
+def _engine_list(text):
+    engines = [x.strip() for x in text.split(',') if x.strip()]
+    unknown = [engine for engine in engines if engine not in PARSER_ENGINES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f'사용할 수 없는 파서 엔진: {", ".join(unknown)} (사용 가능: {", ".join(PARSER_ENGINES)})')
+    return engines
+
+def _float_list(text):
+    return [float(x) for x in text.split(',') if x.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='파싱/계산/표시 단계별 벤치마크')
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',') if x.strip()], default=DEFAULT_SIZES,
+                        help='요금 행 수 목록 (기본값: 10,100,1000,10000)')
+    parser.add_argument('--layouts', type=lambda s: s.split(','), default=list(LAYOUTS), help='spa,tour')
+    parser.add_argument('--repeat', type=int, default=3, help='단계별 반복 횟수 (최솟값/중앙값 기록)')
+    parser.add_argument('--commission', type=_float_list, default=DEFAULT_COMMISSION_RATES, help='수수료 목록 (예: 6.6,10,11)')
+    parser.add_argument('--exchange-rate', type=float, default=DEFAULT_EXCHANGE_RATE)
+    parser.add_argument('--discount', type=float, default=DEFAULT_DISCOUNT_RATE)
+    parser.add_argument('--engines', type=_engine_list, default=[], help='엔진별 파싱도 측정 (예: regex,html.parser,lxml)')
+    parser.add_argument('-o', '--output', default='bench_results.json', help='결과 JSON 경로')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON 경로')
+    args = parser.parse_args(argv)
+    
+    results = []
+    for layout in args.layouts:
+        for rows in args.sizes:
+            case_results = run_case(layout, rows, args.repeat, args.commission, args.exchange_rate, args.discount, args.engines)
+            for r in case_results:
+                print(f"{r['layout']:<6} {r['rows']:>7} {r['stage']:<18} {r['min_s'] * 1000:>10.2f} ms", flush=True)
+            results.extend(case_results)
+    
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'commission_rates': args.commission,
+            'exchange_rate': args.exchange_rate,
+            'discount_rate': args.discount,
+            'engines': args.engines
+        },
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'결과 저장: {args.output}')
+    
+    if args.engines:
+        print(fastest_engines(results))
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(results, json.load(f)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""가격 계산 HTTP 서비스 처리량 벤치마크 - 서비스를 빈 포트로 띄우고 동시 클라이언트 수별로 요청/초와 지연 시간 측정
+
+생성한 요금 페이지 하나를 /price/html로 반복 요청하며, 동시 클라이언트 수를 늘려도 처리량이 작업자 수만큼
+늘어나는지(요청끼리 막지 않는지) 확인합니다.
+
+저장소 루트에서 실행:
+    python -m benchmarks.service_throughput --rows 1000 --requests 200 --concurrency 1,4,16
+    python -m benchmarks.service_throughput --workers 4 --format arrow -o service_bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.rate_page_generator import LAYOUTS, generate_rate_page
+from pricing_service import ARROW_CONTENT_TYPE, create_server
+
+DEFAULT_CONCURRENCY = [1, 2, 4, 8]
+DEFAULT_COMMISSION_RATES = [6.6, 10, 11]
+DEFAULT_EXCHANGE_RATE = 38.5
+
+def _post(url, body, headers):
+    """요청 하나를 보내고 (상태 코드, 초 단위 지연 시간) 반환"""
+    request = urllib.request.Request(url, data=body, headers=headers, method='POST')
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    return status, time.perf_counter() - start
+
+def run_level(url, body, headers, concurrency, requests):
+    """동시 클라이언트 concurrency개로 requests개 요청 - 처리량과 지연 시간 요약 반환"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: _post(url, body, headers), range(requests)))
+    elapsed = time.perf_counter() - start
+    
+    latencies = sorted(latency for status, latency in results if status == 200)
+    statuses = Counter(status for status, _ in results)
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'ok': statuses.get(200, 0),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'elapsed_s': elapsed,
+        'requests_per_s': statuses.get(200, 0) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else None,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else None
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='가격 계산 HTTP 서비스 처리량 벤치마크')
+    parser.add_argument('--layout', choices=LAYOUTS, default='tour', help='요금 페이지 레이아웃 (기본값: tour)')
+    parser.add_argument('--rows', type=int, default=1000, help='요청 하나의 요금 행 수 (기본값: 1000)')
+    parser.add_argument('--requests', type=int, default=100, help='동시 클라이언트 수별 요청 수 (기본값: 100)')
+    parser.add_argument('--concurrency', type=lambda s: [int(x) for x in s.split(',') if x.strip()], default=DEFAULT_CONCURRENCY,
+                        help='동시 클라이언트 수 목록 (기본값: 1,2,4,8)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='서비스 작업자 프로세스 수 (기본값: CPU 수)')
+    parser.add_argument('--format', choices=['json', 'arrow'], default='json', help='응답 형식 (기본값: json)')
+    parser.add_argument('-o', '--output', help='결과 JSON 경로 (선택)')
+    args = parser.parse_args(argv)
+    
+    # 대기열 한도에 걸리지 않도록 최대 동시 클라이언트 수만큼 허용
+    server = create_server(port=0, quiet=True, workers=args.workers, max_pending=max(args.concurrency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    url = f'http://{host}:{port}/price/html'
+    
+    body = json.dumps({
+        'html': generate_rate_page(args.layout, args.rows, seed=1),
+        'commission_rates': DEFAULT_COMMISSION_RATES,
+        'exchange_rate': DEFAULT_EXCHANGE_RATE
+    }).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    if args.format == 'arrow':
+        headers['Accept'] = ARROW_CONTENT_TYPE
+    print(f'{args.layout} {args.rows}행 요청 ({len(body) / 1024:,.0f} KB), 작업자 {server.service.workers}개, 응답 {args.format}')
+    
+    try:
+        # 작업자 프로세스 시작과 모듈 import 비용은 측정에서 제외
+        run_level(url, body, headers, server.service.workers, server.service.workers * 2)
+        results = []
+        for concurrency in args.concurrency:
+            result = run_level(url, body, headers, concurrency, args.requests)
+            p50 = f"{result['p50_ms']:>9.1f}" if result['p50_ms'] is not None else f"{'-':>9}"
+            p95 = f"{result['p95_ms']:>9.1f}" if result['p95_ms'] is not None else f"{'-':>9}"
+            print(f"동시 {concurrency:>3}  {result['requests_per_s']:>8.1f} req/s  p50 {p50} ms  p95 {p95} ms  "
+                  f"상태 {result['statuses']}", flush=True)
+            results.append(result)
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.service.shutdown()
+    
+    if args.output:
+        report = {
+            'meta': {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'layout': args.layout,
+                'rows': args.rows,
+                'workers': server.service.workers,
+                'format': args.format,
+                'request_bytes': len(body)
+            },
+            'results': results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'결과 저장: {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+"""Streamlit 앱 동시 세션 부하 테스트 - 앱을 헤드리스 서버로 띄우고 세션 N개가 동시에 붙여넣기 → 계산하기 → 적용 → Clear 반복
+
+각 세션은 브라우저처럼 웹소켓(/_stcore/stream)으로 현재 위젯 값을 모두 담은 재실행 요청(BackMsg)을 보내고,
+스크립트 실행 완료 메시지(script_finished)를 받을 때까지를 재실행 지연 시간으로 잽니다. 적용(설정 변경)은 브라우저와
+같이 결과 영역 프래그먼트만 다시 실행합니다. AppTest는 실행할 때마다 전역 런타임을 바꿔 끼워 한 프로세스에서
+세션을 동시에 실행할 수 없으므로 실제 서버를 띄웁니다 (서버 프로세스 하나를 세션들이 공유하는 운영 환경과 같음).
+
+앱(과 핵심 모듈)은 임시 폴더에 복사해 실행하므로 요금표 저장소(rate_store.sqlite3)는 매번 빈 상태로 시작하고, 세션마다 다른 요금
+페이지를 붙여넣어 공유 결과 캐시에 맞지 않게 합니다 (--shared-page면 모든 세션이 같은 페이지).
+세션당 메모리는 서버 프로세스 RSS(/proc, Linux)로, 모든 세션이 계산을 마친 시점과 세션 연결 전의 차이를 세션 수로 나눈 값입니다.
+
+저장소 루트에서 실행:
+    python -m benchmarks.session_load --sessions 1,4,8 --rows 2000
+    python -m benchmarks.session_load --sessions 16 --rows 20000 --iterations 3 -o session_load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+import app_markup_calculator
+import markup_calculator
+from benchmarks.rate_page_generator import LAYOUTS, generate_rate_page
+from benchmarks.rerun_latency import DEFAULT_SETTINGS, INTERACTIONS
+
+DEFAULT_SESSIONS = [1, 4, 8]
+SERVER_START_TIMEOUT = 60
+RERUN_TIMEOUT = 600
+STEPS = ['load', 'calculate', 'apply', 'clear']
+PERCENTILES = [50, 95, 99]
+# 서버용 임시 폴더에 복사할 모듈 (앱이 import하는 핵심 모듈 포함)
+APP_MODULES = [app_markup_calculator, markup_calculator]
+
+# 입력 위젯 키 - 위젯 id는 '$$ID-<해시>-<키>' 형식이라 키로 찾음 (HTML 입력은 Clear할 때마다 키 번호가 바뀌므로 접두어)
+HTML_INPUT_KEY = 'html_input_value_'
+SUBMIT_KEY = 'FormSubmitter:rate_input_form-'
+CLEAR_KEY = 'clear_button'
+# 계산 결과가 그려졌는지는 결과 테이블 제목으로 확인
+RESULT_HEADING = '### 결과 테이블'
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _rss_bytes(pid):
+    """프로세스의 현재 RSS 바이트 수 (/proc이 없으면 None)"""
+    try:
+        with open(f'/proc/{pid}/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+class PeakRss:
+    """백그라운드 스레드로 프로세스 RSS를 주기적으로 재서 최댓값 기록"""
+    
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            rss = _rss_bytes(self.pid)
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            self._stop.wait(self.interval)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def _server_log(log_path):
+    """서버 로그 파일 내용 (시작 실패 메시지용)"""
+    with open(log_path, 'rb') as f:
+        return f.read().decode('utf-8', 'replace').strip()
+
+def start_app_server(app_dir, port):
+    """app_dir의 앱을 헤드리스 Streamlit 서버로 띄우고 상태 확인(/_stcore/health)이 응답하면 Popen 반환
+    
+    서버 stderr는 app_dir의 server.log 파일로 보냅니다 - 실행 중에는 단계 프로파일 로그가 계속 쌓이므로, 파이프로 받고
+    읽지 않으면 파이프 버퍼가 차서 서버가 멈춥니다.
+    """
+    command = [
+        sys.executable, '-m', 'streamlit', 'run', os.path.join(app_dir, os.path.basename(app_markup_calculator.__file__)),
+        '--server.headless', 'true',
+        '--server.address', '127.0.0.1',
+        '--server.port', str(port),
+        '--server.fileWatcherType', 'none',
+        '--browser.gatherUsageStats', 'false'
+    ]
+    log_path = os.path.join(app_dir, 'server.log')
+    with open(log_path, 'wb') as log:
+        server = subprocess.Popen(command, cwd=app_dir, stdout=subprocess.DEVNULL, stderr=log)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'앱 서버가 시작되지 않았습니다: {_server_log(log_path)}')
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'앱 서버가 {SERVER_START_TIMEOUT}초 안에 응답하지 않았습니다.')
+
+def stop_app_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+class AppSession:
+    """웹소켓 연결 하나로 앱 세션 하나를 흉내 - 브라우저처럼 현재 위젯 값을 모두 보내 재실행을 요청하고 단계별 지연 시간 기록"""
+    
+    def __init__(self, url):
+        self.url = url
+        self.widgets = {}  # 위젯 키 -> (위젯 id, 프래그먼트 id)
+        self.values = {}   # 위젯 id -> WidgetState (트리거 값은 보관하지 않음)
+        self.timings = defaultdict(list)
+        self.has_result = False
+        self._ws = None
+    
+    async def connect(self):
+        self._ws = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+    
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+    
+    def widget(self, key_prefix):
+        """키가 key_prefix로 시작하는 위젯의 (위젯 id, 프래그먼트 id) - 마지막 실행에 없으면 RuntimeError"""
+        for key, widget in self.widgets.items():
+            if key.startswith(key_prefix):
+                return widget
+        raise RuntimeError(f'위젯을 찾을 수 없습니다: {key_prefix}')
+    
+    def set_text(self, key_prefix, value):
+        widget_id, _ = self.widget(key_prefix)
+        self.values[widget_id] = WidgetState(id=widget_id, string_value=value)
+    
+    async def rerun(self, step, trigger=None, fragment_id=''):
+        """위젯 값(과 버튼 트리거)을 보내 재실행하고 실행이 끝날 때까지 받은 메시지 처리 - 지연 시간은 step에 기록"""
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.page_script_hash = ''
+        client_state.fragment_id = fragment_id
+        client_state.widget_states.widgets.extend(self.values.values())
+        if trigger is not None:
+            client_state.widget_states.widgets.append(WidgetState(id=self.widget(trigger)[0], trigger_value=True))
+        
+        seen = set()
+        errors = []
+        start = time.perf_counter()
+        await self._ws.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(self._ws.recv(), RERUN_TIMEOUT))
+            kind = forward.WhichOneof('type')
+            if kind == 'script_finished':
+                break
+            if kind != 'delta' or forward.delta.WhichOneof('type') != 'new_element':
+                continue
+            element = forward.delta.new_element
+            element_type = element.WhichOneof('type')
+            if element_type == 'exception':
+                errors.append(element.exception.message)
+            elif element_type == 'markdown' and element.markdown.body.startswith(RESULT_HEADING):
+                self.has_result = True
+            proto = getattr(element, element_type)
+            widget_id = getattr(proto, 'id', '')
+            if widget_id.startswith('$$ID-'):
+                self.widgets[widget_id.split('-', 2)[2]] = (widget_id, forward.delta.fragment_id)
+                seen.add(widget_id)
+                # 콜백이 세션 상태로 바꾼 입력값은 브라우저처럼 받은 값으로 갱신
+                if element_type == 'text_input' and proto.set_value:
+                    self.values[widget_id] = WidgetState(id=widget_id, string_value=proto.value)
+        self.timings[step].append(time.perf_counter() - start)
+        if errors:
+            raise RuntimeError(f'앱 실행 오류 ({step}): {errors[0]}')
+        if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+            raise RuntimeError(f'앱 스크립트 컴파일 오류 ({step})')
+        if not fragment_id:
+            # 앱 전체 실행에서 그려지지 않은 위젯(Clear로 키가 바뀐 HTML 입력 등)은 브라우저처럼 더 이상 보내지 않음
+            self.widgets = {key: widget for key, widget in self.widgets.items() if widget[0] in seen}
+            self.values = {widget_id: state for widget_id, state in self.values.items() if widget_id in seen}
+    
+    async def load(self):
+        await self.rerun('load')
+        for key, value in DEFAULT_SETTINGS.items():
+            self.set_text(key, value)
+    
+    async def calculate(self, html_content):
+        """붙여넣기 → 계산하기 (앱 전체 재실행)"""
+        self.has_result = False
+        self.set_text(HTML_INPUT_KEY, html_content)
+        await self.rerun('calculate', trigger=SUBMIT_KEY)
+        if not self.has_result:
+            raise RuntimeError('요금 페이지 파싱에 실패했습니다.')
+    
+    async def apply(self, edit):
+        """설정 하나 변경 (결과 영역 프래그먼트만 재실행) - edit번째 변경은 INTERACTIONS를 차례로 돌며 다른 값을 넣음"""
+        _, key, value_for = INTERACTIONS[edit % len(INTERACTIONS)]
+        self.set_text(key, value_for(edit))
+        await self.rerun('apply', fragment_id=self.widget(key)[1])
+    
+    async def clear(self):
+        await self.rerun('clear', trigger=CLEAR_KEY)
+
+def _percentile(sorted_values, q):
+    """정렬된 값 목록의 q 백분위수 (nearest-rank)"""
+    return sorted_values[max(0, math.ceil(len(sorted_values) * q / 100) - 1)]
+
+def summarize_latencies(values):
+    """초 단위 지연 시간 목록 -> 횟수와 p50/p95/p99/최대 ms dict"""
+    values = sorted(values)
+    summary = {'count': len(values)}
+    for q in PERCENTILES:
+        summary[f'p{q}_ms'] = _percentile(values, q) * 1000 if values else None
+    summary['max_ms'] = values[-1] * 1000 if values else None
+    return summary
+
+async def _run_sessions(url, pages, iterations, edits, on_loaded):
+    """세션 len(pages)개를 동시에 실행 - 반복마다 모든 세션이 계산하기/적용을 마치면 on_loaded(반복 번호) 호출 후 Clear"""
+    sessions = [AppSession(url) for _ in pages]
+    try:
+        await asyncio.gather(*(session.connect() for session in sessions))
+        await asyncio.gather(*(session.load() for session in sessions))
+        
+        async def work(session, html_content):
+            await session.calculate(html_content)
+            for edit in range(edits):
+                await session.apply(edit)
+        
+        for iteration in range(iterations):
+            await asyncio.gather(*(work(session, page) for session, page in zip(sessions, pages)))
+            on_loaded(iteration)
+            await asyncio.gather(*(session.clear() for session in sessions))
+    finally:
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+    
+    timings = defaultdict(list)
+    for session in sessions:
+        for step, values in session.timings.items():
+            timings[step].extend(values)
+    return timings
+
+def run_level(app_dir, pages, iterations, edits, warmup_page):
+    """앱 서버를 새로 띄워 세션 len(pages)개로 부하 테스트 - 단계별 지연 시간 요약과 서버 메모리 반환"""
+    port = _free_port()
+    url = f'ws://127.0.0.1:{port}/_stcore/stream'
+    server = start_app_server(app_dir, port)
+    try:
+        # 모듈 import와 첫 실행 비용은 측정에서 제외 (작은 페이지로 한 바퀴)
+        asyncio.run(_run_sessions(url, [warmup_page], 1, 1, lambda _: None))
+        baseline = _rss_bytes(server.pid)
+        loaded = []
+        start = time.perf_counter()
+        with PeakRss(server.pid) as peak:
+            timings = asyncio.run(_run_sessions(url, pages, iterations, edits, lambda _: loaded.append(_rss_bytes(server.pid))))
+        elapsed = time.perf_counter() - start
+        after_clear = _rss_bytes(server.pid)
+    finally:
+        stop_app_server(server)
+    
+    loaded_rss = max(loaded) if None not in loaded else None
+    return {
+        'sessions': len(pages),
+        'elapsed_s': elapsed,
+        'steps': {step: summarize_latencies(timings[step]) for step in STEPS},
+        'all_reruns': summarize_latencies([value for step in STEPS for value in timings[step]]),
+        'rss_baseline_bytes': baseline,
+        'rss_loaded_bytes': loaded_rss,
+        'rss_peak_bytes': peak.peak,
+        'rss_after_clear_bytes': after_clear,
+        'per_session_bytes': (loaded_rss - baseline) / len(pages) if loaded_rss is not None and baseline is not None else None
+    }
+
+def _mb(value):
+    return f'{value / (1024 * 1024):,.1f}' if value is not None else '-'
+
+def _ms(value):
+    return f'{value:,.0f}' if value is not None else '-'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Streamlit 앱 동시 세션 부하 테스트 (붙여넣기 → 계산하기 → 적용 → Clear)')
+    parser.add_argument('--layout', choices=LAYOUTS, default='spa', help='요금 페이지 레이아웃 (기본값: spa)')
+    parser.add_argument('--rows', type=int, default=2000, help='세션별 요금 행 수 (기본값: 2000)')
+    parser.add_argument('--sessions', type=lambda s: [int(x) for x in s.split(',') if x.strip()], default=DEFAULT_SESSIONS,
+                        help='동시 세션 수 목록 - 수마다 서버를 새로 띄움 (기본값: 1,4,8)')
+    parser.add_argument('--iterations', type=int, default=2, help='세션별 붙여넣기 → Clear 반복 횟수 (기본값: 2)')
+    parser.add_argument('--edits', type=int, default=3, help='계산하기 후 적용(설정 변경) 횟수 (기본값: 3)')
+    parser.add_argument('--shared-page', action='store_true', help='모든 세션이 같은 요금 페이지를 붙여넣음 (공유 캐시 사용)')
+    parser.add_argument('-o', '--output', help='결과 JSON 경로 (선택)')
+    args = parser.parse_args(argv)
+    
+    pages = [generate_rate_page(args.layout, args.rows, seed=1 if args.shared_page else seed + 1) for seed in range(max(args.sessions))]
+    warmup_page = generate_rate_page(args.layout, min(args.rows, 100), seed=0)
+    page_bytes = len(pages[0].encode('utf-8'))
+    print(f'{args.layout} {args.rows}행 (HTML {page_bytes / 1024:,.0f} KB), 반복 {args.iterations}회, 적용 {args.edits}회'
+          f"{', 같은 페이지' if args.shared_page else ''}")
+    
+    results = []
+    with tempfile.TemporaryDirectory() as app_dir:
+        for module in APP_MODULES:
+            shutil.copy2(module.__file__, app_dir)
+        for sessions in args.sessions:
+            result = run_level(app_dir, pages[:sessions], args.iterations, args.edits, warmup_page)
+            # 다음 세션 수는 빈 저장소에서 시작
+            for name in os.listdir(app_dir):
+                if name.startswith('rate_store.sqlite3'):
+                    os.remove(os.path.join(app_dir, name))
+            results.append(result)
+            print(f'동시 세션 {sessions}개 ({result["elapsed_s"]:.1f}초) - 서버 RSS 시작 {_mb(result["rss_baseline_bytes"])} MB, '
+                  f'계산 후 {_mb(result["rss_loaded_bytes"])} MB, 최대 {_mb(result["rss_peak_bytes"])} MB, '
+                  f'세션당 {_mb(result["per_session_bytes"])} MB')
+            print(f"  {'단계':<10} {'횟수':>5} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'최대(ms)':>9}")
+            for step, summary in [*result['steps'].items(), ('전체', result['all_reruns'])]:
+                print(f"  {step:<10} {summary['count']:>5} {_ms(summary['p50_ms']):>9} {_ms(summary['p95_ms']):>9} "
+                      f"{_ms(summary['p99_ms']):>9} {_ms(summary['max_ms']):>9}", flush=True)
+    
+    if args.output:
+        report = {
+            'meta': {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'layout': args.layout,
+                'rows': args.rows,
+                'iterations': args.iterations,
+                'edits': args.edits,
+                'shared_page': args.shared_page,
+                'html_bytes': page_bytes
+            },
+            'results': results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'결과 저장: {args.output}')
+
+if __name__ == '__main__':
+    main()
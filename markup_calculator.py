@@ -0,0 +1,2168 @@
+"""API 프로모션 마크업 계산 핵심 모듈 - 요금 페이지 파싱, 가격 계산, 변경 전후 비교/시뮬레이션, 내보내기, 결과 캐시, 요금표 저장소
+
+Streamlit 앱(app_markup_calculator.py), 일괄 계산 CLI(batch_markup_calculator.py), HTTP 서비스(pricing_service.py)가
+함께 쓰는 로직으로, Streamlit을 import하지 않고 import할 때 화면 설정 같은 부수 효과가 없습니다.
+pandas/numpy와 선택 의존성(lxml, xlsxwriter)은 처음 쓸 때 import하므로, 설정값 파싱만 하는 스크립트나
+작업자 프로세스는 import 비용을 거의 내지 않습니다 (python -m benchmarks.import_time으로 측정).
+"""
+import re
+import codecs
+import gzip
+import hashlib
+import importlib
+import importlib.util
+import io
+import mmap
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import json
+import logging
+import math
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from html import unescape as html_unescape
+from html.parser import HTMLParser
+from datetime import datetime
+
+class _LazyModule:
+    """처음 속성을 읽을 때 모듈을 import하는 대리 객체 - import한 뒤에는 이 모듈의 전역 이름을 실제 모듈로 바꿔 이후 접근은 비용 없음"""
+    
+    def __init__(self, name, alias):
+        self._name = name
+        self._alias = alias
+    
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+# pandas/numpy는 import 시간의 대부분을 차지하므로 파싱 결과 테이블/가격 계산에서 처음 쓸 때 import
+pd = _LazyModule('pandas', 'pd')
+np = _LazyModule('numpy', 'np')
+
+# 멀티레벨 헤더 테이블 CSS 및 테이블 시작 태그 - 선택 가능하고 셀 사이즈 조절 가능한 테이블
+_MULTI_LEVEL_TABLE_START = """
+    <style>
+    .multi-header-table {
+        width: 100%;
+        border-collapse: separate;
+        border-spacing: 0;
+        font-size: 0.875rem;
+        margin: 1rem 0;
+        user-select: text;
+        -webkit-user-select: text;
+        -moz-user-select: text;
+        -ms-user-select: text;
+    }
+    .multi-header-table th {
+        background-color: #f3f4f6;
+        border: 1px solid #d1d5db;
+        padding: 0.5rem;
+        text-align: center;
+        font-weight: 600;
+        position: sticky;
+        top: 0;
+        z-index: 10;
+    }
+    .multi-header-table td {
+        border: 1px solid #d1d5db;
+        padding: 0.5rem;
+        text-align: right;
+        user-select: text;
+        -webkit-user-select: text;
+        -moz-user-select: text;
+        -ms-user-select: text;
+    }
+    .multi-header-table td:first-child,
+    .multi-header-table td:nth-child(2),
+    .multi-header-table td:nth-child(3),
+    .multi-header-table td:nth-child(4),
+    .multi-header-table td:nth-child(5),
+    .multi-header-table td:nth-child(6),
+    .multi-header-table td:nth-child(7) {
+        text-align: left;
+    }
+    .header-top {
+        background-color: #e5e7eb !important;
+        font-weight: 700;
+    }
+    .markup-red {
+        background-color: #fee2e2;
+        color: #dc2626;
+        font-weight: bold;
+    }
+    .margin-red {
+        background-color: #fee2e2;
+        color: #dc2626;
+        font-weight: bold;
+    }
+    /* 마진이 마이너스인 행 전체 하이라이트 */
+    .margin-red-row {
+        background-color: #fee2e2 !important;
+    }
+    .margin-red-row td {
+        background-color: #fee2e2 !important;
+        color: #dc2626 !important;
+        font-weight: bold !important;
+    }
+    /* 수수료 그룹별 구분선 - 검은색 적당한 두께 */
+    .group-divider-left {
+        border-left: 2px solid #000000 !important;
+    }
+    .group-divider-right {
+        border-right: 2px solid #000000 !important;
+    }
+    .group-divider-top {
+        border-top: 2px solid #000000 !important;
+    }
+    </style>
+    <div style="overflow-x: auto; overflow-y: auto; max-height: 800px;">
+    <table class="multi-header-table">
+    """
+
+# 수수료별 컬럼명 접두어 -> 두 번째 헤더 행 표시명
+_MULTI_LEVEL_COLUMN_LABELS = [
+    ('마크업_', '마크업'),
+    ('최종세일가(바트)_', '세일가(바트)'),
+    ('(원)세일가_', '세일가(원)'),
+    ('최종판매가_', '최종판매가'),
+    ('공급가_', '공급가'),
+    ('마진_', '마진(원)')
+]
+
+def _multi_level_layout(columns, has_exchange_rate, commission_rates):
+    """멀티레벨 테이블 레이아웃을 한 번만 계산 - (컬럼 목록, 그룹 헤더 [(제목, colspan, class)], 컬럼별 (표시명, 구분선 class))"""
+    # 커미션별 컬럼 정의 (동적으로 생성)
+    commission_cols_dict = {}
+    for comm_rate in commission_rates:
+        comm_rate_str = str(comm_rate).replace('.', '_')
+        if has_exchange_rate:
+            commission_cols_dict[comm_rate] = [
+                f'마크업_{comm_rate_str}', 
+                f'최종세일가(바트)_{comm_rate_str}%', 
+                f'(원)세일가_{comm_rate_str}%',
+                f'최종판매가_{comm_rate_str}%', 
+                f'공급가_{comm_rate_str}%', 
+                f'마진_{comm_rate_str}%(원화)'
+            ]
+        else:
+            commission_cols_dict[comm_rate] = [
+                f'마크업_{comm_rate_str}', 
+                f'최종세일가(바트)_{comm_rate_str}%'
+            ]
+    
+    # 존재하는 컬럼만 그룹 순서대로 배치
+    available = set(columns)
+    groups = [('기본 정보', [col for col in _BASE_COLUMNS if col in available], 'header-top')]
+    for comm_rate, cols in commission_cols_dict.items():
+        groups.append((f'수수료 {comm_rate}%', [col for col in cols if col in available], 'header-top group-divider-left'))
+    
+    existing_cols = []
+    group_headers = []
+    column_info = []
+    for group_idx, (title, cols, header_class) in enumerate(groups):
+        if not cols:
+            continue
+        group_headers.append((title, len(cols), header_class))
+        for idx, col in enumerate(cols):
+            # 그룹별 구분선: 기본 정보는 마지막 컬럼 오른쪽, 수수료 그룹은 첫 컬럼 왼쪽/마지막 컬럼 오른쪽
+            if group_idx == 0:
+                divider = 'group-divider-right' if idx == len(cols) - 1 else ''
+            else:
+                divider = 'group-divider-left' if idx == 0 else ('group-divider-right' if idx == len(cols) - 1 else '')
+            
+            label = col
+            if group_idx > 0:
+                for prefix, prefix_label in _MULTI_LEVEL_COLUMN_LABELS:
+                    if col.startswith(prefix):
+                        label = prefix_label
+                        break
+            
+            existing_cols.append(col)
+            column_info.append((label, divider))
+    
+    return existing_cols, group_headers, column_info
+
+# 수수료 그룹 헤더 표의 페이지당 행 수 선택지
+MULTI_LEVEL_PAGE_SIZES = [100, 500, 1000]
+
+def create_multi_level_table(df, has_exchange_rate, commission_rates, page=0, page_size=None):
+    """멀티레벨 헤더를 가진 HTML 테이블 생성 - 동적 수수료 지원
+    
+    page_size를 지정하면 page번째(0부터) page_size개 행만 렌더링합니다.
+    숫자형 df에서 렌더링할 행만 표시 형식 문자열로 변환합니다.
+    """
+    existing_cols, group_headers, column_info = _multi_level_layout(df.columns, has_exchange_rate, commission_rates)
+    
+    # 렌더링할 행 범위
+    start = page * page_size if page_size else 0
+    stop = min(start + page_size, len(df)) if page_size else len(df)
+    
+    # 마진 음수 행 / 마크업 > 0 셀 (숫자형 df 기준)
+    page_df = df.iloc[start:stop]
+    col_positions = [df.columns.get_loc(col) for col in existing_cols]
+    negative_rows, markup_cells = highlight_masks(page_df)
+    markup_cells = markup_cells[:, col_positions]
+    values = format_display_values(page_df[existing_cols])
+    
+    # 셀 시작 태그를 컬럼별로 미리 생성 (기본 / 마크업 빨간색)
+    td_plain = [f'<td class="{divider}">' for _, divider in column_info]
+    td_markup = [f'<td class="{"markup-red " + divider if divider else "markup-red"}">' for _, divider in column_info]
+    
+    parts = [_MULTI_LEVEL_TABLE_START]
+    
+    # 첫 번째 헤더 행 (커미션 그룹)
+    parts.append('<thead><tr>')
+    parts.extend(f'<th colspan="{span}" class="{header_class}">{title}</th>' for title, span, header_class in group_headers)
+    
+    # 두 번째 헤더 행 (개별 컬럼명) - 그룹별 구분선 추가
+    parts.append('</tr><tr>')
+    parts.extend(f'<th class="{divider}">{label}</th>' for label, divider in column_info)
+    parts.append('</tr></thead><tbody>')
+    
+    # 데이터 행 - 마진이 마이너스면 행 전체 하이라이트, 아니면 마크업 > 0인 셀만 빨간색
+    for row_values, negative, markup_row in zip(values, negative_rows, markup_cells):
+        if negative:
+            parts.append('<tr class="margin-red-row">')
+            parts.extend(f'{td}{value}</td>' for td, value in zip(td_plain, row_values))
+        else:
+            parts.append('<tr>')
+            parts.extend(f'{td_markup[i] if markup_row[i] else td_plain[i]}{value}</td>' for i, value in enumerate(row_values))
+        parts.append('</tr>')
+    
+    parts.append('</tbody></table></div>')
+    return ''.join(parts)
+
+# 앱 로그 (저장소 오류 등) - 앱에서 분리하기 전과 같은 이름 유지 (로그 설정 호환)
+logger = logging.getLogger('app_markup_calculator')
+
+# 단계별 프로파일 로그 - 한 줄에 JSON 레코드 하나 (세션 간 집계용)
+PROFILE_LOGGER_NAME = 'app_markup_calculator.profile'
+profile_logger = logging.getLogger(PROFILE_LOGGER_NAME)
+
+def configure_profile_logging():
+    """프로파일 로그를 메시지만 한 줄씩 표준 오류로 출력하도록 설정 - 앱 main()에서 호출 (여러 번 호출해도 핸들러는 하나)
+    
+    import할 때는 핸들러를 붙이지 않으므로, 설정하지 않은 프로세스(CLI, 서비스, 테스트)에는 INFO 레코드가 출력되지 않습니다.
+    """
+    if profile_logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    profile_logger.addHandler(handler)
+    profile_logger.setLevel(logging.INFO)
+    profile_logger.propagate = False
+
+class StageProfiler:
+    """계산 파이프라인 단계별 실행 시간, 행/열 수, (선택) tracemalloc 최대 메모리를 기록
+    
+    `with profiler.stage('pricing') as info:` 블록 안에서 info에 rows/cols 등을 채우면 레코드에 함께 남습니다.
+    단계는 중첩할 수 있으며, 바깥 단계의 최대 메모리에는 안쪽 단계의 최대값도 포함됩니다.
+    """
+    
+    def __init__(self, session_id='', trace_memory=False):
+        self.session_id = session_id
+        self.trace_memory = trace_memory
+        self.records = []
+        self._peak_stack = []
+    
+    @contextmanager
+    def stage(self, name):
+        info = {}
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peak_stack:
+                # reset_peak 전에 바깥 단계의 최대값을 보존
+                self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+            tracemalloc.reset_peak()
+            self._peak_stack.append(current)
+            base_memory = current
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            record = {'stage': name, 'wall_ms': round((time.perf_counter() - start) * 1000, 3)}
+            record.update(info)
+            if self.trace_memory:
+                peak = self._peak_stack.pop()
+                if tracemalloc.is_tracing():
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                    record['peak_kb'] = round((peak - base_memory) / 1024, 1)
+                if self._peak_stack:
+                    self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+            self.records.append(record)
+            self._log(record)
+    
+    def _log(self, record):
+        profile_logger.info(json.dumps({
+            'event': 'stage_profile',
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'session': self.session_id,
+            **record
+        }, ensure_ascii=False))
+
+def _profile_stage(profiler, name):
+    """profiler가 없으면 아무것도 기록하지 않는 단계 컨텍스트"""
+    return profiler.stage(name) if profiler is not None else nullcontext({})
+
+# 문서 헤더 패턴 (사전 컴파일)
+_PERIOD_PATTERN = re.compile(r'value="(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})~(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})"')
+_RATE_ID_PATTERN = re.compile(r'name="tour_rate\.id"\s+value="(\d+)"')
+_SUPPLIER_PATTERN = re.compile(r'id="autoCompleteSupplier_\d+_\d+"[^>]*>([^<]+)</textarea>')
+
+# 레이아웃별 블록 시작/종료 태그
+_SPA_BLOCK_OPEN = '<tbody child-root="tour_rate.rateJson">'
+_SPA_BLOCK_CLOSE = '</tbody>'
+_TOUR_BLOCK_OPEN = '<tr child-root="tour_rate.rateJson">'
+_TOUR_BLOCK_CLOSE = '</tr>'
+
+# 블록 내부 패턴 - name/value 필드는 한 번의 스캔으로 모두 수집
+_FIELD_PATTERN = re.compile(r'name="([^"]+)"[^>]*value="(\d+)"')
+_PROGRAM_ID_PATTERN = re.compile(r'<input type="hidden" name="program_id" value="(\d+)"')
+_PROGRAM_NAME_PATTERN = re.compile(r'<b>([^<]+)</b>')
+
+# 바이트 버퍼 문서용 패턴 캐시 (str 패턴 -> 같은 식의 bytes 패턴)
+_BYTES_PATTERNS = {}
+
+def _search_document(pattern, document):
+    """문서(str 또는 bytes/mmap 바이트 버퍼)에서 pattern의 첫 매치 그룹 튜플 (없으면 None) - 바이트 버퍼는 매치된 값만 디코딩"""
+    if isinstance(document, str):
+        match = pattern.search(document)
+        return match.groups() if match else None
+    bytes_pattern = _BYTES_PATTERNS.get(pattern)
+    if bytes_pattern is None:
+        bytes_pattern = _BYTES_PATTERNS[pattern] = re.compile(pattern.pattern.encode('ascii'))
+    match = bytes_pattern.search(document)
+    return tuple(group.decode('utf-8', errors='replace') for group in match.groups()) if match else None
+
+def _decode(data):
+    """바이트 버퍼 구간을 str로 디코딩 (잘못된 UTF-8은 대체 문자, 붙여넣기/파일 읽기와 같은 규칙)"""
+    return data.decode('utf-8', errors='replace')
+
+def _clean_text(raw):
+    """태그 사이 텍스트의 문자 참조(&amp; 등)를 풀고 앞뒤 공백 제거 - 모든 파서 엔진이 같은 값을 내도록 통일"""
+    return html_unescape(raw).strip() if '&' in raw else raw.strip()
+
+def _iter_blocks(html_content, open_tag, close_tag):
+    """(앞 블록 끝부터 open_tag 전까지의 구간, open_tag 다음부터 가장 가까운 close_tag 전까지의 블록 내용)을 순서대로 반환"""
+    pos = 0
+    while True:
+        start = html_content.find(open_tag, pos)
+        if start < 0:
+            return
+        content_start = start + len(open_tag)
+        end = html_content.find(close_tag, content_start)
+        if end < 0:
+            return
+        yield html_content[pos:start], html_content[content_start:end]
+        pos = end + len(close_tag)
+
+def _scan_header(text, header):
+    """text에서 rate_id/기간/공급사 마커를 찾아 header를 갱신 (여러 개면 마지막 값 = 뒤따르는 블록에 가장 가까운 시트 헤더)
+    
+    블록 사이 구간은 대부분 마커가 없는 짧은 문자열이므로 고정 문자열 확인 후에만 정규식을 실행합니다.
+    """
+    if 'tour_rate.id' in text:
+        for rate_id_match in _RATE_ID_PATTERN.finditer(text):
+            header['rate_id'] = rate_id_match.group(1)
+    if '~' in text:
+        for period_match in _PERIOD_PATTERN.finditer(text):
+            header['period'] = (period_match.group(1).split(' ')[0], period_match.group(2).split(' ')[0])
+    if 'autoCompleteSupplier_' in text:
+        for supplier_match in _SUPPLIER_PATTERN.finditer(text):
+            header['supplier'] = _clean_text(supplier_match.group(1))
+
+def _scan_fields(row, spa=False):
+    """행을 한 번 스캔하여 name="..." value="숫자" 쌍을 필드 맵으로 수집 (같은 이름은 처음 값 사용)
+    
+    SPA 구조는 `rate.N.` 접두어가 붙은 필드만 접두어를 뗀 이름으로 수집합니다.
+    """
+    fields = {}
+    for name, value in _FIELD_PATTERN.findall(row):
+        if spa:
+            # _spa_field_name과 같은 규칙 (행마다 호출되는 경로라 인라인)
+            parts = name.split('.', 2)
+            if len(parts) < 3 or parts[0] != 'rate' or not parts[1].isdecimal():
+                continue
+            name = parts[2]
+        if name not in fields:
+            fields[name] = value
+    return fields
+
+# 판매 채널 가격 필드 `<대상>.sale.<사이트>.<통화>`의 사이트 이름 -> 결과 테이블의 사이트 코드
+_SITE_CODES = {'monkey': 'mk'}
+
+# 필드 이름 목록 -> 판매 채널 가격 필드 목록 캐시 (한 페이지의 행은 대부분 같은 필드 구성이므로 이름 분석은 구성마다 한 번)
+_SALE_FIELD_LAYOUTS = {}
+_SALE_FIELD_LAYOUTS_MAX = 1024
+
+def _sale_field_layout(names):
+    """필드 이름 목록의 `<대상>.sale.<사이트>.<통화>` 필드를 대상 접두어별로 묶은 [(대상 접두어, ((사이트 코드, 통화), ...), (필드 이름, ...)), ...]"""
+    channels = {}
+    for name in names:
+        pax, marker, channel = name.partition('.sale.')
+        site, dot, currency = channel.partition('.')
+        if marker and dot and '.' not in currency:
+            channels.setdefault(pax, []).append(((_SITE_CODES.get(site, site), currency), name))
+    return [(pax, tuple(key for key, _ in items), tuple(name for _, name in items)) for pax, items in channels.items()]
+
+def _channel_sales(fields):
+    """필드 맵에서 `<대상>.sale.<사이트>.<통화>` 필드를 모두 찾아 {대상 접두어: (((사이트, 통화), ...), [가격, ...])} 반환 (문서 순서)
+    
+    가격이 하나라도 0보다 큰 대상만 포함하며, 행마다 만드는 객체를 줄이기 위해 가격 0인 채널도 자리를 유지합니다
+    (0인 가격은 _program_table에서 한 번에 제외).
+    """
+    names = tuple(fields)
+    layout = _SALE_FIELD_LAYOUTS.get(names)
+    if layout is None:
+        if len(_SALE_FIELD_LAYOUTS) >= _SALE_FIELD_LAYOUTS_MAX:
+            _SALE_FIELD_LAYOUTS.clear()
+        layout = _SALE_FIELD_LAYOUTS[names] = _sale_field_layout(names)
+    sales = {}
+    for pax, channels, channel_names in layout:
+        prices = [int(fields[name]) for name in channel_names]
+        if any(prices):
+            sales[pax] = (channels, prices)
+    return sales
+
+def _spa_field_name(name):
+    """SPA 요금 필드 `rate.N.이름`에서 접두어를 뗀 이름 (SPA 요금 필드가 아니면 None)"""
+    parts = name.split('.', 2)
+    if len(parts) < 3 or parts[0] != 'rate' or not parts[1].isdecimal():
+        return None
+    return parts[2]
+
+def _spa_programs(program_id, program_name, row_fields):
+    """SPA 블록 하나의 program_id(없으면 None), 프로그램명, Duration 행별 필드 맵으로 프로그램 목록 구성
+    
+    프로그램은 (program_id, 옵션명, [(대상, 넷가, 세일가, KRW 가격 여부), ...], [(대상, 넷가, ((사이트, 통화), ...), [가격, ...]), ...])
+    튜플입니다. 세 번째 항목은 mk THB 세일가가 있는 요금, 네 번째 항목은 판매 채널 가격이 하나라도 있는 요금입니다.
+    """
+    programs = []
+    
+    for fields in row_fields:
+        # 옵션명 = 프로그램명 + Duration
+        duration = fields.get('duration', '')
+        option_name = f"{program_name} {duration}" if duration else program_name
+        
+        # Net/Sale(mk만)/KRW 가격
+        adult_nett = int(fields.get('adult.nett', 0))
+        adult_sale_mk = int(fields.get('adult.sale.monkey.THB', 0))
+        adult_sale_krw = int(fields.get('adult.sale.monkey.KRW', 0))
+        adult_sales = _channel_sales(fields).get('adult')
+        
+        # program_id와 program_name이 있고, 세일가가 있으면 추가 (넷가가 0이어도 포함, SPA는 아동 가격 없음)
+        if program_id is not None and option_name and (adult_sale_mk > 0 or adult_sales):
+            rates = [('성인', adult_nett, adult_sale_mk, adult_sale_krw > 0)] if adult_sale_mk > 0 else []
+            channel_rates = [('성인', adult_nett, *adult_sales)] if adult_sales else []
+            programs.append((program_id, option_name, rates, channel_rates))
+    
+    return programs
+
+def _tour_programs(program_id, program_name, fields):
+    """일반 투어 블록 하나의 program_id(없으면 None), 프로그램명, 필드 맵으로 프로그램 목록 구성 (0개 또는 1개)"""
+    if program_id is None:
+        return []
+    
+    # Net/Sale(mk만)/KRW 가격
+    adult_nett = int(fields.get('adult.nett', 0))
+    child_nett = int(fields.get('child.nett', 0))
+    adult_sale_mk = int(fields.get('adult.sale.monkey.THB', 0))
+    child_sale_mk = int(fields.get('child.sale.monkey.THB', 0))
+    adult_sale_krw = int(fields.get('adult.sale.monkey.KRW', 0))
+    child_sale_krw = int(fields.get('child.sale.monkey.KRW', 0))
+    sales = _channel_sales(fields)
+    
+    # 판매 채널 가격은 세일가가 있는 대상만 (어느 채널에도 가격이 없는 프로그램은 제외)
+    channel_rates = []
+    if 'adult' in sales:
+        channel_rates.append(('성인', adult_nett, *sales['adult']))
+    if 'child' in sales:
+        channel_rates.append(('아동', child_nett, *sales['child']))
+    if not (program_name and (adult_sale_mk > 0 or channel_rates)):
+        return []
+    
+    # program_id와 program_name이 있고, mk 세일가가 있으면 추가 (넷가가 0이어도 포함)
+    # 세일가가 없는 아동 요금은 계산 대상이 아니므로 제외
+    rates = []
+    if adult_sale_mk > 0:
+        rates.append(('성인', adult_nett, adult_sale_mk, adult_sale_krw > 0))
+        if child_sale_mk > 0:
+            rates.append(('아동', child_nett, child_sale_mk, child_sale_krw > 0))
+    return [(program_id, program_name, rates, channel_rates)]
+
+def _parse_spa_block(tbody_content):
+    """SPA 구조 tbody 블록 하나에서 Duration 행별 프로그램 목록 추출 (형식은 _spa_programs 참고)"""
+    # 프로그램 ID 추출
+    program_id_match = _PROGRAM_ID_PATTERN.search(tbody_content)
+    program_id = program_id_match.group(1) if program_id_match else None
+    
+    # 프로그램명 추출
+    program_name_match = _PROGRAM_NAME_PATTERN.search(tbody_content)
+    program_name = _clean_text(program_name_match.group(1)) if program_name_match else ''
+    
+    # 각 행(Duration)별로 파싱
+    rows = tbody_content.split('<tr')[1:]  # 첫 번째는 빈 문자열
+    return _spa_programs(program_id, program_name, [_scan_fields(row, spa=True) for row in rows])
+
+def _parse_tour_block(row):
+    """일반 투어 구조 tr 블록 하나에서 프로그램 목록 추출 (0개 또는 1개, 형식은 _spa_programs와 동일)"""
+    # 각 tr 안에서 program_id 추출
+    program_id_match = _PROGRAM_ID_PATTERN.search(row)
+    if not program_id_match:
+        return []
+    
+    # program_name은 program_id 다음에 나오는 첫 번째 <b> 태그
+    program_name_match = _PROGRAM_NAME_PATTERN.search(row, program_id_match.end())
+    program_name = _clean_text(program_name_match.group(1)) if program_name_match else ''
+    
+    return _tour_programs(program_id_match.group(1), program_name, _scan_fields(row))
+
+# 프로그램 테이블의 대상(pax) 카테고리
+PAX_TYPES = ['성인', '아동']
+
+def _program_table(programs, sheet_rate_ids, sheet_runs=((0, 0),), site='mk'):
+    """블록 파서의 프로그램 목록을 요금 행 단위의 열 배열(struct-of-arrays) 테이블로 변환 - (요금 행 테이블, 가격 테이블) 반환
+    
+    sheet_rate_ids는 시트 번호별 rate_id, sheet_runs는 (프로그램 시작 위치, 시트 번호) 목록으로
+    다음 시작 위치 전까지의 프로그램이 해당 시트에 속합니다.
+    요금 행 테이블 컬럼: rate_id/program_id/program_name/site/pax_type (categorical), sheet (int32, basicInfo['sheets'] 위치),
+    net_price/sale_price (int32), has_krw_price (bool) - mk THB 세일가가 있는 요금만
+    program_id는 HTML 값 그대로의 문자열입니다 (앞의 0 유지).
+    가격 테이블은 (프로그램, 대상, 사이트, 통화)마다 한 행인 긴 형식입니다 (_price_frame 참고).
+    """
+    program_ids, program_names, pax_types, net_prices, sale_prices, has_krw_prices = [], [], [], [], [], []
+    # 가격 테이블은 요금(대상)마다 값 하나씩 모은 뒤 채널 수만큼 반복 (새 튜플을 만들지 않도록 열별 목록에 추가)
+    rate_ids, rate_names, rate_pax_types, rate_net_prices, price_counts = [], [], [], [], []
+    price_channels, channel_prices = [], []  # (사이트, 통화), 가격 (0 포함)
+    run_sheets, run_rows, run_price_rows = [], [], []
+    run_ends = [start for start, _ in sheet_runs[1:]] + [len(programs)]
+    for (start, sheet), end in zip(sheet_runs, run_ends):
+        run_start_row = len(program_ids)
+        run_start_price_row = len(price_channels)
+        for program_id, program_name, rates, channel_rates in programs[start:end]:
+            for pax_type, net_price, sale_price, has_krw_price in rates:
+                program_ids.append(program_id)
+                program_names.append(program_name)
+                pax_types.append(pax_type)
+                net_prices.append(net_price)
+                sale_prices.append(sale_price)
+                has_krw_prices.append(has_krw_price)
+            for pax_type, net_price, channels, prices in channel_rates:
+                rate_ids.append(program_id)
+                rate_names.append(program_name)
+                rate_pax_types.append(pax_type)
+                rate_net_prices.append(net_price)
+                price_counts.append(len(prices))
+                price_channels.extend(channels)
+                channel_prices.extend(prices)
+        run_sheets.append(sheet)
+        run_rows.append(len(program_ids) - run_start_row)
+        run_price_rows.append(len(price_channels) - run_start_price_row)
+    
+    run_sheets = np.array(run_sheets, dtype=np.int32)
+    # 가격이 0인 채널 자리는 여기서 제외
+    channel_prices = np.array(channel_prices, dtype=np.int32)
+    listed = channel_prices > 0
+    ids = pd.Categorical(rate_ids)
+    names = pd.Categorical(rate_names)
+    pax_codes = pd.Categorical(rate_pax_types, categories=PAX_TYPES).codes
+    return (
+        _program_frame(np.repeat(run_sheets, run_rows), sheet_rate_ids, program_ids, program_names, pax_types,
+                       net_prices, sale_prices, has_krw_prices, site),
+        _price_frame(
+            np.repeat(run_sheets, run_price_rows)[listed], sheet_rate_ids,
+            pd.Categorical.from_codes(np.repeat(ids.codes, price_counts)[listed], categories=ids.categories),
+            pd.Categorical.from_codes(np.repeat(names.codes, price_counts)[listed], categories=names.categories),
+            pd.Categorical.from_codes(np.repeat(pax_codes, price_counts)[listed], categories=PAX_TYPES),
+            np.array([channel[0] for channel in price_channels], dtype=object)[listed],
+            np.array([channel[1] for channel in price_channels], dtype=object)[listed],
+            np.repeat(np.array(rate_net_prices, dtype=np.int32), price_counts)[listed],
+            channel_prices[listed]
+        )
+    )
+
+def _rate_id_column(sheet_codes, sheet_rate_ids):
+    """행별 시트 번호로 rate_id categorical 컬럼 생성 - 여러 시트가 같은 rate_id를 가질 수 있으므로 시트 번호 -> rate_id 카테고리 번호로 변환"""
+    rate_categories = list(dict.fromkeys(sheet_rate_ids))
+    rate_codes = np.array([rate_categories.index(rate_id) for rate_id in sheet_rate_ids], dtype=np.int32)[sheet_codes]
+    return pd.Categorical.from_codes(rate_codes, categories=rate_categories)
+
+def _program_frame(sheet_codes, sheet_rate_ids, program_ids, program_names, pax_types, net_prices, sale_prices, has_krw_prices, site='mk'):
+    """행별 시트 번호와 열 값 목록으로 _program_table 형식(같은 dtype)의 DataFrame 생성"""
+    sheet_codes = np.asarray(sheet_codes, dtype=np.int32)
+    return pd.DataFrame({
+        'rate_id': _rate_id_column(sheet_codes, sheet_rate_ids),
+        'sheet': sheet_codes,
+        'program_id': pd.Categorical(program_ids),
+        'program_name': pd.Categorical(program_names),
+        'site': pd.Categorical.from_codes(np.zeros(len(sheet_codes), dtype=np.int8), categories=[site]),
+        'pax_type': pd.Categorical(pax_types, categories=PAX_TYPES),
+        'net_price': np.array(net_prices, dtype=np.int32),
+        'sale_price': np.array(sale_prices, dtype=np.int32),
+        'has_krw_price': np.array(has_krw_prices, dtype=bool)
+    })
+
+def _price_frame(sheet_codes, sheet_rate_ids, program_ids, program_names, pax_types, sites, currencies, net_prices, sale_prices):
+    """(프로그램, 대상, 사이트, 통화)마다 한 행인 긴 형식 가격 테이블 생성
+    
+    컬럼: rate_id/program_id/program_name/pax_type/site/currency (categorical, 사이트/통화는 처음 나온 순서), sheet (int32),
+    net_price (int32, 바트), sale_price (int32, 해당 통화)
+    """
+    sheet_codes = np.asarray(sheet_codes, dtype=np.int32)
+    return pd.DataFrame({
+        'rate_id': _rate_id_column(sheet_codes, sheet_rate_ids),
+        'sheet': sheet_codes,
+        'program_id': pd.Categorical(program_ids),
+        'program_name': pd.Categorical(program_names),
+        'pax_type': pd.Categorical(pax_types, categories=PAX_TYPES),
+        'site': _first_seen_categorical(sites),
+        'currency': _first_seen_categorical(currencies),
+        'net_price': np.array(net_prices, dtype=np.int32),
+        'sale_price': np.array(sale_prices, dtype=np.int32)
+    })
+
+def _first_seen_categorical(values):
+    """값이 처음 나온 순서를 카테고리 순서로 쓰는 Categorical"""
+    codes, categories = pd.factorize(np.asarray(values, dtype=object))
+    return pd.Categorical.from_codes(codes, categories=list(categories))
+
+def _prices_from_programs(program_table):
+    """요금 행 테이블(_program_table 형식)을 mk THB 가격만 있는 가격 테이블로 변환 (세일가가 있는 행만)"""
+    program_table = program_table[program_table['sale_price'] > 0]
+    sheet_codes = program_table['sheet'].to_numpy()
+    return pd.DataFrame({
+        'rate_id': program_table['rate_id'].to_numpy(),
+        'sheet': sheet_codes,
+        'program_id': program_table['program_id'].array,
+        'program_name': program_table['program_name'].to_numpy(),
+        'pax_type': program_table['pax_type'].to_numpy(),
+        'site': program_table['site'].to_numpy(),
+        'currency': pd.Categorical.from_codes(np.zeros(len(sheet_codes), dtype=np.int8), categories=['THB']),
+        'net_price': program_table['net_price'].to_numpy(),
+        'sale_price': program_table['sale_price'].to_numpy()
+    })
+
+# 파싱된 프로그램 테이블 입력의 필수 컬럼
+PROGRAM_INPUT_COLUMNS = ['program_id', 'program_name', 'pax_type', 'net_price', 'sale_price']
+
+def _integer_column(values):
+    """정수 값 컬럼을 int64 배열로 변환 - 정수가 아닌 값(900.5, NaN, 숫자가 아닌 문자열)이 있으면 ValueError
+    
+    int64로 바로 변환하면 소수점 아래를 버리므로, 정수 dtype이 아니면 실수로 읽어 정수인지 먼저 확인합니다.
+    """
+    if not pd.api.types.is_integer_dtype(values.dtype):
+        try:
+            floats = values.to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError('정수가 아닌 값이 있습니다.')
+        if not np.isfinite(floats).all() or (floats != np.rint(floats)).any():
+            raise ValueError('정수가 아닌 값이 있습니다.')
+    return values.to_numpy(dtype=np.int64)
+
+def parsed_data_from_programs(programs, sheets=None):
+    """이미 파싱된 요금 행 테이블(DataFrame)로 parseHTML 형식의 parsed_data 생성 - 잘못된 입력이면 ValueError
+    
+    필수 컬럼은 PROGRAM_INPUT_COLUMNS (program_id는 숫자로 된 ID - 정수나 문자열, pax_type은 PAX_TYPES 중 하나,
+    가격은 0 이상 정수)이고,
+    rate_id, sheet(sheets 목록 위치), has_krw_price, site는 선택입니다.
+    sheets([{'rate_id', 'period': {'start', 'end'}, 'supplier'}])가 없으면 rate_id가 나온 순서대로
+    기본 기간의 시트를 만들고(빠진 값은 HTML 파싱과 같이 기본 기간, rate_id '', 공급사 'N/A'), 있으면 sheet 컬럼(없으면 0)으로 행을 시트에 지정합니다.
+    가격 테이블(prices)은 입력 행의 THB 세일가만 담습니다.
+    """
+    missing = [col for col in PROGRAM_INPUT_COLUMNS if col not in programs.columns]
+    if missing:
+        raise ValueError(f'프로그램 테이블에 필수 컬럼이 없습니다: {", ".join(missing)}')
+    if len(programs) == 0:
+        raise ValueError('프로그램 테이블이 비어 있습니다.')
+    unknown_pax = set(programs['pax_type'].astype(str)) - set(PAX_TYPES)
+    if unknown_pax:
+        raise ValueError(f'알 수 없는 대상: {", ".join(sorted(unknown_pax))} (사용 가능: {", ".join(PAX_TYPES)})')
+    # program_id는 HTML 파싱 결과와 같이 문자열로 보관 (문자열로 받으면 앞의 0도 유지)
+    program_ids = programs['program_id'].astype(str)
+    if not program_ids.str.isdecimal().all():
+        raise ValueError('program_id는 숫자로 된 ID여야 합니다.')
+    try:
+        net_prices = _integer_column(programs['net_price'])
+        sale_prices = _integer_column(programs['sale_price'])
+    except (TypeError, ValueError):
+        raise ValueError('net_price, sale_price는 정수여야 합니다.')
+    if (net_prices < 0).any() or (sale_prices < 0).any():
+        raise ValueError('가격은 0 이상이어야 합니다.')
+    
+    rate_ids = programs['rate_id'].astype(str).tolist() if 'rate_id' in programs.columns else [''] * len(programs)
+    if sheets is None:
+        sheet_rate_ids = list(dict.fromkeys(rate_ids))
+        sheet_codes = pd.Categorical(rate_ids, categories=sheet_rate_ids).codes
+        sheets = [{'rate_id': rate_id, 'period': _basic_period([None, None]), 'supplier': 'N/A'} for rate_id in sheet_rate_ids]
+    else:
+        sheets = [
+            {'rate_id': str(sheet.get('rate_id') or ''), 'period': _basic_period([period.get('start'), period.get('end')]),
+             'supplier': sheet.get('supplier') or 'N/A'}
+            for sheet, period in ((sheet, sheet.get('period') or {}) for sheet in sheets)
+        ]
+        sheet_codes = programs['sheet'].to_numpy(dtype=np.int64) if 'sheet' in programs.columns else np.zeros(len(programs), dtype=np.int64)
+        if not sheets or sheet_codes.min() < 0 or sheet_codes.max() >= len(sheets):
+            raise ValueError('sheet 값이 sheets 목록 범위를 벗어났습니다.')
+    
+    has_krw_prices = programs['has_krw_price'].astype(bool).tolist() if 'has_krw_price' in programs.columns else [False] * len(programs)
+    site = str(programs['site'].iloc[0]) if 'site' in programs.columns else 'mk'
+    program_table = _program_frame(
+        sheet_codes, [sheet['rate_id'] for sheet in sheets], program_ids.tolist(), programs['program_name'].astype(str).tolist(),
+        programs['pax_type'].astype(str).tolist(), net_prices, sale_prices, has_krw_prices, site
+    )
+    for sheet, rows in zip(sheets, np.bincount(program_table['sheet'], minlength=len(sheets))):
+        sheet['rows'] = int(rows)
+    return {
+        'basicInfo': {
+            'period': sheets[0]['period'],
+            'site': 'mk (Monkey Travel)',
+            'currency': 'THB',
+            'supplier': sheets[0]['supplier'],
+            'sheets': sheets
+        },
+        'programs': program_table,
+        'prices': _prices_from_programs(program_table)
+    }
+
+def _basic_period(period):
+    """추출한 [시작일, 종료일]에 기본 기간을 채워 기간 dict로 변환"""
+    return {'start': period[0] or '2025-10-01', 'end': period[1] or '2026-03-31'}
+
+def _resolve_sheets(html_content, sheet_keys):
+    """블록 앞에서 찾지 못한 헤더 값(None)을 문서 전체의 첫 값으로 채워 시트 목록 생성
+    
+    sheet_keys는 시트 번호 순서의 (rate_id, 기간, 공급사) 목록입니다.
+    반환: (시트 dict 목록, 원래 시트 번호 -> 최종 시트 번호 목록) - 채운 뒤 같아진 시트는 하나로 합칩니다.
+    """
+    fallback = {}
+    if any(rate_id is None for rate_id, _, _ in sheet_keys):
+        rate_id_match = _search_document(_RATE_ID_PATTERN, html_content)
+        fallback['rate_id'] = rate_id_match[0] if rate_id_match else ''
+    if any(period is None for _, period, _ in sheet_keys):
+        period_match = _search_document(_PERIOD_PATTERN, html_content)
+        fallback['period'] = (period_match[0].split(' ')[0], period_match[1].split(' ')[0]) if period_match else ('', '')
+    if any(supplier is None for _, _, supplier in sheet_keys):
+        supplier_match = _search_document(_SUPPLIER_PATTERN, html_content)
+        fallback['supplier'] = _clean_text(supplier_match[0]) if supplier_match else 'N/A'
+    
+    resolved = {}
+    remap = []
+    for rate_id, period, supplier in sheet_keys:
+        key = (
+            fallback['rate_id'] if rate_id is None else rate_id,
+            fallback['period'] if period is None else period,
+            fallback['supplier'] if supplier is None else supplier
+        )
+        remap.append(resolved.setdefault(key, len(resolved)))
+    
+    sheets = [
+        {'rate_id': rate_id, 'period': _basic_period(period), 'supplier': supplier}
+        for rate_id, period, supplier in resolved
+    ]
+    return sheets, remap
+
+class _SheetPrograms:
+    """파서 엔진 공통 결과: 문서 순서의 프로그램 목록과 시트 구간
+    
+    sheet_runs는 (프로그램 시작 위치, 시트 번호) 목록으로 시트가 바뀔 때만 추가되고,
+    sheet_codes는 (rate_id, 기간, 공급사) -> 시트 번호 (찾지 못한 헤더 값은 None)입니다.
+    nested는 정규식 엔진이 블록 안에서 같은 블록 태그를 만나 블록이 잘렸을 수 있음을 뜻합니다.
+    blocks / reused_blocks는 블록 수와 그중 블록 캐시에서 가져온 블록 수입니다 (블록 캐시를 쓰는 엔진만 기록).
+    """
+    
+    def __init__(self):
+        self.programs = []
+        self.sheet_runs = []
+        self.sheet_codes = {}
+        self.nested = False
+        self.blocks = 0
+        self.reused_blocks = 0
+    
+    def add(self, header, block_programs):
+        """블록 하나의 프로그램을 블록 앞의 가장 가까운 시트 헤더(header) 기준으로 추가"""
+        if not block_programs:
+            return
+        sheet = self.sheet_codes.setdefault((header['rate_id'], header['period'], header['supplier']), len(self.sheet_codes))
+        if not self.sheet_runs or self.sheet_runs[-1][1] != sheet:
+            self.sheet_runs.append((len(self.programs), sheet))
+        self.programs.extend(block_programs)
+
+def _regex_engine(html_content, block_cache=None):
+    """정규식 엔진: 블록 경계는 str.find, 블록 안은 필드 정규식 한 번으로 스캔 (블록 태그 중첩은 지원하지 않음)
+    
+    html_content가 바이트 버퍼(bytes, mmap)이면 블록 경계를 바이트로 찾고 블록과 블록 사이 구간만 디코딩하므로
+    문서 전체의 str 사본을 만들지 않습니다 (블록 태그는 ASCII라 구간 경계가 UTF-8 문자 중간에 걸리지 않음).
+    block_cache(LRUByteCache)를 넘기면 블록마다 (구조, 블록 내용 해시)로 파싱 결과를 찾아 바뀐 블록만 파싱합니다.
+    시트 헤더는 블록 사이 구간에서 매번 다시 찾으므로, 블록이 같아도 앞의 헤더가 바뀌면 새 시트로 들어갑니다.
+    """
+    result = _SheetPrograms()
+    header = {'rate_id': None, 'period': None, 'supplier': None}
+    tags = (_SPA_BLOCK_OPEN, _SPA_BLOCK_CLOSE, _TOUR_BLOCK_OPEN, _TOUR_BLOCK_CLOSE)
+    decode = not isinstance(html_content, str)
+    if decode:
+        tags = tuple(tag.encode('ascii') for tag in tags)
+    spa_open, spa_close, tour_open, tour_close = tags
+    
+    # SPA 구조: tbody 단위, 일반 투어 구조: 각 <tr child-root="tour_rate.rateJson"> 단위로 파싱
+    spa = html_content.find(spa_open) >= 0
+    if spa:
+        blocks = _iter_blocks(html_content, spa_open, spa_close)
+        parse_block, nested_tag = _parse_spa_block, '<table'
+    else:
+        blocks = _iter_blocks(html_content, tour_open, tour_close)
+        parse_block, nested_tag = _parse_tour_block, '<tr'
+    
+    # 문서를 한 번 훑으며 블록 사이 구간에서 시트 헤더를 갱신
+    for preceding, block in blocks:
+        if decode:
+            preceding = _decode(preceding)
+        _scan_header(preceding, header)
+        
+        # 블록 캐시 값은 (프로그램 목록, 블록 태그 중첩 여부) - 바이트 버퍼는 캐시에 없는 블록만 디코딩
+        cached = None
+        if block_cache is not None:
+            key = ('block', spa, content_hash(block))
+            cached = block_cache.get(key)
+        if cached is None:
+            text = _decode(block) if decode else block
+            cached = (parse_block(text), nested_tag in text)
+            if block_cache is not None:
+                # 크기는 블록 원문 길이로 계산 (파싱 결과의 메모리 크기는 원문의 3분의 2 정도)
+                block_cache.put(key, cached, len(block))
+        else:
+            result.reused_blocks += 1
+        block_programs, nested = cached
+        result.blocks += 1
+        if nested:
+            result.nested = True
+        result.add(header, block_programs)
+    return result
+
+# 이벤트 기반 엔진의 헤더 값 패턴 (속성 값 전체와 비교)
+_PERIOD_VALUE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})\s\d{2}:\d{2}:\d{2}~(\d{4}-\d{2}-\d{2})\s\d{2}:\d{2}:\d{2}')
+_SUPPLIER_ID_PATTERN = re.compile(r'autoCompleteSupplier_\d+_\d+')
+
+class _RateEventCollector:
+    """시작/종료 태그와 텍스트 이벤트로 시트 헤더와 요금 블록을 수집 (html.parser 엔진과 lxml 엔진이 공유)
+    
+    lxml parser target 인터페이스(start/end/data/close)를 따르며, 블록 안의 필드 규칙은 정규식 엔진과 같습니다.
+    블록 태그와 표의 중첩은 깊이로 추적하므로 블록 안에 표가 중첩되어도 블록이 중간에 끊기거나
+    SPA의 Duration 행이 나뉘지 않습니다.
+    """
+    
+    def __init__(self, spa):
+        self.spa = spa
+        self.block_tag = 'tbody' if spa else 'tr'
+        self.result = _SheetPrograms()
+        self.header = {'rate_id': None, 'period': None, 'supplier': None}
+        self._depth = 0  # 블록 안에서 블록 태그 중첩 깊이 (0이면 블록 밖)
+        self._text_tag = None  # 텍스트를 모으는 중인 태그 (<b> 프로그램명 또는 공급사 textarea)
+        self._text = []
+    
+    def start(self, tag, attrs):
+        if self._text_tag == 'b':
+            # <b> 안에 다른 태그가 있으면 프로그램명으로 보지 않음
+            self._text_tag = None
+        if self._depth:
+            if tag == self.block_tag:
+                self._depth += 1
+            self._block_start(tag, attrs)
+        elif tag == self.block_tag and attrs.get('child-root') == 'tour_rate.rateJson':
+            self._depth = 1
+            self._table_depth = 0  # 블록 안에 중첩된 표 깊이
+            self._program_id = None
+            self._program_name = None
+            self._fields = {}
+            self._rows = []
+        else:
+            self._header_start(tag, attrs)
+    
+    def _header_start(self, tag, attrs):
+        value = attrs.get('value')
+        if value:
+            if attrs.get('name') == 'tour_rate.id' and value.isdecimal():
+                self.header['rate_id'] = value
+            elif '~' in value:
+                period_match = _PERIOD_VALUE_PATTERN.fullmatch(value)
+                if period_match:
+                    self.header['period'] = (period_match.group(1), period_match.group(2))
+        if tag == 'textarea' and _SUPPLIER_ID_PATTERN.fullmatch(attrs.get('id', '')):
+            self._text_tag = 'textarea'
+            self._text = []
+    
+    def _block_start(self, tag, attrs):
+        if tag == 'table':
+            self._table_depth += 1
+            return
+        if self.spa and tag == 'tr':
+            if not self._table_depth:
+                self._rows.append({})
+            return
+        if tag == 'b':
+            # SPA는 블록의 첫 <b>, 일반 투어는 program_id 다음의 첫 <b>가 프로그램명
+            if self._program_name is None and not attrs and (self.spa or self._program_id is not None):
+                self._text_tag = 'b'
+                self._text = []
+            return
+        name = attrs.get('name')
+        value = attrs.get('value')
+        if not (name and value and value.isdecimal()):
+            return
+        if (self._program_id is None and tag == 'input' and name == 'program_id'
+                and attrs.get('type') == 'hidden'):
+            self._program_id = value
+        if self.spa:
+            name = _spa_field_name(name)
+            if name is not None and self._rows:
+                self._rows[-1].setdefault(name, value)
+        else:
+            self._fields.setdefault(name, value)
+    
+    def data(self, text):
+        if self._text_tag is not None:
+            self._text.append(text)
+    
+    def end(self, tag):
+        if self._text_tag is not None and tag == self._text_tag:
+            text = ''.join(self._text)
+            if text:
+                if tag == 'b':
+                    self._program_name = text.strip()
+                else:
+                    self.header['supplier'] = text.strip()
+            self._text_tag = None
+        if self._depth and tag == 'table' and self._table_depth:
+            self._table_depth -= 1
+        elif self._depth and tag == self.block_tag:
+            self._depth -= 1
+            if not self._depth:
+                self._finish_block()
+    
+    def _finish_block(self):
+        program_name = self._program_name or ''
+        if self.spa:
+            block_programs = _spa_programs(self._program_id, program_name, self._rows)
+        else:
+            block_programs = _tour_programs(self._program_id, program_name, self._fields)
+        self.result.add(self.header, block_programs)
+    
+    def close(self):
+        return self.result
+
+class _StdlibRateParser(HTMLParser):
+    """html.parser 이벤트를 _RateEventCollector로 전달 (문자 참조는 텍스트/속성 모두 풀어서 전달)"""
+    
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+    
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+    
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+    
+    def handle_data(self, data):
+        self.collector.data(data)
+
+def _stdlib_engine(html_content):
+    """이벤트 기반 엔진: 표준 라이브러리 html.parser 토크나이저 (순수 파이썬, 중첩 블록 지원)"""
+    collector = _RateEventCollector(_SPA_BLOCK_OPEN in html_content)
+    parser = _StdlibRateParser(collector)
+    parser.feed(html_content)
+    parser.close()
+    return collector.result
+
+def _lxml_engine(html_content):
+    """lxml 엔진: libxml2 HTML 파서의 target 이벤트를 트리 없이 바로 수집 (중첩 블록 지원)"""
+    collector = _RateEventCollector(_SPA_BLOCK_OPEN in html_content)
+    from lxml import etree as lxml_etree
+    parser = lxml_etree.HTMLParser(target=collector)
+    parser.feed(html_content)
+    return parser.close()
+
+# 파서 엔진 목록 (이름 -> HTML 문자열을 받아 _SheetPrograms를 반환하는 함수)
+PARSER_ENGINES = {'regex': _regex_engine, 'html.parser': _stdlib_engine}
+# 바이트 버퍼(mmap 등)를 그대로 읽는 엔진 - 나머지 엔진에는 문서 전체를 디코딩해서 넘김
+BYTES_PARSER_ENGINES = {'regex'}
+# 블록 단위 파싱 결과 캐시(block_cache)를 쓰는 엔진 - 이벤트 기반 엔진은 블록 경계를 미리 나누지 않으므로 항상 전체 파싱
+BLOCK_CACHE_PARSER_ENGINES = {'regex'}
+# lxml은 선택 의존성 - 설치되어 있을 때만 엔진 등록 (import는 엔진을 처음 쓸 때)
+if importlib.util.find_spec('lxml') is not None:
+    PARSER_ENGINES['lxml'] = _lxml_engine
+
+# 자동 선택 기준: (문서 최대 문자 수, 엔진) - 앞에서부터 처음 맞는 구간의 엔진을 사용 (설치되지 않은 엔진은 건너뜀)
+# benchmarks/run_benchmarks.py --engines 측정(1만~5천만 자, SPA/일반 투어)에서는 모든 크기에서 regex가 가장 빨랐음:
+# 1천 행 이상에서 lxml보다 3.5~5배, html.parser보다 15~20배 빠름
+PARSER_ENGINE_BY_SIZE = [
+    (float('inf'), 'regex')
+]
+
+# 정규식 엔진이 블록 태그 중첩을 발견했을 때 다시 파싱할 엔진 (앞에서부터 설치된 것 사용)
+NESTED_MARKUP_ENGINES = ['lxml', 'html.parser']
+
+def select_parser_engine(size):
+    """문서 크기(문자 수)에 맞는 파서 엔진 이름"""
+    for max_size, engine in PARSER_ENGINE_BY_SIZE:
+        if size <= max_size and engine in PARSER_ENGINES:
+            return engine
+    return 'regex'
+
+def parseHTML(html_content, profiler=None, engine='auto', block_cache=None, stats=None):
+    """HTML 파싱하여 데이터 추출 - programs는 _program_table 형식의 요금 행 테이블(mk THB),
+    prices는 행의 모든 `*.sale.<사이트>.<통화>` 필드를 같은 스캔에서 모은 긴 형식 가격 테이블(_price_frame 형식)
+    
+    한 문서에 요금 시트(tour_rate.id/기간/공급사 헤더)가 여러 개 있으면 각 블록은 바로 앞의 가장 가까운
+    헤더 시트로 지정되며, 시트 목록은 basicInfo['sheets']에 담깁니다 (basicInfo의 기간/공급사는 첫 시트 기준).
+    engine은 PARSER_ENGINES의 이름 또는 'auto'(문서 크기로 선택, 정규식 엔진이 블록 태그 중첩을 발견하면
+    NESTED_MARKUP_ENGINES로 다시 파싱)입니다. html_content는 str 또는 UTF-8 바이트 버퍼(bytes, map_rate_file의 mmap)입니다.
+    profiler(StageProfiler)를 넘기면 parse.blocks / parse.table 단계가 기록됩니다.
+    block_cache(LRUByteCache)를 넘기면 BLOCK_CACHE_PARSER_ENGINES 엔진은 이전에 파싱한 블록과 내용이 같은 블록의
+    결과를 재사용하고(_regex_engine 참고), stats(dict)에 블록 수와 재사용한 블록 수(blocks, blocks_reused)를 기록합니다.
+    """
+    auto = engine == 'auto'
+    if auto:
+        engine = select_parser_engine(len(html_content))
+    elif engine not in PARSER_ENGINES:
+        raise ValueError(f'지원하지 않는 파서 엔진입니다: {engine} (사용 가능: {", ".join(PARSER_ENGINES)})')
+    
+    try:
+        with _profile_stage(profiler, 'parse.blocks') as info:
+            result = _run_engine(engine, html_content, block_cache)
+            if auto and result.nested:
+                engine = next(name for name in NESTED_MARKUP_ENGINES if name in PARSER_ENGINES)
+                result = _run_engine(engine, html_content, block_cache)
+            programs = result.programs
+            info['engine'] = engine
+            info['chars' if isinstance(html_content, str) else 'bytes'] = len(html_content)
+            info['programs'] = len(programs)
+            if block_cache is not None and engine in BLOCK_CACHE_PARSER_ENGINES:
+                info['blocks'] = result.blocks
+                info['blocks_reused'] = result.reused_blocks
+                if stats is not None:
+                    stats.update(blocks=result.blocks, blocks_reused=result.reused_blocks)
+        
+        if len(programs) == 0:
+            return None, '프로그램 데이터를 찾을 수 없습니다. HTML에 program_id와 가격 데이터가 포함되어 있는지 확인해주세요.'
+        
+        with _profile_stage(profiler, 'parse.table') as info:
+            sheets, remap = _resolve_sheets(html_content, list(result.sheet_codes))
+            program_table, price_table = _program_table(
+                programs,
+                [sheet['rate_id'] for sheet in sheets],
+                [(start, remap[sheet]) for start, sheet in result.sheet_runs]
+            )
+            for sheet, rows in zip(sheets, np.bincount(program_table['sheet'], minlength=len(sheets))):
+                sheet['rows'] = int(rows)
+            info['rows'], info['cols'] = program_table.shape
+            info['price_rows'] = len(price_table)
+        
+        return {
+            'basicInfo': {
+                'period': sheets[0]['period'],
+                'site': 'mk (Monkey Travel)',
+                'currency': 'THB',
+                'supplier': sheets[0]['supplier'],
+                'sheets': sheets
+            },
+            'programs': program_table,
+            'prices': price_table
+        }, None
+    
+    except Exception as e:
+        return None, f'HTML 파싱 중 오류가 발생했습니다: {str(e)}'
+
+def _run_engine(engine, html_content, block_cache=None):
+    """파서 엔진 실행 - 바이트 버퍼를 읽지 못하는 엔진에는 문서 전체를 디코딩해서 넘김 (블록 캐시는 지원하는 엔진에만)"""
+    if not isinstance(html_content, str) and engine not in BYTES_PARSER_ENGINES:
+        html_content = _decode(html_content[:])
+    if block_cache is not None and engine in BLOCK_CACHE_PARSER_ENGINES:
+        return PARSER_ENGINES[engine](html_content, block_cache)
+    return PARSER_ENGINES[engine](html_content)
+
+# 요금 페이지 파일 설정 - 업로드/gzip 파일은 이 크기 단위로 임시 파일에 풀어 씀
+RATE_FILE_SPOOL_CHUNK_SIZE = 1 << 20
+RATE_FILE_MAX_BYTES = 1 << 30  # 풀어 쓴 문서의 최대 크기 (gzip 폭탄 방지)
+_GZIP_MAGIC = b'\x1f\x8b'
+
+@contextmanager
+def map_rate_file(fileobj):
+    """요금 페이지 바이너리 파일 객체(.html 또는 gzip .html.gz)를 읽기 전용 mmap 바이트 버퍼로 제공 (블록을 나가면 해제)
+    
+    디스크의 일반 파일은 그대로 매핑하고, 메모리의 업로드 파일과 gzip 파일은 임시 파일에 풀어 쓴 뒤 매핑합니다.
+    parseHTML에 버퍼를 넘기면 문서 전체를 str로 디코딩한 사본 없이 파싱합니다 (빈 파일은 b'').
+    압축을 푼 크기가 RATE_FILE_MAX_BYTES를 넘으면 ValueError, 손상된 gzip은 OSError/EOFError/zlib.error가 발생합니다.
+    """
+    start = fileobj.tell()
+    compressed = fileobj.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC
+    fileobj.seek(start)
+    try:
+        fileno = None if compressed else fileobj.fileno()
+    except (OSError, AttributeError):
+        fileno = None
+    
+    if fileno is not None:
+        if os.fstat(fileno).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+        return
+    
+    with tempfile.TemporaryFile() as spool:
+        source = gzip.GzipFile(fileobj=fileobj, mode='rb') if compressed else fileobj
+        size = 0
+        while True:
+            chunk = source.read(RATE_FILE_SPOOL_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > RATE_FILE_MAX_BYTES:
+                raise ValueError(f'파일이 너무 큽니다 (압축을 푼 크기 {RATE_FILE_MAX_BYTES // (1 << 20):,}MB 초과).')
+            spool.write(chunk)
+        if size == 0:
+            yield b''
+            return
+        spool.flush()
+        with mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+# 스트리밍 파서 설정
+_STREAM_CHUNK_SIZE = 1 << 16
+_STREAM_HEADER_OVERLAP = 4096  # 청크 경계에 걸친 헤더(rate_id/기간/공급사)를 놓치지 않도록 남겨두는 길이
+
+def _read_chunks(fileobj, chunk_size):
+    """파일 객체에서 문자열 청크를 순서대로 읽기 (바이너리 파일은 UTF-8로 점진 디코딩)"""
+    decoder = None
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            text = decoder.decode(chunk, final=not chunk)
+        else:
+            text = chunk
+        if text:
+            yield text
+        if not chunk:
+            return
+
+def iter_programs(fileobj, chunk_size=_STREAM_CHUNK_SIZE):
+    """HTML 파일 객체를 청크 단위로 읽으며 tbody/tr 블록이 닫히는 즉시 프로그램 dict를 반환하는 제너레이터
+    
+    프로그램 dict는 rate_id, program_id, program_name, site, rates(mk THB 세일가가 있는 요금의 대상/넷가/세일가/KRW 가격 여부
+    dict 목록), prices(판매 채널별 대상/사이트/통화/넷가/세일가 dict 목록)와 그 시점까지 확인된 period, supplier를 포함합니다.
+    mk 세일가 없이 다른 채널 가격만 있는 프로그램은 rates가 빈 목록입니다.
+    rate_id/기간/공급사는 블록 앞의 가장 가까운 값(여러 시트 문서에서는 해당 시트 헤더)을 사용하고, 레이아웃(SPA/일반 투어)은 처음 나온
+    블록 태그로 판단합니다. 버퍼에는 블록 하나와 청크 하나 정도만 유지됩니다.
+    """
+    header = {'rate_id': None, 'period': None, 'supplier': None}
+    chunks = _read_chunks(fileobj, chunk_size)
+    buffer = ''
+    open_tag = close_tag = parse_block = None
+    close_search_pos = 0
+    
+    while True:
+        # 레이아웃 판단: 처음 나온 블록 태그 기준
+        if open_tag is None:
+            spa_start = buffer.find(_SPA_BLOCK_OPEN)
+            tour_start = buffer.find(_TOUR_BLOCK_OPEN)
+            if spa_start >= 0 and (tour_start < 0 or spa_start < tour_start):
+                open_tag, close_tag, parse_block = _SPA_BLOCK_OPEN, _SPA_BLOCK_CLOSE, _parse_spa_block
+            elif tour_start >= 0:
+                open_tag, close_tag, parse_block = _TOUR_BLOCK_OPEN, _TOUR_BLOCK_CLOSE, _parse_tour_block
+        
+        start = buffer.find(open_tag) if open_tag else -1
+        if start >= 0:
+            if start > 0:
+                # 블록 앞부분은 헤더만 확인하고 버림
+                _scan_header(buffer[:start], header)
+                buffer = buffer[start:]
+                close_search_pos = 0
+            end = buffer.find(close_tag, max(close_search_pos, len(open_tag)))
+            if end >= 0:
+                block = buffer[len(open_tag):end]
+                buffer = buffer[end + len(close_tag):]
+                close_search_pos = 0
+                period = _basic_period(header['period'] or ['', ''])
+                supplier = header['supplier'] or 'N/A'
+                for program_id, program_name, rates, channel_rates in parse_block(block):
+                    yield {
+                        'rate_id': header['rate_id'] or '',
+                        'program_id': program_id,
+                        'program_name': program_name,
+                        'site': 'mk',
+                        'rates': [
+                            {'pax_type': pax_type, 'net_price': net_price, 'sale_price': sale_price, 'has_krw_price': has_krw_price}
+                            for pax_type, net_price, sale_price, has_krw_price in rates
+                        ],
+                        'prices': [
+                            {'pax_type': pax_type, 'site': channel_site, 'currency': currency, 'net_price': net_price, 'sale_price': price}
+                            for pax_type, net_price, channels, prices in channel_rates
+                            for (channel_site, currency), price in zip(channels, prices) if price > 0
+                        ],
+                        'period': period,
+                        'supplier': supplier
+                    }
+                continue
+            # 블록이 아직 닫히지 않음 - 다음 청크에서 이어서 종료 태그 검색
+            close_search_pos = max(len(buffer) - len(close_tag) + 1, len(open_tag))
+        else:
+            # 블록 시작 전 구간: 헤더 확인 후 경계에 걸친 태그를 위해 끝부분만 유지
+            _scan_header(buffer, header)
+            if len(buffer) > _STREAM_HEADER_OVERLAP:
+                buffer = buffer[-_STREAM_HEADER_OVERLAP:]
+        
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        buffer += chunk
+
+# 결과 테이블 기본 컬럼
+_BASE_COLUMNS = ['Rate ID', 'Program ID', '시작일', '종료일', '옵션명', '사이트', '대상', '넷가(바트)', '세일가(바트)']
+# 사이트/통화별 가격 테이블 기본 컬럼 - 세일가는 판매 통화 그대로, 세일가(바트)는 바트로 환산한 값
+_PRICE_BASE_COLUMNS = ['Rate ID', 'Program ID', '시작일', '종료일', '옵션명', '사이트', '통화', '대상', '넷가(바트)', '세일가', '세일가(바트)']
+
+def _required_markup(net, sale, comm_rate_decimal):
+    """필요 마크업(%): 수수료를 뺀 공급가가 넷가보다 작으면 ceil((넷가 / 공급가 - 1) * 100), 아니면 0"""
+    supply_price_temp = sale - np.rint(sale * comm_rate_decimal).astype(np.int64)
+    needs_markup = (supply_price_temp > 0) & (supply_price_temp < net)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(needs_markup, np.ceil((net / supply_price_temp - 1) * 100), 0).astype(np.int64)
+
+# 가격 계산 단계와 의존성 (각 단계는 앞 단계의 부동소수점 중간값을 그대로 이어받음)
+#   markup     : 넷가, 세일가, 수수료                 -> required_markup, final_sale_thb
+#   sale_krw   : markup + 환율                        -> sale_krw
+#   discounted : sale_krw + 할인율 (넷가, 수수료, 환율) -> final_price, supply_price, margin_krw
+def _markup_stage(net, sale, comm_rate_decimal):
+    """필요 마크업과 최종 세일가 - (int64 컬럼 dict, 다음 단계용 final_sale_thb 부동소수점 값)"""
+    required_markup = _required_markup(net, sale, comm_rate_decimal)
+    # 필요 마크업을 사용해 최종 세일가 계산
+    final_sale_thb = sale * (1 + required_markup / 100)
+    return {
+        'required_markup': required_markup,
+        'final_sale_thb': np.rint(final_sale_thb).astype(np.int64)
+    }, final_sale_thb
+
+def _sale_krw_stage(final_sale_thb, exchange_rate):
+    """원화 세일가 - (int64 컬럼 dict, 다음 단계용 sale_krw 부동소수점 값)"""
+    sale_krw = final_sale_thb * exchange_rate
+    return {'sale_krw': np.rint(sale_krw).astype(np.int64)}, sale_krw
+
+def _discounted_stage(sale_krw, net, comm_rate_decimal, exchange_rate, discount_rate):
+    """할인 적용 최종 판매가, 공급가, 원화 마진 (int64 컬럼 dict)"""
+    final_price = sale_krw * (1 - discount_rate / 100)
+    supply_price = final_price - np.rint(final_price * comm_rate_decimal)
+    margin_krw = supply_price - net * exchange_rate
+    return {
+        'final_price': np.rint(final_price).astype(np.int64),
+        'supply_price': np.rint(supply_price).astype(np.int64),
+        'margin_krw': np.rint(margin_krw).astype(np.int64)
+    }
+
+def compute_pricing(net_prices, sale_prices, commission_rates, exchange_rate, discount_rate):
+    """넷가/세일가 배열과 수수료 목록으로 가격을 (행 × 수수료) 2차원 배열로 한 번에 계산
+    
+    반환 dict의 키: required_markup, final_sale_thb (항상), sale_krw, final_price, supply_price,
+    margin_krw (환율 > 0일 때만). 모든 값은 int64이며 Python round()(반올림 시 짝수)와
+    math.ceil 마크업 규칙을 그대로 따르도록 같은 순서의 부동소수점 연산을 사용합니다.
+    """
+    net = np.asarray(net_prices, dtype=np.int64)[:, np.newaxis]
+    sale = np.asarray(sale_prices, dtype=np.int64)[:, np.newaxis]
+    comm_rate_decimal = np.asarray(commission_rates, dtype=np.float64)[np.newaxis, :] / 100
+    result, final_sale_thb = _markup_stage(net, sale, comm_rate_decimal)
+    
+    if exchange_rate > 0:
+        columns, sale_krw = _sale_krw_stage(final_sale_thb, exchange_rate)
+        result.update(columns)
+        result.update(_discounted_stage(sale_krw, net, comm_rate_decimal, exchange_rate, discount_rate))
+    
+    return result
+
+def _result_rows(parsed_data):
+    """세일가가 있는 요금 행만 골라 (기본 컬럼 DataFrame(넷가/세일가 제외), 원래 넷가, 세일가) 반환 - 행이 없으면 None
+    
+    기본 컬럼은 설정값과 무관하므로 DataFrame으로 한 번만 만들어 두고 테이블을 조립할 때마다 재사용합니다.
+    """
+    sheets = parsed_data['basicInfo']['sheets']
+    programs = parsed_data['programs']
+    
+    # 세일가가 있는 요금만 테이블에 포함
+    programs = programs[programs['sale_price'] > 0]
+    if len(programs) == 0:
+        return None
+    
+    base = _row_labels(programs, sheets)
+    return pd.DataFrame(base), programs['net_price'].to_numpy(dtype=np.int64), programs['sale_price'].to_numpy(dtype=np.int64)
+
+def _row_labels(rows, sheets):
+    """요금 행 테이블/가격 테이블 행의 표시용 기본 컬럼 dict (시작일/종료일은 행이 속한 시트의 기간)"""
+    sheet_codes = rows['sheet'].to_numpy()
+    return {
+        'Rate ID': rows['rate_id'].astype(str).to_numpy(),
+        'Program ID': rows['program_id'].astype(str).to_numpy(),
+        '시작일': np.array([sheet['period']['start'] for sheet in sheets], dtype=object)[sheet_codes],
+        '종료일': np.array([sheet['period']['end'] for sheet in sheets], dtype=object)[sheet_codes],
+        '옵션명': rows['program_name'].astype(str).to_numpy(),
+        '사이트': rows['site'].astype(str).to_numpy(),
+        '대상': rows['pax_type'].astype(str).to_numpy()
+    }
+
+def _net_prices(net_prices, sale_prices, net_price_percentage):
+    """net_price_percentage가 설정되어 있으면 세일가 기준으로 넷가 계산 (넷가가 0이 아니어도 적용)"""
+    if net_price_percentage > 0:
+        return np.rint(sale_prices * (net_price_percentage / 100)).astype(np.int64)
+    return net_prices
+
+def _assemble_table(base, net_prices, sale_prices, commission_rates, groups, base_columns=_BASE_COLUMNS):
+    """기본 컬럼 DataFrame과 수수료별 가격 컬럼(groups[i]는 commission_rates[i]의 1차원 컬럼 dict)으로 결과 테이블 생성"""
+    columns = {col: base[col] for col in base.columns}
+    columns['넷가(바트)'] = net_prices
+    columns['세일가(바트)'] = sale_prices
+    column_order = list(base_columns)
+    # 수수료별 컬럼 (마크업을 최종세일가 앞에 위치)
+    for comm_rate, pricing in zip(commission_rates, groups):
+        comm_rate_str = str(comm_rate).replace('.', '_')
+        group = {
+            f'마크업_{comm_rate_str}': pricing['required_markup'],
+            f'최종세일가(바트)_{comm_rate_str}%': pricing['final_sale_thb']
+        }
+        if 'margin_krw' in pricing:
+            group.update({
+                f'(원)세일가_{comm_rate_str}%': pricing['sale_krw'],
+                f'최종판매가_{comm_rate_str}%': pricing['final_price'],
+                f'공급가_{comm_rate_str}%': pricing['supply_price'],
+                f'마진_{comm_rate_str}%(원화)': pricing['margin_krw']
+            })
+        columns.update(group)
+        column_order.extend(group)
+    
+    df = pd.DataFrame(columns)
+    return df[column_order]
+
+def unique_commission_rates(commission_rates):
+    """입력 순서를 유지하며 중복 수수료 제거 - 같은 수수료가 두 번 있으면 컬럼 이름이 겹치므로 테이블은 한 번만 계산"""
+    return list(dict.fromkeys(commission_rates))
+
+def build_result_table(parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage=0):
+    """파싱 결과와 설정값으로 결과 테이블 DataFrame 생성 (표시할 행이 없으면 None, 중복 수수료는 한 번만)"""
+    commission_rates = unique_commission_rates(commission_rates)
+    rows = _result_rows(parsed_data)
+    if rows is None:
+        return None
+    base, net_prices, sale_prices = rows
+    net_prices = _net_prices(net_prices, sale_prices, net_price_percentage)
+    
+    pricing = compute_pricing(net_prices, sale_prices, commission_rates, exchange_rate, discount_rate)
+    groups = [{key: values[:, idx] for key, values in pricing.items()} for idx in range(len(commission_rates))]
+    return _assemble_table(base, net_prices, sale_prices, commission_rates, groups)
+
+def currency_rates_to_thb(exchange_rate, currency_rates=None):
+    """통화별 1단위당 바트 환율 dict - THB는 1, KRW는 환율(1 THB = ? KRW)이 있으면 그 역수, 나머지는 currency_rates 값"""
+    rates = {'THB': 1.0}
+    if exchange_rate > 0:
+        rates['KRW'] = 1 / exchange_rate
+    rates.update(currency_rates or {})
+    return rates
+
+def parse_currency_rates(text):
+    """'USD=36.5, EUR=39' 형식 문자열을 {통화: 1단위당 바트} dict로 변환 (잘못된 입력이면 ValueError)"""
+    rates = {}
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        currency, sep, value = item.partition('=')
+        currency = currency.strip().upper()
+        if not sep or not currency:
+            raise ValueError(f'통화=환율 형식이 아닙니다: {item.strip()}')
+        try:
+            rate = float(value)
+        except ValueError:
+            raise ValueError(f'환율이 숫자가 아닙니다: {item.strip()}')
+        if rate <= 0:
+            raise ValueError(f'환율은 0보다 커야 합니다: {item.strip()}')
+        rates[currency] = rate
+    return rates
+
+def build_price_table(parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage=0, currency_rates=None):
+    """가격 테이블(prices)의 모든 (프로그램, 대상, 사이트, 통화) 행을 한 번에 계산한 긴 형식 결과 테이블 (행이 없으면 None)
+    
+    세일가는 currency_rates_to_thb(exchange_rate, currency_rates)로 바트 환산(반올림)한 뒤 build_result_table과
+    같은 compute_pricing으로 모든 행을 한 번에 계산하므로, mk THB 행은 build_result_table의 같은 행과 값이 같습니다.
+    바트 환율을 모르는 통화의 행은 제외됩니다 (price_table_currencies로 확인). 중복 수수료는 한 번만 계산합니다.
+    """
+    commission_rates = unique_commission_rates(commission_rates)
+    prices = parsed_data.get('prices')
+    if prices is None or len(prices) == 0:
+        return None
+    rates = currency_rates_to_thb(exchange_rate, currency_rates)
+    currency = prices['currency'].cat
+    factors = np.array([rates.get(str(code), np.nan) for code in currency.categories], dtype=np.float64)[currency.codes]
+    priced = ~np.isnan(factors)
+    if not priced.any():
+        return None
+    prices = prices[priced]
+    factors = factors[priced]
+    
+    base = _row_labels(prices, parsed_data['basicInfo']['sheets'])
+    base['통화'] = prices['currency'].astype(str).to_numpy()
+    sale_prices = prices['sale_price'].to_numpy(dtype=np.int64)
+    base['세일가'] = sale_prices
+    # THB 행은 그대로, 다른 통화는 바트로 환산
+    sale_thb = np.where(factors == 1, sale_prices, np.rint(sale_prices * factors)).astype(np.int64)
+    net_prices = _net_prices(prices['net_price'].to_numpy(dtype=np.int64), sale_thb, net_price_percentage)
+    
+    pricing = compute_pricing(net_prices, sale_thb, commission_rates, exchange_rate, discount_rate)
+    groups = [{key: values[:, idx] for key, values in pricing.items()} for idx in range(len(commission_rates))]
+    return _assemble_table(pd.DataFrame(base), net_prices, sale_thb, commission_rates, groups, _PRICE_BASE_COLUMNS)
+
+def price_table_currencies(parsed_data, exchange_rate, currency_rates=None):
+    """가격 테이블의 (사이트, 통화)별 행 수와 바트 환율 (모르면 None) DataFrame - 화면/CLI 안내용"""
+    prices = parsed_data.get('prices')
+    if prices is None or len(prices) == 0:
+        return pd.DataFrame(columns=['사이트', '통화', '행 수', '바트 환율'])
+    rates = currency_rates_to_thb(exchange_rate, currency_rates)
+    counts = prices.groupby(['site', 'currency'], observed=True, sort=False).size()
+    return pd.DataFrame({
+        '사이트': counts.index.get_level_values(0).astype(str),
+        '통화': counts.index.get_level_values(1).astype(str),
+        '행 수': counts.to_numpy(),
+        '바트 환율': [rates.get(str(currency)) for currency in counts.index.get_level_values(1)]
+    })
+
+# 변경 전/후 비교에서 행을 짝짓는 키
+DIFF_KEY_COLUMNS = ['Rate ID', 'Program ID', '대상']
+
+def _diff_value_columns(before, after, commission_rates):
+    """비교할 숫자 컬럼 - 넷가/세일가와 수수료별 마크업, 마진(원화) 중 양쪽 테이블에 모두 있는 것"""
+    columns = ['넷가(바트)', '세일가(바트)']
+    for comm_rate in dict.fromkeys(commission_rates):
+        comm_rate_str = str(comm_rate).replace('.', '_')
+        columns.extend([f'마크업_{comm_rate_str}', f'마진_{comm_rate_str}%(원화)'])
+    return [col for col in columns if col in before.columns and col in after.columns]
+
+def _keyed_rows(df):
+    """조인용 키 프레임 - 같은 키가 여러 번 나오면 나온 순서(_occurrence)로 구분하고 원래 행 위치(_row) 보관"""
+    keys = df[DIFF_KEY_COLUMNS].reset_index(drop=True)
+    keys['_occurrence'] = keys.groupby(DIFF_KEY_COLUMNS, sort=False).cumcount()
+    keys['_row'] = np.arange(len(keys))
+    return keys
+
+def diff_result_tables(before, after, commission_rates):
+    """변경 전/후 결과 테이블을 (Rate ID, Program ID, 대상) 해시 조인으로 비교
+    
+    반환 dict:
+        changed: 양쪽에 있고 넷가/세일가/마크업/마진 중 하나라도 다른 행 - 넷가/세일가는 전/후/변화,
+                 수수료별 마크업과 마진(원화)은 변화(후 - 전)
+        added / removed: 변경 후에만 / 변경 전에만 있는 행 (결과 테이블 컬럼 그대로)
+        unchanged: 양쪽에 있고 값이 같은 행 수
+    같은 키가 여러 번 나오면 각 테이블에서 나온 순서대로 짝짓습니다.
+    """
+    value_columns = _diff_value_columns(before, after, commission_rates)
+    joined = pd.merge(
+        _keyed_rows(before), _keyed_rows(after),
+        on=[*DIFF_KEY_COLUMNS, '_occurrence'], how='outer', suffixes=('_before', '_after'), sort=False
+    )
+    before_rows = joined['_row_before']
+    after_rows = joined['_row_after']
+    matched = joined[before_rows.notna() & after_rows.notna()]
+    
+    before_pos = matched['_row_before'].to_numpy(dtype=np.int64)
+    after_pos = matched['_row_after'].to_numpy(dtype=np.int64)
+    before_values = before[value_columns].to_numpy(dtype=np.int64)[before_pos]
+    after_values = after[value_columns].to_numpy(dtype=np.int64)[after_pos]
+    changed_mask = (before_values != after_values).any(axis=1)
+    
+    changed = matched.loc[changed_mask, DIFF_KEY_COLUMNS].reset_index(drop=True)
+    changed['옵션명'] = after['옵션명'].to_numpy()[after_pos[changed_mask]]
+    deltas = after_values[changed_mask] - before_values[changed_mask]
+    for idx, col in enumerate(value_columns):
+        if col in ('넷가(바트)', '세일가(바트)'):
+            changed[f'{col} 전'] = before_values[changed_mask, idx]
+            changed[f'{col} 후'] = after_values[changed_mask, idx]
+        changed[f'{col} 변화'] = deltas[:, idx]
+    
+    return {
+        'changed': changed,
+        'added': after.iloc[np.sort(joined.loc[before_rows.isna(), '_row_after'].to_numpy(dtype=np.int64))].reset_index(drop=True),
+        'removed': before.iloc[np.sort(joined.loc[after_rows.isna(), '_row_before'].to_numpy(dtype=np.int64))].reset_index(drop=True),
+        'unchanged': int(len(matched) - changed_mask.sum())
+    }
+
+# What-if 시뮬레이션 설정
+SWEEP_MAX_POINTS = 200  # 축 하나당 최대 값 개수
+SWEEP_CHUNK_CELLS = 2_000_000  # 한 번에 계산할 (행 × 격자) 셀 수 - 메모리 사용량 제한
+
+def parse_sweep_values(text):
+    """'시작:끝:간격'(끝 포함) 또는 쉼표로 구분된 값을 float 목록으로 변환 (잘못된 입력이면 ValueError)"""
+    text = text.strip()
+    if ':' in text:
+        start, stop, step = (float(x) for x in text.split(':'))
+        if not all(math.isfinite(x) for x in (start, stop, step)):
+            raise ValueError('시작/끝/간격은 유한한 숫자여야 합니다 (inf, nan 불가).')
+        if step <= 0 or stop < start:
+            raise ValueError('간격은 0보다 크고 끝 값은 시작 값 이상이어야 합니다.')
+        # 간격이 아주 작으면 개수가 무한대가 될 수 있으므로 int 변환 전에 최대 개수로 제한
+        count = min((stop - start) / step + 1e-9, SWEEP_MAX_POINTS)
+        values = [round(start + i * step, 10) for i in range(int(count) + 1)]
+    else:
+        values = [float(x.strip()) for x in text.split(',') if x.strip()]
+        if not all(math.isfinite(x) for x in values):
+            raise ValueError('값은 유한한 숫자여야 합니다 (inf, nan 불가).')
+    
+    if not values:
+        raise ValueError('값을 하나 이상 입력해주세요.')
+    if len(values) > SWEEP_MAX_POINTS:
+        raise ValueError(f'값은 최대 {SWEEP_MAX_POINTS}개까지 입력할 수 있습니다.')
+    return values
+
+def margin_surface(net_prices, sale_prices, commission_rates, exchange_rates, discount_rates):
+    """모든 (행, 수수료, 환율, 할인율) 격자점의 마진(원화)을 4차원 int64 배열로 한 번에 계산
+    
+    격자점마다 compute_pricing의 margin_krw와 같은 값이 나오도록 같은 순서로 연산합니다 (환율 > 0).
+    """
+    net = np.asarray(net_prices, dtype=np.int64)[:, np.newaxis]
+    sale = np.asarray(sale_prices, dtype=np.int64)[:, np.newaxis]
+    comm_rate_decimal = np.asarray(commission_rates, dtype=np.float64)[np.newaxis, :] / 100
+    exchange = np.asarray(exchange_rates, dtype=np.float64)[np.newaxis, np.newaxis, :]
+    discount_factor = 1 - np.asarray(discount_rates, dtype=np.float64) / 100
+    
+    # (행, 수수료): 필요 마크업과 최종 세일가(바트)
+    required_markup = _required_markup(net, sale, comm_rate_decimal)
+    final_sale_thb = sale * (1 + required_markup / 100)
+    
+    # (행, 수수료, 환율, 할인율): 판매가 -> 공급가 -> 마진
+    sale_krw = final_sale_thb[:, :, np.newaxis] * exchange
+    final_price = sale_krw[..., np.newaxis] * discount_factor
+    supply_price = final_price - np.rint(final_price * comm_rate_decimal[:, :, np.newaxis, np.newaxis])
+    net_krw = net[:, :, np.newaxis] * exchange
+    return np.rint(supply_price - net_krw[..., np.newaxis]).astype(np.int64)
+
+def sweep_summary(net_prices, sale_prices, commission_rates, exchange_rates, discount_rates):
+    """격자 전체 마진 요약 - 행 묶음 단위로 margin_surface를 계산하여 메모리를 제한
+    
+    반환 dict:
+        negative_count: (수수료, 환율, 할인율)별 마진이 음수인 행 수
+        worst_margin: (수수료, 환율, 할인율)별 최저 마진
+        program_worst_margin: 행별 격자 전체 최저 마진
+    """
+    net = np.asarray(net_prices, dtype=np.int64)
+    sale = np.asarray(sale_prices, dtype=np.int64)
+    grid_shape = (len(commission_rates), len(exchange_rates), len(discount_rates))
+    chunk_rows = max(SWEEP_CHUNK_CELLS // max(int(np.prod(grid_shape)), 1), 1)
+    
+    negative_count = np.zeros(grid_shape, dtype=np.int64)
+    worst_margin = np.full(grid_shape, np.iinfo(np.int64).max, dtype=np.int64)
+    program_worst_margin = np.empty(len(net), dtype=np.int64)
+    
+    for start in range(0, len(net), chunk_rows):
+        stop = start + chunk_rows
+        margins = margin_surface(net[start:stop], sale[start:stop], commission_rates, exchange_rates, discount_rates)
+        negative_count += (margins < 0).sum(axis=0)
+        np.minimum(worst_margin, margins.min(axis=0), out=worst_margin)
+        program_worst_margin[start:stop] = margins.min(axis=(1, 2, 3))
+    
+    return {
+        'negative_count': negative_count,
+        'worst_margin': worst_margin,
+        'program_worst_margin': program_worst_margin
+    }
+
+# 표시 형식 종류 -> (st.column_config 형식 - 브라우저에서 적용, 파이썬 형식 - 수수료 그룹 헤더 표용)
+DISPLAY_FORMATS = {
+    'number': ('%,d', '{:,}'),
+    'percent': ('%d%%', '{}%'),
+    'won': ('%,d원', '{:,}원')
+}
+
+def display_format_kinds(df):
+    """숫자형 결과 테이블의 컬럼별 표시 형식 종류 - 마크업은 %, 마진(원화)은 원 단위, 나머지 숫자 컬럼은 천 단위 구분 기호"""
+    kinds = {}
+    for col in df.columns:
+        if df[col].dtype.kind not in 'iuf':
+            continue
+        if col.startswith('마크업_'):
+            kinds[col] = 'percent'
+        elif '마진' in col and '(원화)' in col:
+            kinds[col] = 'won'
+        else:
+            kinds[col] = 'number'
+    return kinds
+
+def display_column_formats(df):
+    """숫자형 결과 테이블의 컬럼별 st.column_config 형식 문자열 - 포맷팅은 브라우저에서 (숫자 정렬 유지)"""
+    return {col: DISPLAY_FORMATS[kind][0] for col, kind in display_format_kinds(df).items()}
+
+
+def format_display_values(df):
+    """df(렌더링할 행만)를 표시 형식 문자열의 2차원 배열로 변환 - 숫자가 아닌 컬럼은 그대로"""
+    kinds = display_format_kinds(df)
+    columns = []
+    for col in df.columns:
+        values = df[col].tolist()
+        if col in kinds:
+            fmt = DISPLAY_FORMATS[kinds[col]][1].format
+            values = [fmt(x) if pd.notna(x) else '' for x in values]
+        columns.append(values)
+    if not columns:
+        return np.empty((len(df), 0), dtype=object)
+    return np.array(columns, dtype=object).T
+
+# 마진 음수 행 / 양수 마크업 셀 하이라이트 스타일
+HIGHLIGHT_STYLE = 'background-color: #fee2e2; color: #dc2626; font-weight: bold'
+# 표 보기에서 Styler로 한 번에 하이라이트할 최대 셀 수 - Streamlit의 Styler 직렬화는 셀마다 표시값/CSS를 만들어 셀당 약 20µs
+# (2만 행 × 27열에서 약 10초, pandas 기본 한도 262,144셀을 넘으면 오류)이므로, 설정을 바꿀 때마다 1초 안팎에 그리도록
+# 이보다 큰 테이블은 페이지로 나누어 보이는 페이지만 하이라이트
+STYLED_TABLE_MAX_CELLS = 50_000
+STYLED_TABLE_PAGE_SIZES = [500, 1000, 1500]
+
+def styled_table_page_sizes(column_count):
+    """큰 테이블의 페이지당 행 수 선택지 - 한 페이지가 STYLED_TABLE_MAX_CELLS를 넘지 않는 크기만 (없으면 가장 작은 크기)"""
+    sizes = [size for size in STYLED_TABLE_PAGE_SIZES if size * column_count <= STYLED_TABLE_MAX_CELLS]
+    return sizes or STYLED_TABLE_PAGE_SIZES[:1]
+
+def highlight_masks(df):
+    """숫자형 결과 테이블에서 (마진(원화)이 음수인 행 마스크, 마크업 > 0인 셀 마스크) 계산"""
+    margin_pos = [i for i, col in enumerate(df.columns) if '마진' in col and '(원화)' in col]
+    markup_pos = [i for i, col in enumerate(df.columns) if col.startswith('마크업_')]
+    
+    negative_rows = np.zeros(len(df), dtype=bool)
+    if margin_pos:
+        margins = df.iloc[:, margin_pos].apply(pd.to_numeric, errors='coerce')
+        negative_rows = (margins < 0).to_numpy().any(axis=1)
+    
+    markup_cells = np.zeros(df.shape, dtype=bool)
+    if markup_pos:
+        markups = df.iloc[:, markup_pos].apply(pd.to_numeric, errors='coerce')
+        markup_cells[:, markup_pos] = (markups > 0).to_numpy()
+    
+    return negative_rows, markup_cells
+
+def style_result_table(df):
+    """Styler.apply(axis=None)용: 마진이 음수면 행 전체, 아니면 마크업 > 0인 셀만 빨간색"""
+    negative_rows, markup_cells = highlight_masks(df)
+    styles = np.where(negative_rows[:, np.newaxis] | markup_cells, HIGHLIGHT_STYLE, '')
+    return pd.DataFrame(styles, index=df.index, columns=df.columns, dtype=object)
+
+# 결과 내보내기 형식: 형식 -> (버튼 라벨, 확장자, MIME 타입)
+EXPORT_FORMATS = {
+    'csv': ('CSV', '.csv', 'text/csv'),
+}
+# pyarrow(pandas의 선택 의존성)와 xlsxwriter는 설치되어 있을 때만 Parquet/Excel 내보내기 제공 (import는 처음 내보낼 때)
+if importlib.util.find_spec('pyarrow') is not None:
+    EXPORT_FORMATS['parquet'] = ('Parquet', '.parquet', 'application/vnd.apache.parquet')
+if importlib.util.find_spec('xlsxwriter') is not None:
+    EXPORT_FORMATS['xlsx'] = ('Excel', '.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+EXPORT_CSV_CHUNK_ROWS = 10_000  # CSV를 나눠 쓰는 행 수 - 문자열 변환 버퍼 크기 제한
+EXPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024  # 다운로드 파일을 메모리에 두는 최대 크기 - 넘으면 임시 파일에 기록
+
+def export_format_for(path):
+    """파일 경로의 확장자로 내보내기 형식 결정 (알 수 없으면 CSV)"""
+    lower = path.lower()
+    for fmt, (_, extension, _) in EXPORT_FORMATS.items():
+        if lower.endswith(extension):
+            return fmt
+    return 'csv'
+
+def _write_xlsx(df, fileobj):
+    """constant_memory 모드로 한 행씩 기록 - 기록한 행은 바로 임시 파일로 내보내 행 수와 관계없이 메모리 일정
+    
+    화면과 같은 하이라이트(마진 음수 행 / 마크업 > 0 셀)는 셀 서식 대신 조건부 서식으로 넣어 값이 바뀌어도 유지됩니다.
+    """
+    import xlsxwriter
+    from xlsxwriter.utility import xl_col_to_name
+    
+    workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True, 'nan_inf_to_errors': True})
+    worksheet = workbook.add_worksheet('결과')
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#F3F4F6', 'border': 1})
+    number_format = workbook.add_format({'num_format': '#,##0'})
+    highlight_format = workbook.add_format({'bg_color': '#FEE2E2', 'font_color': '#DC2626', 'bold': True})
+    
+    # 열 서식은 행을 쓰기 전에 지정 (constant_memory 모드는 행 순서대로만 기록 가능)
+    numeric = [df[col].dtype.kind in 'iuf' for col in df.columns]
+    for col_idx, (col, is_numeric) in enumerate(zip(df.columns, numeric)):
+        worksheet.set_column(col_idx, col_idx, max(len(col) * 1.5, 10), number_format if is_numeric else None)
+    worksheet.freeze_panes(1, 0)
+    
+    worksheet.write_row(0, 0, list(df.columns), header_format)
+    writers = [worksheet.write_number if is_numeric else worksheet.write for is_numeric in numeric]
+    for row_idx, values in enumerate(df.itertuples(index=False, name=None), start=1):
+        for col_idx, (write, value) in enumerate(zip(writers, values)):
+            write(row_idx, col_idx, value)
+    
+    last_row, last_col = len(df), len(df.columns) - 1
+    if last_row:
+        margin_cols = [xl_col_to_name(i) for i, col in enumerate(df.columns) if '마진' in col and '(원화)' in col]
+        markup_pos = [i for i, col in enumerate(df.columns) if col.startswith('마크업_')]
+        if margin_cols:
+            conditions = ','.join(f'${col}2<0' for col in margin_cols)
+            worksheet.conditional_format(1, 0, last_row, last_col, {
+                'type': 'formula', 'criteria': f'=OR({conditions})', 'format': highlight_format
+            })
+        for col_idx in markup_pos:
+            worksheet.conditional_format(1, col_idx, last_row, col_idx, {
+                'type': 'cell', 'criteria': '>', 'value': 0, 'format': highlight_format
+            })
+    workbook.close()
+
+def write_export(df, fileobj, fmt):
+    """숫자형 결과 테이블을 형식별로 바이너리 파일 객체에 기록 (가격 열은 숫자 그대로 - 표시용 문자열 아님)"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'지원하지 않는 내보내기 형식: {fmt} (사용 가능: {", ".join(EXPORT_FORMATS)})')
+    if fmt == 'csv':
+        df.to_csv(fileobj, index=False, encoding='utf-8-sig', chunksize=EXPORT_CSV_CHUNK_ROWS)
+    elif fmt == 'parquet':
+        df.to_parquet(fileobj, index=False)
+    else:
+        _write_xlsx(df, fileobj)
+
+def export_file(df, fmt):
+    """다운로드 데이터 생성 - st.download_button의 data 콜백으로 넘겨 클릭했을 때만 만들어지게 함
+    
+    SpooledTemporaryFile에 기록하므로 EXPORT_SPOOL_MAX_BYTES를 넘는 파일은 만드는 동안 임시 파일로 옮겨져 메모리에
+    쌓이지 않습니다. 작은 파일은 bytes로, 큰 파일은 임시 파일을 처음부터 읽는 읽기 전용 파일 객체(io.BufferedReader,
+    닫으면 임시 파일 삭제)로 반환합니다.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES) as spool:
+        write_export(df, spool, fmt)
+        size = spool.seek(0, os.SEEK_END)
+        spool.seek(0)
+        if size <= EXPORT_SPOOL_MAX_BYTES:
+            return spool.read()
+        # 임시 파일은 이름 없이 만들어지므로, 복제한 파일 디스크립터를 닫을 때 함께 사라짐
+        return open(os.dup(spool.fileno()), 'rb')
+
+# 파싱/계산 결과 캐시 최대 크기 (바이트) - 모든 세션이 공유
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# 블록 단위 파싱 결과 캐시 최대 크기 (블록 원문 바이트 기준) - 가격 일부만 바뀐 페이지를 다시 붙여넣으면 바뀐 블록만 파싱
+BLOCK_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+class LRUByteCache:
+    """총 바이트 크기로 제한되는 LRU 캐시 (스레드 안전, 적중/미스 카운터 제공)"""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """key에 해당하는 값을 반환하고 최근 사용으로 표시 (없으면 default)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, value, nbytes):
+        """값을 저장하고 최대 크기를 넘으면 가장 오래 사용하지 않은 항목부터 제거"""
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+    
+    def clear(self):
+        """모든 항목 제거 (카운터는 유지)"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+    
+    def stats(self):
+        """적중/미스 횟수, 항목 수, 사용 중인 바이트 수"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+def estimate_size(value):
+    """캐시 항목의 대략적인 메모리 크기 (DataFrame은 deep memory_usage, 배열/배열 묶음은 nbytes, 그 외는 pickle 크기)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        return value.nbytes
+    if isinstance(value, (tuple, list)) and value and all(isinstance(item, (pd.DataFrame, dict, np.ndarray)) for item in value):
+        return sum(estimate_size(item) for item in value)
+    if isinstance(value, dict) and value and all(isinstance(item, np.ndarray) for item in value.values()):
+        return sum(estimate_size(item) for item in value.values())
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+def content_hash(html_content):
+    """붙여넣은 HTML(str) 또는 파일 바이트 버퍼의 해시 (캐시 키) - 같은 문서면 붙여넣기와 파일 업로드의 해시가 같음"""
+    data = html_content.encode('utf-8', errors='replace') if isinstance(html_content, str) else html_content
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# 파싱한 요금표를 보관하는 로컬 저장소 (SQLite, 앱 폴더) - 세션/재시작과 관계없이 유지
+RATE_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rate_store.sqlite3')
+# 저장된 파싱 결과의 파서/저장 형식 버전 - 파싱 규칙이나 parsed_data 형식, 저장소 스키마를 바꾸면 올릴 것
+# (다른 버전으로 저장된 페이지는 조회 시 없는 것으로 보고, 다시 파싱한 결과로 덮어씀)
+RATE_STORE_VERSION = 2
+
+_RATE_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page_id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    basic_info TEXT NOT NULL,
+    site TEXT NOT NULL,
+    stored_at TEXT NOT NULL,
+    parser_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS sheets (
+    page_id INTEGER NOT NULL REFERENCES pages(page_id),
+    sheet INTEGER NOT NULL,
+    rate_id TEXT,
+    period_start TEXT NOT NULL,
+    period_end TEXT NOT NULL,
+    supplier TEXT NOT NULL,
+    PRIMARY KEY (page_id, sheet)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS programs (
+    page_id INTEGER NOT NULL REFERENCES pages(page_id),
+    row INTEGER NOT NULL,
+    sheet INTEGER NOT NULL,
+    program_id TEXT NOT NULL,
+    program_name TEXT NOT NULL,
+    pax_type TEXT NOT NULL,
+    net_price INTEGER NOT NULL,
+    sale_price INTEGER NOT NULL,
+    has_krw_price INTEGER NOT NULL,
+    PRIMARY KEY (page_id, row)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS prices (
+    page_id INTEGER NOT NULL REFERENCES pages(page_id),
+    row INTEGER NOT NULL,
+    sheet INTEGER NOT NULL,
+    program_id TEXT NOT NULL,
+    program_name TEXT NOT NULL,
+    pax_type TEXT NOT NULL,
+    site TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    net_price INTEGER NOT NULL,
+    sale_price INTEGER NOT NULL,
+    PRIMARY KEY (page_id, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sheets_rate_id ON sheets(rate_id);
+CREATE INDEX IF NOT EXISTS sheets_period ON sheets(period_start, period_end);
+CREATE INDEX IF NOT EXISTS programs_program_id ON programs(program_id);
+"""
+
+# 기록 조회 결과 컬럼 (요금 행 단위)
+_HISTORY_COLUMNS = [
+    'rate_id', 'period_start', 'period_end', 'supplier', 'program_id', 'program_name', 'pax_type',
+    'net_price', 'sale_price', 'stored_at'
+]
+
+class RateSheetStore:
+    """파싱 결과(parsed_data)를 내용 해시로 저장하고 rate_id/기간/program_id로 기록을 조회하는 SQLite 저장소 (스레드 안전)
+    
+    페이지(내용 해시) -> 시트(rate_id, 기간, 공급사) -> 요금 행 구조로 저장하며, 같은 내용을 다시 붙여넣으면
+    다시 파싱하지 않고 저장된 테이블을 그대로 불러옵니다. 페이지마다 저장할 때의 RATE_STORE_VERSION을 기록해
+    버전이 다른 페이지(버전 기록 전에 저장된 페이지는 0)는 조회 시 없는 것으로 보고, 다시 파싱한 결과로 덮어씁니다.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_RATE_STORE_SCHEMA)
+            # 버전 컬럼이 생기기 전에 만든 저장소 파일에 컬럼 추가 (기존 페이지는 버전 0)
+            page_columns = [row[1] for row in self._conn.execute('PRAGMA table_info(pages)')]
+            if 'parser_version' not in page_columns:
+                self._conn.execute('ALTER TABLE pages ADD COLUMN parser_version INTEGER NOT NULL DEFAULT 0')
+            self._migrate_program_id_text()
+    
+    def _migrate_program_id_text(self):
+        """program_id가 INTEGER 컬럼이던 저장소 파일의 programs/prices 테이블을 TEXT 컬럼으로 다시 만듦
+        
+        INTEGER 컬럼은 '000123' 같은 ID를 123으로 바꿔 저장하므로 컬럼 타입 자체를 바꿔야 합니다.
+        기존 행의 ID는 문자열로 옮기고(이미 잃은 앞의 0은 복구되지 않음), 페이지는 버전이 달라 다시 파싱됩니다.
+        """
+        column_types = {row[1]: row[2] for row in self._conn.execute('PRAGMA table_info(programs)')}
+        if column_types.get('program_id') == 'TEXT':
+            return
+        # executescript는 중간에 커밋하므로 스키마 문장을 하나씩 실행해 한 트랜잭션으로 옮김
+        self._conn.execute('BEGIN')
+        self._conn.execute('DROP INDEX IF EXISTS programs_program_id')
+        for table in ('programs', 'prices'):
+            self._conn.execute(f'ALTER TABLE {table} RENAME TO {table}_old')
+        for statement in _RATE_STORE_SCHEMA.split(';'):
+            if statement.strip():
+                self._conn.execute(statement)
+        for table in ('programs', 'prices'):
+            columns = [row[1] for row in self._conn.execute(f'PRAGMA table_info({table})')]
+            values = ', '.join('CAST(program_id AS TEXT)' if col == 'program_id' else col for col in columns)
+            self._conn.execute(f'INSERT INTO {table} ({", ".join(columns)}) SELECT {values} FROM {table}_old')
+            self._conn.execute(f'DROP TABLE {table}_old')
+    
+    def get(self, content_hash):
+        """내용 해시에 해당하는 parsed_data (없거나 다른 버전으로 저장됐으면 None) - parseHTML과 같은 형식과 dtype"""
+        with self._lock:
+            page = self._conn.execute(
+                'SELECT page_id, basic_info, site FROM pages WHERE content_hash = ? AND parser_version = ?',
+                (content_hash, RATE_STORE_VERSION)
+            ).fetchone()
+            if page is None:
+                return None
+            page_id, basic_info, site = page
+            price_rows = self._conn.execute(
+                'SELECT sheet, program_id, program_name, pax_type, site, currency, net_price, sale_price '
+                'FROM prices WHERE page_id = ? ORDER BY row', (page_id,)
+            ).fetchall()
+            rows = self._conn.execute(
+                'SELECT sheet, program_id, program_name, pax_type, net_price, sale_price, has_krw_price '
+                'FROM programs WHERE page_id = ? ORDER BY row', (page_id,)
+            ).fetchall()
+        
+        basic_info = json.loads(basic_info)
+        sheet_rate_ids = [sheet['rate_id'] for sheet in basic_info['sheets']]
+        columns = list(zip(*rows)) if rows else [()] * 7
+        price_columns = list(zip(*price_rows)) if price_rows else [()] * 8
+        return {
+            'basicInfo': basic_info,
+            'programs': _program_frame(columns[0], sheet_rate_ids, *columns[1:], site=site),
+            'prices': _price_frame(price_columns[0], sheet_rate_ids, *price_columns[1:])
+        }
+    
+    def put(self, content_hash, parsed_data):
+        """parsed_data를 저장 (같은 버전으로 이미 있는 내용 해시면 무시, 다른 버전이면 덮어씀) - 새로 저장했으면 True"""
+        basic_info = parsed_data['basicInfo']
+        programs = parsed_data['programs']
+        sheet_rows = [
+            (index, sheet['rate_id'], sheet['period']['start'], sheet['period']['end'], sheet['supplier'])
+            for index, sheet in enumerate(basic_info['sheets'])
+        ]
+        program_rows = zip(
+            range(len(programs)),
+            programs['sheet'].tolist(),
+            programs['program_id'].astype(str).tolist(),
+            programs['program_name'].astype(str).tolist(),
+            programs['pax_type'].astype(str).tolist(),
+            programs['net_price'].tolist(),
+            programs['sale_price'].tolist(),
+            programs['has_krw_price'].astype(int).tolist()
+        )
+        site = str(programs['site'].cat.categories[0]) if len(programs['site'].cat.categories) else 'mk'
+        prices = parsed_data['prices']
+        price_rows = zip(
+            range(len(prices)),
+            prices['sheet'].tolist(),
+            prices['program_id'].astype(str).tolist(),
+            prices['program_name'].astype(str).tolist(),
+            prices['pax_type'].astype(str).tolist(),
+            prices['site'].astype(str).tolist(),
+            prices['currency'].astype(str).tolist(),
+            prices['net_price'].tolist(),
+            prices['sale_price'].tolist()
+        )
+        
+        page_values = (json.dumps(basic_info, ensure_ascii=False), site, datetime.now().isoformat(timespec='seconds'), RATE_STORE_VERSION)
+        with self._lock, self._conn:
+            page = self._conn.execute(
+                'SELECT page_id, parser_version FROM pages WHERE content_hash = ?', (content_hash,)
+            ).fetchone()
+            if page is None:
+                page_id = self._conn.execute(
+                    'INSERT INTO pages (content_hash, basic_info, site, stored_at, parser_version) VALUES (?, ?, ?, ?, ?)',
+                    (content_hash, *page_values)
+                ).lastrowid
+            elif page[1] == RATE_STORE_VERSION:
+                return False
+            else:
+                # 다른 버전으로 저장된 페이지는 같은 page_id로 덮어씀 (기록 조회에 같은 페이지가 두 번 나오지 않도록)
+                page_id = page[0]
+                for table in ('prices', 'programs', 'sheets'):
+                    self._conn.execute(f'DELETE FROM {table} WHERE page_id = ?', (page_id,))
+                self._conn.execute(
+                    'UPDATE pages SET basic_info = ?, site = ?, stored_at = ?, parser_version = ? WHERE page_id = ?',
+                    (*page_values, page_id)
+                )
+            self._conn.executemany(
+                'INSERT INTO sheets (page_id, sheet, rate_id, period_start, period_end, supplier) VALUES (?, ?, ?, ?, ?, ?)',
+                ((page_id, *row) for row in sheet_rows)
+            )
+            self._conn.executemany(
+                'INSERT INTO programs (page_id, row, sheet, program_id, program_name, pax_type, net_price, sale_price, has_krw_price) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((page_id, *row) for row in program_rows)
+            )
+            self._conn.executemany(
+                'INSERT INTO prices (page_id, row, sheet, program_id, program_name, pax_type, site, currency, net_price, sale_price) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((page_id, *row) for row in price_rows)
+            )
+        return True
+    
+    def query_rows(self, program_id=None, rate_id=None, period_start=None, period_end=None):
+        """저장된 요금 행 조회 - program_id/rate_id가 같고 시트 기간이 [period_start, period_end]와 겹치는 행 (None이면 조건 없음)
+        
+        기간은 'YYYY-MM-DD' 문자열이며, 결과는 시트 시작일과 저장 순서로 정렬된 _HISTORY_COLUMNS 형식의 DataFrame입니다.
+        """
+        conditions, params = [], []
+        if program_id is not None:
+            conditions.append('p.program_id = ?')
+            params.append(str(program_id))
+        if rate_id is not None:
+            conditions.append('s.rate_id = ?')
+            params.append(str(rate_id))
+        if period_end is not None:
+            conditions.append('s.period_start <= ?')
+            params.append(period_end)
+        if period_start is not None:
+            conditions.append('s.period_end >= ?')
+            params.append(period_start)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT s.rate_id, s.period_start, s.period_end, s.supplier, p.program_id, p.program_name, p.pax_type, '
+                'p.net_price, p.sale_price, g.stored_at '
+                'FROM sheets s JOIN programs p ON p.page_id = s.page_id AND p.sheet = s.sheet '
+                f'JOIN pages g ON g.page_id = s.page_id {where} '
+                'ORDER BY s.period_start, s.page_id, p.row',
+                params
+            ).fetchall()
+        
+        history = pd.DataFrame.from_records(rows, columns=_HISTORY_COLUMNS)
+        return history.astype({'program_id': str, 'net_price': np.int64, 'sale_price': np.int64})
+    
+    def markup_rows(self, commission_rate, **filters):
+        """query_rows(**filters) 중 해당 수수료의 필요 마크업이 0보다 큰 행 (마크업 컬럼 추가)"""
+        history = self.query_rows(**filters)
+        required_markup = _required_markup(
+            history['net_price'].to_numpy(), history['sale_price'].to_numpy(), np.float64(commission_rate) / 100
+        )
+        history['required_markup'] = required_markup
+        return history[required_markup > 0].reset_index(drop=True)
+    
+    def stats(self):
+        """저장된 페이지/시트/요금 행 수와 파일 경로"""
+        with self._lock:
+            counts = [self._conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in ('pages', 'sheets', 'programs')]
+        return {'pages': counts[0], 'sheets': counts[1], 'rows': counts[2], 'path': self.path}
+    
+    def clear(self):
+        """저장된 모든 요금표 삭제"""
+        with self._lock, self._conn:
+            for table in ('prices', 'programs', 'sheets', 'pages'):
+                self._conn.execute(f'DELETE FROM {table}')
+
+
+def _store_call(method, *args):
+    """저장소 조회/저장 - 저장소 오류는 로그만 남기고 None 반환 (파싱은 저장소 없이 계속)"""
+    try:
+        return method(*args)
+    except sqlite3.Error as e:
+        logger.warning('요금표 저장소 오류: %s', e)
+        return None
+
+def cached_parse(html_content, cache, profiler=None, store=None, block_cache=None, stats=None):
+    """HTML 해시 기준으로 parseHTML 결과를 캐시 - (해시, parsed_data, error) 반환 (캐시 미스일 때만 parse.* 단계 기록)
+    
+    store(RateSheetStore)를 넘기면 메모리 캐시에 없을 때 저장소에서 먼저 찾고(parse.store 단계),
+    새로 파싱에 성공한 결과는 저장소에 보관합니다. 문서 전체가 캐시/저장소에 없어 파싱할 때는 block_cache로
+    블록 단위 결과를 재사용하며, 이때 stats(dict)에 블록 수와 재사용한 블록 수를 기록합니다 (parseHTML 참고).
+    """
+    parse_hash = content_hash(html_content)
+    key = ('parse', parse_hash)
+    result = cache.get(key)
+    if result is None:
+        stored = None
+        if store is not None:
+            with _profile_stage(profiler, 'parse.store') as info:
+                stored = _store_call(store.get, parse_hash)
+                if stored is not None:
+                    info['rows'], info['cols'] = stored['programs'].shape
+        if stored is not None:
+            result = (stored, None)
+        else:
+            result = parseHTML(html_content, profiler, block_cache=block_cache, stats=stats)
+            if store is not None and result[0] is not None:
+                _store_call(store.put, parse_hash, result[0])
+        cache.put(key, result, estimate_size(result))
+    parsed_data, error = result
+    return parse_hash, parsed_data, error
+
+def _cached_stage(cache, key, compute, stats):
+    """가격 계산 단계 하나를 캐시에서 찾고 없으면 계산해 저장 (stats에 재계산/재사용 횟수 누적)"""
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.put(key, value, estimate_size(value))
+        stats['computed'] += 1
+    else:
+        stats['reused'] += 1
+    return value
+
+def cached_result_table(parse_hash, parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage, cache, stats=None):
+    """(파싱 해시, 수수료, 환율, 할인율, 넷가%) 기준으로 결과 테이블을 캐시 - 반환된 DataFrame은 수정하지 말 것
+    
+    테이블이 캐시에 없으면 수수료별 계산 단계(markup / sale_krw / discounted)를 각자 의존하는 설정값으로 캐시해,
+    바뀐 설정에 의존하는 단계만 다시 계산하고 테이블을 조립합니다. 예를 들어 할인율을 바꾸면 discounted 단계만,
+    수수료를 하나 추가하면 그 수수료의 단계만 계산합니다. stats(dict)를 넘기면 단계별 재계산/재사용 횟수를 기록합니다.
+    중복 수수료는 build_result_table처럼 한 번만 계산합니다.
+    """
+    commission_rates = unique_commission_rates(commission_rates)
+    stats = stats if stats is not None else {}
+    stats.update(computed=0, reused=0)
+    key = ('table', parse_hash, tuple(commission_rates), exchange_rate, discount_rate, net_price_percentage)
+    df = cache.get(key)
+    if df is not None:
+        return df
+    
+    rows = _cached_stage(cache, ('rows', parse_hash), lambda: _result_rows(parsed_data) or (), stats)
+    if not rows:
+        return None
+    base, net_prices, sale_prices = rows
+    if net_price_percentage > 0:
+        net_prices = _cached_stage(cache, ('net', parse_hash, net_price_percentage),
+                                   lambda: _net_prices(net_prices, sale_prices, net_price_percentage), stats)
+    
+    # 수수료 하나씩 (행, 1) 모양으로 계산 - compute_pricing과 같은 연산이라 결과도 같음
+    net = net_prices[:, np.newaxis]
+    sale = sale_prices[:, np.newaxis]
+    prefix = (parse_hash, net_price_percentage)
+    groups = []
+    for comm_rate in commission_rates:
+        comm_rate_decimal = np.float64(comm_rate) / 100
+        markup_columns, final_sale_thb = _cached_stage(
+            cache, ('markup', *prefix, comm_rate), lambda: _markup_stage(net, sale, comm_rate_decimal), stats)
+        group = dict(markup_columns)
+        if exchange_rate > 0:
+            krw_columns, sale_krw = _cached_stage(
+                cache, ('sale_krw', *prefix, comm_rate, exchange_rate),
+                lambda: _sale_krw_stage(final_sale_thb, exchange_rate), stats)
+            group.update(krw_columns)
+            group.update(_cached_stage(
+                cache, ('discounted', *prefix, comm_rate, exchange_rate, discount_rate),
+                lambda: _discounted_stage(sale_krw, net, comm_rate_decimal, exchange_rate, discount_rate), stats))
+        groups.append({name: values[:, 0] for name, values in group.items()})
+    
+    df = _assemble_table(base, net_prices, sale_prices, commission_rates, groups)
+    cache.put(key, df, estimate_size(df))
+    return df
@@ -0,0 +1,322 @@
+"""가격 계산 HTTP JSON 서비스 - 요금 페이지 HTML 또는 파싱된 프로그램 테이블을 받아 가격 계산 결과를 JSON/Arrow로 반환
+
+표준 라이브러리 http.server만으로 동작하며, CPU를 쓰는 파싱/가격 계산과 응답 직렬화는 프로세스 풀에서 실행하여
+동시에 들어온 요청이 서로를 막지 않습니다. 본문 크기(--max-bytes)와 대기 중인 작업 수(--max-pending)를 제한하며,
+한도를 넘으면 413 / 503으로 바로 응답합니다.
+
+엔드포인트:
+    GET  /health           상태, 파서 엔진, 작업자 수
+    POST /price/html       {"html": "<요금 페이지 HTML>", "commission_rates": [6.6, 10], "exchange_rate": 38.5,
+                            "discount_rate": 5, "net_price_percentage": 0, "engine": "auto"}
+    POST /price/programs   {"programs": [{"program_id": 200001, "program_name": "...", "pax_type": "성인",
+                            "net_price": 900, "sale_price": 1000, "rate_id": "70001"}, ...],
+                            "sheets": [...](선택), 가격 설정은 /price/html과 같음}
+                           또는 Arrow IPC 파일(Feather) 본문 + 쿼리 문자열 가격 설정 (?commission_rates=6.6,10&...)
+
+응답은 JSON {"basicInfo": {...}, "table": {"columns": [...], "data": [[...], ...]}}이며,
+Accept: application/vnd.apache.arrow.file 헤더 또는 ?format=arrow이면 결과 테이블을 Arrow IPC 파일로 반환합니다.
+오류는 {"error": "메시지"}와 400(입력 오류) / 413 / 422(파싱 실패) / 500(처리 중 예상하지 못한 오류, 서버 로그에 기록) /
+503(대기열 가득 참) / 504(시간 초과)입니다.
+
+사용 예:
+    python pricing_service.py --port 8765 --workers 4
+    curl -s localhost:8765/price/html -H 'Content-Type: application/json' -d @request.json
+"""
+import argparse
+import io
+import json
+import logging
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from markup_calculator import (
+    PARSER_ENGINES,
+    build_result_table,
+    parseHTML,
+    parse_sweep_values,
+    parsed_data_from_programs
+)
+
+# 요청 본문 최대 크기 (바이트)
+DEFAULT_MAX_REQUEST_BYTES = 32 * 1024 * 1024
+# 작업자당 대기할 수 있는 작업 수 (넘으면 503)
+DEFAULT_PENDING_PER_WORKER = 4
+DEFAULT_TIMEOUT = 60.0
+
+logger = logging.getLogger('pricing_service')
+
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+ARROW_CONTENT_TYPE = 'application/vnd.apache.arrow.file'
+
+class RequestError(Exception):
+    """클라이언트에 그대로 돌려줄 오류 (HTTP 상태 코드와 메시지)"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def pricing_settings(values):
+    """요청의 가격 설정 검증 - (수수료 목록, 환율, 할인율, 넷가%) 반환, 올바르지 않으면 RequestError(400)
+    
+    values는 JSON 본문 dict 또는 쿼리 문자열 dict이며, 수수료는 숫자 목록이나 '6.6,10' 형식 문자열을 받습니다.
+    """
+    commission_rates = values.get('commission_rates')
+    try:
+        if isinstance(commission_rates, str):
+            commission_rates = parse_sweep_values(commission_rates)
+        elif isinstance(commission_rates, list) and commission_rates:
+            commission_rates = [float(x) for x in commission_rates]
+        else:
+            raise ValueError('commission_rates(수수료 목록)를 하나 이상 입력해주세요.')
+        exchange_rate = float(values.get('exchange_rate') or 0)
+        discount_rate = float(values.get('discount_rate') or 0)
+        net_price_percentage = float(values.get('net_price_percentage') or 0)
+    except (TypeError, ValueError) as e:
+        raise RequestError(400, f'가격 설정이 올바르지 않습니다: {e}')
+    # JSON은 NaN/Infinity도 숫자로 읽으므로 범위 비교 전에 유한한 값인지 확인 (NaN은 모든 비교가 False)
+    if not all(math.isfinite(x) for x in (*commission_rates, exchange_rate, discount_rate, net_price_percentage)):
+        raise RequestError(400, '가격 설정에는 유한한 숫자만 사용할 수 있습니다 (NaN/Infinity 불가).')
+    if not all(0 <= x <= 100 for x in commission_rates):
+        raise RequestError(400, '수수료는 0에서 100 사이여야 합니다.')
+    if exchange_rate < 0 or not 0 <= discount_rate <= 100 or not 0 <= net_price_percentage <= 100:
+        raise RequestError(400, '환율은 0 이상, 할인율은 0에서 100, 넷가%는 0(미적용)에서 100 사이여야 합니다.')
+    return commission_rates, exchange_rate, discount_rate, net_price_percentage
+
+def _encode_result(parsed_data, df, response_format):
+    """(Content-Type, 응답 본문) - JSON은 pandas의 C 구현 to_json으로 테이블을 직렬화"""
+    if response_format == 'arrow':
+        buffer = io.BytesIO()
+        df.to_feather(buffer)
+        return ARROW_CONTENT_TYPE, buffer.getvalue()
+    basic_info = json.dumps(parsed_data['basicInfo'], ensure_ascii=False)
+    table = df.to_json(orient='split', index=False, force_ascii=False)
+    return JSON_CONTENT_TYPE, f'{{"basicInfo": {basic_info}, "table": {table}}}'.encode('utf-8')
+
+def _error_response(status, message):
+    return status, JSON_CONTENT_TYPE, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+
+def price_request(endpoint, body, content_type, query, response_format):
+    """작업자 프로세스에서 실행: 요청 본문을 파싱/계산하여 (상태 코드, Content-Type, 응답 본문) 반환
+    
+    RequestError가 아닌 예외도 로그를 남기고 500 응답으로 바꿔, 클라이언트가 응답 없이 연결이 끊기지 않게 합니다.
+    """
+    try:
+        if content_type == ARROW_CONTENT_TYPE:
+            if endpoint != '/price/programs':
+                raise RequestError(400, 'Arrow 본문은 /price/programs에서만 받을 수 있습니다.')
+            try:
+                programs = pd.read_feather(io.BytesIO(body))
+            except Exception as e:
+                raise RequestError(400, f'Arrow 본문을 읽을 수 없습니다: {e}')
+            values, sheets = query, None
+        else:
+            try:
+                values = json.loads(body)
+            except (UnicodeDecodeError, ValueError) as e:
+                raise RequestError(400, f'JSON 본문을 읽을 수 없습니다: {e}')
+            if not isinstance(values, dict):
+                raise RequestError(400, 'JSON 본문은 객체여야 합니다.')
+            programs, sheets = values.get('programs'), values.get('sheets')
+        settings = pricing_settings(values)
+        
+        if endpoint == '/price/html':
+            html_content = values.get('html')
+            if not isinstance(html_content, str) or not html_content.strip():
+                raise RequestError(400, 'html(요금 페이지 HTML)을 입력해주세요.')
+            engine = values.get('engine', 'auto')
+            if not isinstance(engine, str) or (engine != 'auto' and engine not in PARSER_ENGINES):
+                raise RequestError(400, f'지원하지 않는 파서 엔진입니다: {engine} (사용 가능: auto, {", ".join(PARSER_ENGINES)})')
+            parsed_data, error = parseHTML(html_content, engine=engine)
+            if error:
+                raise RequestError(422, error)
+        else:
+            try:
+                if not isinstance(programs, pd.DataFrame):
+                    programs = pd.DataFrame(programs)
+                parsed_data = parsed_data_from_programs(programs, sheets)
+            except (TypeError, ValueError) as e:
+                raise RequestError(400, f'프로그램 테이블이 올바르지 않습니다: {e}')
+        
+        df = build_result_table(parsed_data, *settings)
+        if df is None:
+            raise RequestError(422, '세일가가 있는 요금이 없습니다.')
+        return (200, *_encode_result(parsed_data, df, response_format))
+    except RequestError as e:
+        return _error_response(e.status, str(e))
+    except Exception as e:
+        logger.exception('가격 계산 요청 처리 실패 (%s)', endpoint)
+        return _error_response(500, f'요청을 처리하는 중 오류가 발생했습니다: {e}')
+
+class PricingService:
+    """프로세스 풀과 대기 작업 수 제한 - HTTP 처리 스레드가 공유"""
+    
+    def __init__(self, workers=None, max_pending=None, max_request_bytes=DEFAULT_MAX_REQUEST_BYTES, timeout=DEFAULT_TIMEOUT):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * DEFAULT_PENDING_PER_WORKER
+        self.max_request_bytes = max_request_bytes
+        self.timeout = timeout
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+    
+    def submit(self, *args):
+        """작업을 풀에 넣고 결과 (상태, Content-Type, 본문) 반환 - 대기열이 가득 차면 503, 시간 초과면 504
+        
+        대기 슬롯은 작업이 실제로 끝나거나 취소될 때 반납합니다. 시간 초과로 504를 보낸 뒤에도 이미 실행 중인 작업은
+        취소되지 않으므로, 그동안은 대기 작업 수에 포함되어 max_pending이 실제 작업량을 제한합니다.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise RequestError(503, f'처리 대기 중인 요청이 너무 많습니다 (최대 {self.max_pending}개). 잠시 후 다시 시도해주세요.')
+        try:
+            future = self.executor.submit(price_request, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise RequestError(504, f'{self.timeout:g}초 안에 처리하지 못했습니다.')
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+class PricingRequestHandler(BaseHTTPRequestHandler):
+    """/health, /price/html, /price/programs 처리 - 본문을 읽고 크기만 검사한 뒤 나머지는 작업자에 맡김"""
+    
+    server_version = 'PricingService/1.0'
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        if urlsplit(self.path).path != '/health':
+            self._send_error(404, '없는 경로입니다.')
+            return
+        service = self.server.service
+        self._send_json(200, {
+            'status': 'ok',
+            'engines': ['auto', *PARSER_ENGINES],
+            'workers': service.workers,
+            'max_pending': service.max_pending,
+            'max_request_bytes': service.max_request_bytes
+        })
+    
+    def handle_expect_100(self):
+        # Expect: 100-continue 요청은 본문을 보내기 전에 크기 한도를 알려줌
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            length = 0
+        if length < 0:
+            self._send_error(400, f'Content-Length가 올바르지 않습니다: {length}', close=True)
+            return False
+        if length > self.server.service.max_request_bytes:
+            self._send_error(413, f'요청 본문이 너무 큽니다 ({length:,} > {self.server.service.max_request_bytes:,} 바이트).', close=True)
+            return False
+        return super().handle_expect_100()
+    
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path not in ('/price/html', '/price/programs'):
+            self._send_error(404, '없는 경로입니다.')
+            return
+        service = self.server.service
+        
+        # 본문은 Content-Length만큼만 읽음 - 크기를 모르거나 한도를 넘으면 읽지 않고 거절
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self._send_error(411, 'Content-Length 헤더가 필요합니다.', close=True)
+            return
+        # 음수 길이는 rfile.read(-1)이 연결이 끝날 때까지 읽어 크기 한도를 건너뛰므로 거절
+        if length < 0:
+            self._send_error(400, f'Content-Length가 올바르지 않습니다: {length}', close=True)
+            return
+        if length > service.max_request_bytes:
+            self._send_error(413, f'요청 본문이 너무 큽니다 ({length:,} > {service.max_request_bytes:,} 바이트).', close=True)
+            return
+        body = self.rfile.read(length)
+        
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        content_type = self.headers.get('Content-Type', 'application/json').split(';')[0].strip()
+        accept = self.headers.get('Accept', '')
+        response_format = 'arrow' if query.get('format') == 'arrow' or ARROW_CONTENT_TYPE in accept else 'json'
+        try:
+            status, response_type, payload = service.submit(url.path, body, content_type, query, response_format)
+        except RequestError as e:
+            self._send_error(e.status, str(e))
+            return
+        except Exception as e:
+            # 작업자 프로세스가 죽는 등 풀에서 난 오류
+            logger.exception('가격 계산 작업 실행 실패 (%s)', url.path)
+            self._send_error(500, f'요청을 처리하는 중 오류가 발생했습니다: {e}')
+            return
+        self._send(status, response_type, payload)
+    
+    def _send(self, status, content_type, payload, close=False):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        if close:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def _send_json(self, status, value, close=False):
+        self._send(status, JSON_CONTENT_TYPE, json.dumps(value, ensure_ascii=False).encode('utf-8'), close)
+    
+    def _send_error(self, status, message, close=False):
+        self._send_json(status, {'error': message}, close)
+    
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+def create_server(host='127.0.0.1', port=8765, quiet=False, **service_options):
+    """서비스 서버 생성 (port=0이면 빈 포트 사용) - serve_forever()로 실행, server_close()와 service.shutdown()으로 종료"""
+    server = ThreadingHTTPServer((host, port), PricingRequestHandler)
+    server.daemon_threads = True
+    server.service = PricingService(**service_options)
+    server.quiet = quiet
+    return server
+
+def build_parser():
+    """커맨드라인 인자 파서 생성"""
+    parser = argparse.ArgumentParser(description='가격 계산 HTTP JSON 서비스를 실행합니다.')
+    parser.add_argument('--host', default='127.0.0.1', help='바인드 주소 (기본값: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='포트 (기본값: 8765)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='작업자 프로세스 수 (기본값: CPU 수)')
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help=f'동시에 처리/대기할 수 있는 요청 수 (기본값: 작업자 수 × {DEFAULT_PENDING_PER_WORKER})')
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_REQUEST_BYTES,
+                        help=f'요청 본문 최대 크기 (바이트, 기본값: {DEFAULT_MAX_REQUEST_BYTES})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help=f'요청당 처리 시간 제한 (초, 기본값: {DEFAULT_TIMEOUT:g})')
+    parser.add_argument('-q', '--quiet', action='store_true', help='요청 로그 출력 안 함')
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = create_server(
+        args.host, args.port, quiet=args.quiet, workers=args.workers, max_pending=args.max_pending,
+        max_request_bytes=args.max_bytes, timeout=args.timeout
+    )
+    host, port = server.server_address[:2]
+    print(f'가격 계산 서비스: http://{host}:{port} (작업자 {server.service.workers}개, 대기 최대 {server.service.max_pending}개)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""기준 구현 - 최적화 전 앱(app_markup_calculator.py)의 파싱 코드와 결과 테이블 루프를 그대로 옮긴 것
+
+회귀 테스트는 현재 구현의 결과를 이 모듈의 결과와 비교합니다. 기대값이 바뀌지 않도록 수정하지 마세요.
+"""
+import re
+
+import pandas as pd
+
+def calculateRate(paxType, netPrice, salePrice, hasKrwPrice=False):
+    """커미션 및 마크업 계산 - React 코드와 동일"""
+    if netPrice == 0 or salePrice == 0:
+        return {
+            'pax_type': paxType,
+            'net_price': netPrice,
+            'sale_price': salePrice,
+            'commission_6_6': 0,
+            'supply_price_6_6': 0,
+            'required_markup_6_6': 0,
+            'commission_10': 0,
+            'supply_price_10': 0,
+            'required_markup_10': 0,
+            'commission_11': 0,
+            'supply_price_11': 0,
+            'required_markup_11': 0
+        }
+    
+    # 6.6% 커미션 계산 - React 코드와 동일
+    import math
+    commission_6_6 = round(salePrice * 0.066)
+    supply_price_6_6 = salePrice - commission_6_6
+    required_markup_6_6 = 0 if hasKrwPrice else (math.ceil((netPrice / supply_price_6_6 - 1) * 100) if supply_price_6_6 < netPrice else 0)
+    
+    # 10% 커미션 계산 - React 코드와 동일
+    commission_10 = round(salePrice * 0.10)
+    supply_price_10 = salePrice - commission_10
+    required_markup_10 = 0 if hasKrwPrice else (math.ceil((netPrice / supply_price_10 - 1) * 100) if supply_price_10 < netPrice else 0)
+    
+    # 11% 커미션 계산 - React 코드와 동일
+    commission_11 = round(salePrice * 0.11)
+    supply_price_11 = salePrice - commission_11
+    required_markup_11 = 0 if hasKrwPrice else (math.ceil((netPrice / supply_price_11 - 1) * 100) if supply_price_11 < netPrice else 0)
+    
+    return {
+        'pax_type': paxType,
+        'net_price': netPrice,
+        'sale_price': salePrice,
+        'commission_6_6': commission_6_6,
+        'supply_price_6_6': supply_price_6_6,
+        'required_markup_6_6': required_markup_6_6,
+        'commission_10': commission_10,
+        'supply_price_10': supply_price_10,
+        'required_markup_10': required_markup_10,
+        'commission_11': commission_11,
+        'supply_price_11': supply_price_11,
+        'required_markup_11': required_markup_11
+    }
+
+def parseHTML(html_content):
+    """HTML 파싱하여 데이터 추출"""
+    try:
+        # 기간 추출
+        period_match = re.search(r'value="(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})~(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})"', html_content)
+        period = [period_match.group(1).split(' ')[0], period_match.group(2).split(' ')[0]] if period_match else ['', '']
+        
+        # rate_id 추출
+        rate_id_match = re.search(r'name="tour_rate\.id"\s+value="(\d+)"', html_content)
+        rate_id = rate_id_match.group(1) if rate_id_match else ''
+        
+        # 공급사 추출
+        supplier_match = re.search(r'id="autoCompleteSupplier_\d+_\d+"[^>]*>([^<]+)</textarea>', html_content)
+        supplier = supplier_match.group(1).strip() if supplier_match else 'N/A'
+        
+        programs = []
+        
+        # SPA 구조인지 확인
+        is_spa_structure = '<tbody child-root="tour_rate.rateJson">' in html_content
+        
+        if is_spa_structure:
+            # SPA 구조: tbody 단위로 파싱
+            tbody_pattern = re.compile(r'<tbody child-root="tour_rate\.rateJson">([\s\S]*?)</tbody>')
+            tbody_matches = tbody_pattern.findall(html_content)
+            
+            for tbody_content in tbody_matches:
+                # 프로그램 ID 추출
+                program_id_match = re.search(r'<input type="hidden" name="program_id" value="(\d+)"', tbody_content)
+                program_id = program_id_match.group(1) if program_id_match else ''
+                
+                # 프로그램명 추출
+                program_name_match = re.search(r'<b>([^<]+)</b>', tbody_content)
+                program_name = program_name_match.group(1).strip() if program_name_match else ''
+                
+                # 각 행(Duration)별로 파싱
+                rows = tbody_content.split('<tr')[1:]  # 첫 번째는 빈 문자열
+                
+                for row in rows:
+                    # Duration 추출
+                    duration_match = re.search(r'name="rate\.\d+\.duration"[^>]*value="(\d+)"', row)
+                    duration = duration_match.group(1) if duration_match else ''
+                    
+                    # 옵션명 = 프로그램명 + Duration
+                    option_name = f"{program_name} {duration}" if duration else program_name
+                    
+                    # Net 가격 추출
+                    adult_nett_match = re.search(r'name="rate\.\d+\.adult\.nett"[^>]*value="(\d+)"', row)
+                    adult_nett = int(adult_nett_match.group(1)) if adult_nett_match else 0
+                    
+                    # Sale 가격 추출 (mk만)
+                    adult_sale_mk_match = re.search(r'name="rate\.\d+\.adult\.sale\.monkey\.THB"[^>]*value="(\d+)"', row)
+                    adult_sale_mk = int(adult_sale_mk_match.group(1)) if adult_sale_mk_match else 0
+                    
+                    # KRW 가격 확인
+                    adult_sale_krw_match = re.search(r'name="rate\.\d+\.adult\.sale\.monkey\.KRW"[^>]*value="(\d+)"', row)
+                    adult_sale_krw = int(adult_sale_krw_match.group(1)) if adult_sale_krw_match else 0
+                    
+                    # program_id와 program_name이 있고, 세일가가 있으면 추가 (넷가가 0이어도 포함)
+                    if program_id and option_name and adult_sale_mk > 0:
+                        programs.append({
+                            'rate_id': rate_id,
+                            'program_id': program_id,
+                            'program_name': option_name,
+                            'site': 'mk',
+                            'rates': [
+                                calculateRate('성인', adult_nett, adult_sale_mk, adult_sale_krw > 0),
+                                calculateRate('아동', 0, 0, False)  # SPA는 보통 아동 가격 없음
+                            ]
+                        })
+        else:
+            # 일반 투어 구조: tr 단위로 파싱
+            # 각 <tr child-root="tour_rate.rateJson">를 찾아서 파싱
+            tr_pattern = re.compile(r'<tr child-root="tour_rate\.rateJson">([\s\S]*?)</tr>')
+            tr_matches = tr_pattern.findall(html_content)
+            
+            for row in tr_matches:
+                # 각 tr 안에서 program_id 추출
+                program_id_match = re.search(r'<input type="hidden" name="program_id" value="(\d+)"', row)
+                program_id = program_id_match.group(1) if program_id_match else ''
+                
+                # 각 tr 안에서 program_name 추출 (program_id 다음에 나오는 <b> 태그 안의 텍스트)
+                # program_id가 있는 부분 이후에서 <b> 태그 찾기
+                if program_id_match:
+                    # program_id 이후의 텍스트에서 첫 번째 <b> 태그 찾기
+                    after_program_id = row[program_id_match.end():]
+                    program_name_match = re.search(r'<b>([^<]+)</b>', after_program_id)
+                    program_name = program_name_match.group(1).strip() if program_name_match else ''
+                else:
+                    # program_id가 없으면 전체 row에서 <b> 태그 찾기
+                    program_name_match = re.search(r'<b>([^<]+)</b>', row)
+                    program_name = program_name_match.group(1).strip() if program_name_match else ''
+                
+                # Net 가격 추출
+                adult_nett_match = re.search(r'name="adult\.nett"[^>]*value="(\d+)"', row)
+                child_nett_match = re.search(r'name="child\.nett"[^>]*value="(\d+)"', row)
+                
+                adult_nett = int(adult_nett_match.group(1)) if adult_nett_match else 0
+                child_nett = int(child_nett_match.group(1)) if child_nett_match else 0
+                
+                # Sale 가격 추출 (mk만)
+                adult_sale_mk_match = re.search(r'name="adult\.sale\.monkey\.THB"[^>]*value="(\d+)"', row)
+                child_sale_mk_match = re.search(r'name="child\.sale\.monkey\.THB"[^>]*value="(\d+)"', row)
+                
+                adult_sale_mk = int(adult_sale_mk_match.group(1)) if adult_sale_mk_match else 0
+                child_sale_mk = int(child_sale_mk_match.group(1)) if child_sale_mk_match else 0
+                
+                # KRW 가격 확인
+                adult_sale_krw_match = re.search(r'name="adult\.sale\.monkey\.KRW"[^>]*value="(\d+)"', row)
+                child_sale_krw_match = re.search(r'name="child\.sale\.monkey\.KRW"[^>]*value="(\d+)"', row)
+                
+                adult_sale_krw = int(adult_sale_krw_match.group(1)) if adult_sale_krw_match else 0
+                child_sale_krw = int(child_sale_krw_match.group(1)) if child_sale_krw_match else 0
+                
+                # program_id와 program_name이 있고, 세일가가 있으면 추가 (넷가가 0이어도 포함)
+                if program_id and program_name and adult_sale_mk > 0:
+                    programs.append({
+                        'rate_id': rate_id,
+                        'program_id': program_id,
+                        'program_name': program_name,
+                        'site': 'mk',
+                        'rates': [
+                            calculateRate('성인', adult_nett, adult_sale_mk, adult_sale_krw > 0),
+                            calculateRate('아동', child_nett, child_sale_mk, child_sale_krw > 0)
+                        ]
+                    })
+        
+        if len(programs) == 0:
+            return None, '프로그램 데이터를 찾을 수 없습니다. HTML에 program_id와 가격 데이터가 포함되어 있는지 확인해주세요.'
+        
+        return {
+            'basicInfo': {
+                'period': {'start': period[0] or '2025-10-01', 'end': period[1] or '2026-03-31'},
+                'site': 'mk (Monkey Travel)',
+                'currency': 'THB',
+                'supplier': supplier
+            },
+            'programs': programs
+        }, None
+        
+    except Exception as e:
+        return None, f'HTML 파싱 중 오류가 발생했습니다: {str(e)}'
+
+
+def result_table(parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage):
+    """결과 테이블 생성 - 원래 main()의 행 단위 루프 (표시할 행이 없으면 None)"""
+    # 테이블 데이터 생성 - 수수료를 동적으로 처리
+    table_rows = []
+    
+    for program in parsed_data['programs']:
+        for rate in program['rates']:
+            # net_price_percentage가 설정되어 있으면 세일가 기준으로 넷가 계산 (넷가가 0이 아니어도 적용)
+            calculated_net_price = rate['net_price']
+            if rate['sale_price'] > 0 and net_price_percentage > 0:
+                calculated_net_price = round(rate['sale_price'] * (net_price_percentage / 100))
+            
+            # net_price > 0 또는 (sale_price > 0이고 net_price_percentage가 설정된 경우) 테이블에 포함
+            if (calculated_net_price > 0 or rate['sale_price'] > 0) and rate['sale_price'] > 0:
+                discount = discount_rate / 100
+                net_krw = calculated_net_price * exchange_rate if exchange_rate > 0 else 0
+                
+                # 기본 행 데이터
+                row_data = {
+                    'Rate ID': program['rate_id'],
+                    'Program ID': program['program_id'],
+                    '시작일': parsed_data['basicInfo']['period']['start'],
+                    '종료일': parsed_data['basicInfo']['period']['end'],
+                    '옵션명': program['program_name'],
+                    '사이트': program['site'],
+                    '대상': rate['pax_type'],
+                    '넷가(바트)': calculated_net_price,
+                    '세일가(바트)': rate['sale_price']
+                }
+                
+                # 각 수수료별로 동적으로 계산
+                for comm_rate in commission_rates:
+                    comm_rate_str = str(comm_rate).replace('.', '_')
+                    comm_rate_decimal = comm_rate / 100
+                    
+                    # 해당 수수료에 대한 필요 마크업 계산
+                    import math
+                    commission_temp = round(rate['sale_price'] * comm_rate_decimal)
+                    supply_price_temp = rate['sale_price'] - commission_temp
+                    has_krw_price = False  # KRW 가격이 있는지 확인 필요 (parseHTML에서 확인)
+                    required_markup = 0
+                    if supply_price_temp > 0 and not has_krw_price:
+                        if supply_price_temp < calculated_net_price:
+                            required_markup = math.ceil((calculated_net_price / supply_price_temp - 1) * 100)
+                    
+                    # 필요 마크업을 사용해 최종 세일가 계산
+                    req_mk = required_markup / 100
+                    final_sale_thb = rate['sale_price'] * (1 + req_mk)
+                    sale_krw = final_sale_thb * exchange_rate if exchange_rate > 0 else 0
+                    final_price = sale_krw * (1 - discount) if exchange_rate > 0 else 0
+                    commission = round(final_price * comm_rate_decimal) if exchange_rate > 0 else 0
+                    supply_price = final_price - commission if exchange_rate > 0 else 0
+                    margin_krw = supply_price - net_krw
+                    
+                    # 컬럼명 생성
+                    row_data[f'마크업_{comm_rate_str}'] = required_markup
+                    row_data[f'최종세일가(바트)_{comm_rate_str}%'] = round(final_sale_thb)
+                    if exchange_rate > 0:
+                        row_data[f'(원)세일가_{comm_rate_str}%'] = round(sale_krw)
+                        row_data[f'최종판매가_{comm_rate_str}%'] = round(final_price)
+                        row_data[f'공급가_{comm_rate_str}%'] = round(supply_price)
+                        row_data[f'마진_{comm_rate_str}%(원화)'] = round(margin_krw)
+                
+                table_rows.append(row_data)
+    
+    if table_rows:
+        df = pd.DataFrame(table_rows)
+        # 인덱스를 0부터 시작하도록 리셋 (하이라이트 함수에서 인덱스 매칭을 위해)
+        df = df.reset_index(drop=True)
+        
+        # 컬럼 순서 지정 (수수료별로 동적으로 그룹화, 마크업을 최종세일가 앞에 위치)
+        column_order = [
+            'Rate ID', 'Program ID', '시작일', '종료일', '옵션명', '사이트', '대상',
+            '넷가(바트)', '세일가(바트)'
+        ]
+        
+        # 각 수수료별로 컬럼 추가
+        for comm_rate in commission_rates:
+            comm_rate_str = str(comm_rate).replace('.', '_')
+            if exchange_rate > 0:
+                column_order.extend([
+                    f'마크업_{comm_rate_str}', f'최종세일가(바트)_{comm_rate_str}%', f'(원)세일가_{comm_rate_str}%',
+                    f'최종판매가_{comm_rate_str}%', f'공급가_{comm_rate_str}%', f'마진_{comm_rate_str}%(원화)'
+                ])
+            else:
+                column_order.extend([
+                    f'마크업_{comm_rate_str}', f'최종세일가(바트)_{comm_rate_str}%'
+                ])
+        
+        # 존재하는 컬럼만 선택하여 순서 재정렬
+        existing_columns = [col for col in column_order if col in df.columns]
+        df = df[existing_columns]
+        
+        # 환율이 없으면 원화 컬럼 제거
+        if exchange_rate == 0:
+            krw_cols = [col for col in df.columns if '(원화)' in col]
+            df = df.drop(columns=krw_cols)
+        
+        return df
+    return None
@@ -0,0 +1,7 @@
+"""테스트 공통 설정 - 저장소 루트의 모듈을 import할 수 있도록 경로 추가"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
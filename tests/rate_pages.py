@@ -0,0 +1,89 @@
+"""테스트용 요금 페이지(HTML) 생성 - SPA/일반 투어 두 레이아웃
+
+실제 백오피스 페이지처럼 다른 판매 채널 필드, 빈 값, 누락된 필드, hidden이 아닌 program_id 등을 섞어
+같은 seed면 같은 페이지를 만듭니다.
+"""
+import random
+
+LAYOUTS = ('spa', 'tour')
+
+_DURATIONS = ['60', '90', '120', '180']
+
+def _input(name, value, rng, input_type='text'):
+    """입력 필드 - 일부는 값을 비우거나, 필드 자체를 생략하거나, 다른 값으로 한 번 더 넣음"""
+    roll = rng.random()
+    if roll < 0.05:
+        return ''
+    if roll < 0.1:
+        value = ''
+    field = (f'<input type="{input_type}" class="form-control input-sm" name="{name}" '
+             f'data-validate="number" value="{value}">')
+    if roll > 0.97:
+        field += f'<input type="hidden" name="{name}" value="{rng.randint(1, 99)}">'
+    return field
+
+def _program_id(program_id, rng):
+    """program_id 필드 - 가끔 hidden이 아닌 필드(파싱 대상 아님)로 생성"""
+    input_type = 'text' if rng.random() < 0.05 else 'hidden'
+    return f'<input type="{input_type}" name="program_id" value="{program_id}">'
+
+def _header(rng):
+    rate_id = rng.randint(10000, 99999)
+    return (
+        '<html><body><form>\n'
+        f'<input type="hidden" name="tour_rate.id" value="{rate_id}">\n'
+        '<input type="text" name="tour_rate.period" value="2025-11-01 00:00:00~2026-04-30 23:59:59">\n'
+        f'<textarea id="autoCompleteSupplier_{rate_id % 97}_{rate_id % 13}" rows="1"> Siam Leisure </textarea>\n'
+    )
+
+def spa_page(rows, seed=0):
+    """rows개의 Duration 행을 프로그램(tbody)당 1~4개씩 담은 SPA 페이지"""
+    rng = random.Random(f'spa-{rows}-{seed}')
+    parts = [_header(rng), '<table>\n']
+    program_id = 100000
+    remaining = rows
+    while remaining > 0:
+        program_id += rng.randint(1, 7)
+        durations = rng.sample(_DURATIONS, min(rng.randint(1, 4), remaining))
+        parts.append('<tbody child-root="tour_rate.rateJson">\n')
+        for idx, duration in enumerate(durations):
+            sale = 0 if rng.random() < 0.05 else rng.randint(500, 6000)
+            parts.append('<tr>')
+            if idx == 0:
+                parts.append(f'<td>{_program_id(program_id, rng)}<b> Thai Spa {program_id} </b></td>')
+            parts.append(_input(f'rate.{idx}.duration', duration, rng)
+                         + _input(f'rate.{idx}.adult.nett', rng.randint(300, 6000), rng)
+                         + _input(f'rate.{idx}.adult.sale.monkey.THB', sale, rng)
+                         + _input(f'rate.{idx}.adult.sale.monkey.KRW', rng.choice([0, 0, 0, rng.randint(15000, 250000)]), rng)
+                         + _input(f'rate.{idx}.adult.sale.klook.THB', sale + 10, rng))
+            parts.append('</tr>\n')
+        parts.append('</tbody>\n')
+        remaining -= len(durations)
+    parts.append('</table>\n</form></body></html>\n')
+    return ''.join(parts)
+
+def tour_page(rows, seed=0):
+    """rows개의 프로그램 행(tr)을 담은 일반 투어 페이지 - 성인/아동 nett, mk THB/KRW"""
+    rng = random.Random(f'tour-{rows}-{seed}')
+    parts = [_header(rng), '<table><tbody>\n']
+    program_id = 200000
+    for _ in range(rows):
+        program_id += rng.randint(1, 7)
+        adult_sale = 0 if rng.random() < 0.05 else rng.randint(800, 9000)
+        child_sale = 0 if rng.random() < 0.3 else rng.randint(400, 5000)
+        parts.append('<tr child-root="tour_rate.rateJson">'
+                     f'<td>{_program_id(program_id, rng)}<b> Island Tour {program_id} </b></td>'
+                     + _input('adult.nett', rng.randint(500, 9000), rng)
+                     + _input('child.nett', rng.randint(200, 5000), rng)
+                     + _input('adult.sale.monkey.THB', adult_sale, rng)
+                     + _input('child.sale.monkey.THB', child_sale, rng)
+                     + _input('adult.sale.monkey.KRW', rng.choice([0, 0, 0, rng.randint(30000, 300000)]), rng)
+                     + _input('child.sale.monkey.KRW', 0, rng)
+                     + _input('adult.sale.agoda.USD', rng.randint(20, 300), rng)
+                     + '</tr>\n')
+    parts.append('</tbody></table>\n</form></body></html>\n')
+    return ''.join(parts)
+
+def rate_page(layout, rows, seed=0):
+    """layout('spa'/'tour') 구조의 요금 페이지"""
+    return spa_page(rows, seed) if layout == 'spa' else tour_page(rows, seed)
@@ -0,0 +1,37 @@
+"""내보내기 테스트 - export_file이 작은 파일은 bytes로, EXPORT_SPOOL_MAX_BYTES를 넘는 파일은 임시 파일 객체로 돌려주는지 확인"""
+import io
+
+import pandas as pd
+import pytest
+
+import markup_calculator
+from markup_calculator import EXPORT_FORMATS, build_result_table, export_file, parseHTML
+from rate_pages import rate_page
+
+@pytest.fixture(scope='module')
+def result_table():
+    return build_result_table(parseHTML(rate_page('tour', 300, seed=3))[0], [6.6, 10], 38.5, 5)
+
+def _read_back(data, fmt):
+    if fmt == 'csv':
+        return pd.read_csv(io.BytesIO(data), encoding='utf-8-sig', dtype={'Rate ID': str, 'Program ID': str})
+    return pd.read_parquet(io.BytesIO(data))
+
+@pytest.mark.parametrize('spool_max_bytes', [markup_calculator.EXPORT_SPOOL_MAX_BYTES, 1024])
+@pytest.mark.parametrize('fmt', list(EXPORT_FORMATS))
+def test_export_file(result_table, fmt, spool_max_bytes, monkeypatch):
+    monkeypatch.setattr(markup_calculator, 'EXPORT_SPOOL_MAX_BYTES', spool_max_bytes)
+    exported = export_file(result_table, fmt)
+    if spool_max_bytes == 1024:
+        # 임시 파일로 옮겨진 파일은 Streamlit이 읽을 수 있는 io.BufferedReader
+        assert isinstance(exported, io.BufferedReader)
+        with exported:
+            data = exported.read()
+    else:
+        assert isinstance(exported, bytes)
+        data = exported
+    if fmt == 'xlsx':
+        assert data[:2] == b'PK'
+        return
+    pd.testing.assert_frame_equal(_read_back(data, fmt), result_table.astype({'Rate ID': str, 'Program ID': str}),
+                                  check_dtype=False, check_categorical=False)
@@ -0,0 +1,80 @@
+"""필드 추출 회귀 테스트 - 행을 한 번 스캔하는 parseHTML이 원래 parseHTML(baseline_app)과 같은 결과를 내는지 확인
+
+두 레이아웃의 여러 크기 페이지(빈 값, 누락된 필드, hidden이 아닌 program_id 포함)로 비교합니다. 프로그램 테이블은
+원래 결과를 요금 단위 행으로 펼쳐 비교합니다.
+"""
+import pytest
+
+import baseline_app
+from markup_calculator import _scan_fields, parseHTML
+from rate_pages import LAYOUTS, rate_page
+
+PROGRAM_COLUMNS = ['rate_id', 'program_id', 'program_name', 'site', 'pax_type', 'net_price', 'sale_price']
+
+def baseline_rates(programs):
+    """원래 parseHTML의 프로그램 목록을 요금 단위 행으로 펼침 (세일가가 있는 요금만 - 결과 테이블에 들어가는 행)"""
+    rows = []
+    for program in programs:
+        for rate in program['rates']:
+            if rate['sale_price'] > 0:
+                rows.append({
+                    'rate_id': program['rate_id'],
+                    'program_id': program['program_id'],
+                    'program_name': program['program_name'],
+                    'site': program['site'],
+                    'pax_type': rate['pax_type'],
+                    'net_price': rate['net_price'],
+                    'sale_price': rate['sale_price']
+                })
+    return rows
+
+def assert_matches_baseline(html_content):
+    """parseHTML 결과가 원래 parseHTML 결과와 같은지 확인 (basicInfo, 요금 행, 오류 메시지)"""
+    parsed_data, error = parseHTML(html_content)
+    expected_data, expected_error = baseline_app.parseHTML(html_content)
+    assert error == expected_error
+    if expected_data is None:
+        assert parsed_data is None
+        return
+    # 시트 목록(basicInfo['sheets'])은 원래 결과에 없는 항목
+    basic_info = {key: value for key, value in parsed_data['basicInfo'].items() if key != 'sheets'}
+    assert basic_info == expected_data['basicInfo']
+    assert parsed_data['programs'][PROGRAM_COLUMNS].astype(object).to_dict('records') == baseline_rates(expected_data['programs'])
+
+@pytest.mark.parametrize('rows', [1, 7, 100, 2000])
+@pytest.mark.parametrize('layout', LAYOUTS)
+def test_parse_matches_baseline(layout, rows):
+    html_content = rate_page(layout, rows, seed=rows)
+    assert baseline_app.parseHTML(html_content)[1] is None
+    assert_matches_baseline(html_content)
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+def test_program_id_leading_zeros(layout):
+    # program_id는 페이지의 문자열 그대로 (앞자리 0 유지)
+    html_content = rate_page(layout, 20, seed=2).replace('name="program_id" value="', 'name="program_id" value="00')
+    assert_matches_baseline(html_content)
+    assert parseHTML(html_content)[0]['programs']['program_id'].astype(str).str.startswith('00').all()
+
+@pytest.mark.parametrize('html_content', ['', '<html><body><p>요금 없음</p></body></html>',
+                                          '<tbody child-root="tour_rate.rateJson"><tr><td>x</td></tr>'])
+def test_error_matches_baseline(html_content):
+    assert_matches_baseline(html_content)
+
+def test_missing_and_empty_values():
+    spa_row = ('<td><input type="text" name="rate.0.duration" value=""></td>'
+               '<td><input type="text" name="rate.0.adult.nett" value="900"></td>'
+               '<td><input type="text" name="rate.0.adult.sale.monkey.THB" value=""></td>')
+    fields = _scan_fields(spa_row, spa=True)
+    assert fields.get('duration', '') == ''
+    assert fields['adult.nett'] == '900'
+    assert 'adult.sale.monkey.THB' not in fields
+    assert 'adult.sale.monkey.KRW' not in fields
+    
+    # 같은 이름이 여러 번 나오면 값이 있는 첫 필드 (원래 정규식 검색과 같음)
+    tour_row = ('<input type="text" name="adult.nett" value="">'
+                '<input type="text" name="adult.nett" value="700">'
+                '<input type="text" name="adult.nett" value="800">')
+    assert _scan_fields(tour_row)['adult.nett'] == '700'
+    
+    # 접두어가 없는 필드는 SPA 행에서 무시
+    assert _scan_fields('<input name="adult.nett" value="700">', spa=True) == {}
@@ -0,0 +1,104 @@
+"""파서 엔진 간 결과 일치 테스트 - 생성 페이지와 붙여넣기 변형을 모든 엔진으로 파싱해 기준 엔진(regex)과 비교
+
+basicInfo, 프로그램 테이블, 가격 테이블, 오류 메시지가 모두 같아야 합니다. 같은 문서를 UTF-8 바이트 버퍼로 넘긴
+경우(파일 업로드 경로)도 비교합니다. 블록 안에 표가 중첩된 문서는 정규식 엔진이 지원하지 않으므로, 나머지 엔진과
+auto가 중첩 전 문서의 정규식 엔진 결과와 같은지 확인합니다. 설치되지 않은 선택 엔진(lxml)의 테스트는 건너뜁니다.
+"""
+import re
+
+import pandas as pd
+import pytest
+
+from markup_calculator import PARSER_ENGINES, parseHTML
+from benchmarks.rate_page_generator import LAYOUTS, generate_rate_page
+from rate_pages import rate_page
+
+REFERENCE_ENGINE = 'regex'
+# 비교할 엔진 (설치되지 않은 엔진은 건너뜀)
+ENGINES = ['html.parser', 'lxml']
+SIZES = [1, 7, 100, 2000]
+
+def _fragment(html_content, layout):
+    """페이지에서 요금 블록 부분만 잘라낸 HTML (웹페이지에서 표 일부만 복사해 붙여넣은 경우)"""
+    if layout == 'spa':
+        return html_content[html_content.index('<tbody child-root'):html_content.index('</table>')]
+    return html_content[html_content.index('<tr child-root'):html_content.rindex('</tbody>')]
+
+def _entities(html_content):
+    """프로그램명/공급사에 문자 참조가 들어간 변형"""
+    return (html_content
+            .replace('Thai Spa Package', 'Spa &amp; Massage&#39;s&nbsp;Package')
+            .replace('Island Day Tour', 'Island &amp; Beach Tour')
+            .replace('Siam Leisure', 'Siam &amp; Leisure'))
+
+def _nested(html_content, layout):
+    """블록 안의 셀마다 작은 표를 끼워 넣은 변형 (정규식 엔진은 블록이 잘림)"""
+    inner_table = '<table class="table-condensed"><tbody><tr><td>note</td></tr></tbody></table>'
+    if layout == 'spa':
+        return re.sub(r'(<td><input type="text"[^>]*name="rate\.\d+\.duration")', f'<td>{inner_table}</td>\\1', html_content)
+    return html_content.replace('<small class="text-muted">Pickup included</small>', inner_table)
+
+def _variant(name, layout):
+    """붙여넣기 변형 HTML - 블록만 잘라내기, 문자 참조, 빈 값/누락/중복 필드가 섞인 페이지"""
+    if name == 'irregular-fields':
+        return rate_page(layout, 20, seed=1)
+    page = generate_rate_page(layout, 20, seed=1)
+    return _fragment(page, layout) if name == 'fragment' else _entities(page)
+
+def _parser_engine(engine):
+    if engine not in PARSER_ENGINES:
+        pytest.skip(f'{engine} 엔진이 설치되어 있지 않습니다.')
+    return engine
+
+def assert_same_result(actual, expected):
+    """parseHTML 결과 (parsed_data, error) 두 개가 같은지 확인"""
+    parsed_data, error = actual
+    expected_data, expected_error = expected
+    assert error == expected_error
+    if expected_data is None:
+        assert parsed_data is None
+        return
+    assert parsed_data['basicInfo'] == expected_data['basicInfo']
+    pd.testing.assert_frame_equal(parsed_data['programs'], expected_data['programs'])
+    pd.testing.assert_frame_equal(parsed_data['prices'], expected_data['prices'])
+
+@pytest.mark.parametrize('sheets', [1, 3])
+@pytest.mark.parametrize('rows', SIZES)
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engine_matches_reference(engine, layout, rows, sheets):
+    html_content = generate_rate_page(layout, rows, seed=rows, sheets=sheets)
+    assert_same_result(parseHTML(html_content, engine=_parser_engine(engine)), parseHTML(html_content, engine=REFERENCE_ENGINE))
+
+@pytest.mark.parametrize('rows', SIZES)
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('engine', [REFERENCE_ENGINE, *ENGINES])
+def test_bytes_buffer_matches_str(engine, layout, rows):
+    html_content = generate_rate_page(layout, rows, seed=rows, sheets=3)
+    engine = _parser_engine(engine)
+    assert_same_result(parseHTML(html_content.encode('utf-8'), engine=engine), parseHTML(html_content, engine=REFERENCE_ENGINE))
+
+@pytest.mark.parametrize('variant', ['fragment', 'entities', 'irregular-fields'])
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('engine', ENGINES)
+def test_pasted_variant_matches_reference(engine, layout, variant):
+    html_content = _variant(variant, layout)
+    assert_same_result(parseHTML(html_content, engine=_parser_engine(engine)), parseHTML(html_content, engine=REFERENCE_ENGINE))
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('engine', ['auto', 'auto:bytes', *ENGINES])
+def test_nested_tables_match_unnested_reference(engine, layout):
+    page = generate_rate_page(layout, 20, seed=1)
+    html_content = _nested(page, layout)
+    if engine == 'auto:bytes':
+        actual = parseHTML(html_content.encode('utf-8'))
+    else:
+        actual = parseHTML(html_content, engine=engine if engine == 'auto' else _parser_engine(engine))
+    assert_same_result(actual, parseHTML(page, engine=REFERENCE_ENGINE))
+
+@pytest.mark.parametrize('engine', [REFERENCE_ENGINE, *ENGINES])
+def test_no_blocks_error_matches_reference(engine):
+    html_content = '<html><body><p>요금 없음</p></body></html>'
+    actual = parseHTML(html_content, engine=_parser_engine(engine))
+    assert actual[1] is not None
+    assert_same_result(actual, parseHTML(html_content, engine=REFERENCE_ENGINE))
@@ -0,0 +1,57 @@
+"""가격 계산 서비스 요청 검증 테스트 - 작업자에서 실행되는 price_request를 직접 호출해 응답 상태 확인"""
+import json
+
+import pytest
+
+from pricing_service import JSON_CONTENT_TYPE, price_request
+from rate_pages import rate_page
+
+HTML = rate_page('tour', 20, seed=1)
+
+def _post(endpoint, payload):
+    status, content_type, body = price_request(endpoint, json.dumps(payload).encode('utf-8'), JSON_CONTENT_TYPE, {}, 'json')
+    return status, json.loads(body)
+
+def test_valid_settings():
+    status, result = _post('/price/html', {'html': HTML, 'commission_rates': [6.6, 10], 'exchange_rate': 38.5, 'discount_rate': 5})
+    assert status == 200
+    assert result['table']['data']
+
+@pytest.mark.parametrize('settings', [
+    {'commission_rates': [float('nan')]},
+    {'commission_rates': [float('inf')]},
+    {'commission_rates': [10], 'exchange_rate': float('inf')},
+    {'commission_rates': [10], 'exchange_rate': float('nan')},
+    {'commission_rates': [10], 'discount_rate': float('nan')},
+    {'commission_rates': [10], 'net_price_percentage': float('-inf')},
+    {'commission_rates': [-1]},
+    {'commission_rates': [10, 101]},
+    {'commission_rates': [10], 'exchange_rate': -1},
+    {'commission_rates': [10], 'discount_rate': -5},
+    {'commission_rates': [10], 'discount_rate': 150},
+    {'commission_rates': [10], 'net_price_percentage': 120},
+    {'commission_rates': []},
+    {'commission_rates': '10,abc'}
+])
+def test_invalid_settings_are_rejected(settings):
+    # NaN/Infinity는 json.dumps가 NaN/Infinity 리터럴로 쓰고 json.loads가 그대로 읽음
+    status, result = _post('/price/html', {'html': HTML, **settings})
+    assert status == 400, result
+    assert 'error' in result
+
+@pytest.mark.parametrize('engine', [['x'], {'name': 'regex'}, 1, None, 'nope'])
+def test_invalid_engine_is_rejected(engine):
+    status, result = _post('/price/html', {'html': HTML, 'commission_rates': [10], 'engine': engine})
+    assert status == 400, result
+
+PROGRAMS = [
+    {'program_id': '200001', 'program_name': 'Island Tour', 'pax_type': '성인', 'net_price': 900, 'sale_price': 1000},
+    {'program_id': '200002', 'program_name': 'Island Tour', 'pax_type': '아동', 'net_price': 500, 'sale_price': 600}
+]
+
+@pytest.mark.parametrize('net_price, expected_status', [(900, 200), (900.0, 200), (900.5, 400), ('900', 200), ('9x', 400)])
+def test_program_prices_must_be_integers(net_price, expected_status):
+    # 900.5를 900으로 잘라 계산하지 않고 400으로 거부
+    programs = [{**PROGRAMS[0], 'net_price': net_price}, PROGRAMS[1]]
+    status, result = _post('/price/programs', {'programs': programs, 'commission_rates': [10]})
+    assert status == expected_status, result
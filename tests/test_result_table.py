@@ -0,0 +1,52 @@
+"""결과 테이블 회귀 테스트 - 배열 연산 build_result_table이 원래 main()의 행 단위 루프와 같은 테이블을 만드는지 확인
+
+기대값은 원래 파서와 원래 루프(baseline_app)로, 실제값은 현재 parseHTML과 build_result_table로 같은 페이지에서 만듭니다.
+같은 수수료가 여러 번 입력되면 컬럼 이름이 겹치므로, 기대값은 중복을 뺀 수수료 목록으로 만듭니다.
+"""
+import pandas as pd
+import pytest
+
+import baseline_app
+from markup_calculator import LRUByteCache, build_result_table, cached_result_table, parseHTML
+from rate_pages import LAYOUTS, rate_page
+
+# (수수료, 환율, 할인율, 넷가%)
+SETTINGS = [
+    ([6.6, 10, 11], 38.5, 0, 0),
+    ([6.6, 10, 11], 38.5, 5, 0),
+    ([10, 12.5], 38.5, 7.5, 70),
+    ([6.6, 10], 0, 5, 0),
+    ([6.6, 10], 0, 0, 65),
+    ([10], -1, 5, 0),
+    ([0, 100], 38.5, 100, 0),
+    ([], 38.5, 0, 0),
+    ([10, 10, 6.6, 10], 38.5, 5, 0),
+    ([10, 10], 0, 0, 80)
+]
+
+@pytest.fixture(scope='module', params=LAYOUTS)
+def html_content(request):
+    return rate_page(request.param, 300, seed=5)
+
+def _expected(html_content, commission_rates, exchange_rate, discount_rate, net_price_percentage):
+    commission_rates = list(dict.fromkeys(commission_rates))
+    return baseline_app.result_table(baseline_app.parseHTML(html_content)[0], commission_rates, exchange_rate, discount_rate, net_price_percentage)
+
+def _assert_same(actual, expected):
+    assert actual.columns.is_unique
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected, check_dtype=False)
+
+@pytest.mark.parametrize('commission_rates, exchange_rate, discount_rate, net_price_percentage', SETTINGS)
+def test_build_result_table_matches_row_loop(html_content, commission_rates, exchange_rate, discount_rate, net_price_percentage):
+    expected = _expected(html_content, commission_rates, exchange_rate, discount_rate, net_price_percentage)
+    actual = build_result_table(parseHTML(html_content)[0], commission_rates, exchange_rate, discount_rate, net_price_percentage)
+    _assert_same(actual, expected)
+
+def test_cached_result_table_matches_row_loop(html_content):
+    # 설정을 차례로 바꿔 단계 캐시를 재사용하는 경로도 같은 결과여야 함
+    cache = LRUByteCache(64 * 1024 * 1024)
+    parsed_data = parseHTML(html_content)[0]
+    for commission_rates, exchange_rate, discount_rate, net_price_percentage in SETTINGS:
+        expected = _expected(html_content, commission_rates, exchange_rate, discount_rate, net_price_percentage)
+        actual = cached_result_table('test', parsed_data, commission_rates, exchange_rate, discount_rate, net_price_percentage, cache)
+        _assert_same(actual, expected)